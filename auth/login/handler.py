@@ -18,11 +18,11 @@ async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
         return {"ok": True, "mode":"SINGLE", "data":{"access_token": access, "refresh_token": refresh, "scopes": scopes}}
 
     if act == "REFRESH":
-        rec = _store.get_refresh(body.get("refresh_token",""))
+        rec = _store.exchange_refresh(body.get("refresh_token",""), days=30)
         if not rec:
             return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_FORBIDDEN","message":"invalid refresh"}}
         access = jwt_utils.issue_access(rec["user_id"], scopes=DEFAULT_SCOPES, minutes=30)
-        return {"ok": True, "mode":"SINGLE", "data":{"access_token": access}}
+        return {"ok": True, "mode":"SINGLE", "data":{"access_token": access, "refresh_token": rec["refresh_token"]}}
 
     if act == "LOGOUT":
         _store.revoke_refresh(body.get("refresh_token",""))
@@ -0,0 +1,242 @@
+# 매니페스트 선언형 응답 캐시(프로세스 내 LRU + TTL)
+#   cache: { ttl: 5, key: [user_id, input.account_id], max_entries: 256, tags: ["demo.account:{input.account_id}"] }
+#   invalidates: ["demo.account:{input.account_id}"]   # 쓰기 액션 실행 후 해당 태그의 항목을 제거
+#   cache: { ..., disk: true }   # 2차 캐시(core.diskcache) — 재시작/다른 워커와 공유
+#   cache: { ..., disk: true, encrypt: true }   # 디스크에는 암호문으로(잔고/포지션 등 민감한 응답)
+# async 경로(aget/aput/ainvalidate)는 디스크 I/O 를 core.diskcache 의 전용 스레드에서 실행
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import telemetry
+from . import diskcache
+
+DEFAULT_TTL = 5.0
+DEFAULT_MAX_ENTRIES = 256
+
+def _lookup(path: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> Any:
+    # "user_id" / "input" / "input.a.b" / "ctx.x"
+    head, _, rest = path.partition(".")
+    if head == "input":
+        cur: Any = envelope.get("input")
+    elif head == "ctx":
+        cur = ctx or {}
+    else:
+        cur, rest = (ctx or {}), path
+    for part in rest.split(".") if rest else ():
+        cur = cur.get(part) if isinstance(cur, dict) else None
+    return cur
+
+def render(template: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> str:
+    """'demo.account:{input.account_id}' 형태의 태그 템플릿을 채운다."""
+    out, i = [], 0
+    while True:
+        j = template.find("{", i)
+        if j < 0:
+            out.append(template[i:])
+            return "".join(out)
+        k = template.index("}", j)
+        out.append(template[i:j])
+        out.append(str(_lookup(template[j + 1:k], envelope, ctx)))
+        i = k + 1
+
+def cache_key(parts: Iterable[str], envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> str:
+    # 정규화(JSON sort_keys) 후 해시 — dict 키 순서/공백이 달라도 같은 키
+    raw = json.dumps([_lookup(p, envelope, ctx) for p in parts], sort_keys=True, separators=(",", ":"),
+                     ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class _Tags:
+    """태그 -> (캐시, 키) 역색인과 태그별 세대 번호(조회 중 무효화된 결과의 저장을 막는 용도)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, set] = {}
+        self._gen: Dict[str, int] = {}
+
+    def generations(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._gen.get(t, 0) for t in tags)
+
+    def add(self, tags: Tuple[str, ...], cache: "ActionCache", key: str):
+        with self._lock:
+            for t in tags:
+                self._index.setdefault(t, set()).add((cache, key))
+
+    def discard(self, tags: Tuple[str, ...], cache: "ActionCache", key: str):
+        with self._lock:
+            for t in tags:
+                refs = self._index.get(t)
+                if refs is not None:
+                    refs.discard((cache, key))
+                    if not refs:
+                        del self._index[t]
+
+    def invalidate(self, tag: str, disk: bool = True) -> int:
+        with self._lock:
+            self._gen[tag] = self._gen.get(tag, 0) + 1
+            refs = self._index.pop(tag, set())
+        n = 0
+        for cache, key in refs:
+            n += cache.evict(key, reason="invalidated")
+        store = diskcache.active() if disk else None
+        if store is not None:
+            n += store.invalidate_tag(tag)
+        return n
+
+TAGS = _Tags()
+
+class ActionCache:
+    """액션 1개의 결과 캐시. 값은 공유되므로 호출자는 반환된 dict 를 수정하지 않는다."""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.ttl = float(spec.get("ttl") or DEFAULT_TTL)
+        self.key_parts: Tuple[str, ...] = tuple(spec.get("key") or ("user_id", "input"))
+        self.tag_templates: Tuple[str, ...] = tuple(spec.get("tags") or ())
+        self.max_entries = max(1, int(spec.get("max_entries") or DEFAULT_MAX_ENTRIES))
+        self.disk = diskcache.default_cache() if spec.get("disk") else None
+        self.encrypt = bool(spec.get("encrypt"))
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expired = self.invalidated = self.disk_hits = 0
+        telemetry.register_cache(name, self.stats)
+
+    def key(self, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> str:
+        return cache_key(self.key_parts, envelope, ctx)
+
+    def tags(self, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> Tuple[str, ...]:
+        return tuple(render(t, envelope, ctx) for t in self.tag_templates)
+
+    def get(self, key: str, tags: Tuple[str, ...] = ()) -> Optional[Any]:
+        """tags: 이 키의 태그(self.tags()). 디스크를 읽는 동안 무효화되면 디스크 값은 쓰지 않는다."""
+        now = time.monotonic()
+        out = self._get_mem(key, now)
+        if out is not None:
+            return out
+        gens = TAGS.generations(tags)
+        found = self.disk.get(self.name, key) if self.disk is not None else None
+        return self._from_disk(key, found, now, tags, gens)
+
+    async def aget(self, key: str, tags: Tuple[str, ...] = ()) -> Optional[Any]:
+        now = time.monotonic()
+        out = self._get_mem(key, now)
+        if out is not None:
+            return out
+        gens = TAGS.generations(tags)
+        found = await self.disk.aget(self.name, key) if self.disk is not None else None
+        return self._from_disk(key, found, now, tags, gens)
+
+    def _get_mem(self, key: str, now: float) -> Optional[Any]:
+        stale_tags = None
+        with self._lock:
+            ent = self._data.get(key)
+            if ent is not None:
+                if ent[0] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return ent[1]
+                del self._data[key]
+                self.expired += 1
+                stale_tags = ent[2]
+        if stale_tags is not None:
+            TAGS.discard(stale_tags, self, key)
+        return None
+
+    def _from_disk(self, key: str, found: Optional[Tuple[Any, float, Tuple[str, ...]]], now: float,
+                   want: Tuple[str, ...] = (), gens: Tuple[int, ...] = ()) -> Optional[Any]:
+        if found is not None and TAGS.generations(want) != gens:
+            found = None  # 읽는 중에 무효화됨 — 방금 지운 값을 메모리에 되살리지 않고 miss 로
+        if found is not None:
+            value, expires, tags = found
+            # 디스크 항목의 남은 수명만큼만 메모리에 올린다
+            self._store(key, value, tags, now + (expires - time.time()))
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any, tags: Tuple[str, ...] = (), gens: Optional[Tuple[int, ...]] = None):
+        if gens is not None and TAGS.generations(tags) != gens:
+            return  # 실행 중에 관련 태그가 무효화됨 — 오래된 결과를 저장하지 않음
+        self._store(key, value, tags, time.monotonic() + self.ttl)
+        if self.disk is not None:
+            self.disk.put(self.name, key, value, self.ttl, tags, encrypt=self.encrypt)
+
+    async def aput(self, key: str, value: Any, tags: Tuple[str, ...] = (), gens: Optional[Tuple[int, ...]] = None):
+        if gens is not None and TAGS.generations(tags) != gens:
+            return
+        self._store(key, value, tags, time.monotonic() + self.ttl)
+        if self.disk is not None:
+            await self.disk.aput(self.name, key, value, self.ttl, tags, encrypt=self.encrypt)
+
+    def _store(self, key: str, value: Any, tags: Tuple[str, ...], expires: float):
+        dropped: List[Tuple[str, Tuple[str, ...]]] = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                dropped.append((key, old[2]))
+            self._data[key] = (expires, value, tags)
+            while len(self._data) > self.max_entries:
+                k, ent = self._data.popitem(last=False)
+                self.evictions += 1
+                dropped.append((k, ent[2]))
+        for k, t in dropped:
+            if k != key:
+                TAGS.discard(t, self, k)
+        if tags:
+            TAGS.add(tags, self, key)
+
+    def evict(self, key: str, reason: str = "evicted") -> int:
+        with self._lock:
+            ent = self._data.pop(key, None)
+            if ent is None:
+                return 0
+            if reason == "invalidated":
+                self.invalidated += 1
+            else:
+                self.evictions += 1
+        return 1
+
+    def clear(self):
+        with self._lock:
+            items = list(self._data.items())
+            self._data.clear()
+        for k, ent in items:
+            TAGS.discard(ent[2], self, k)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+                "disk": self.disk is not None,
+                "disk_hits": self.disk_hits,
+                "encrypt": self.encrypt,
+            }
+
+def invalidate(templates: Iterable[str], envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> int:
+    """쓰기 액션의 invalidates 템플릿을 채워 해당 태그의 캐시 항목을 모두 제거."""
+    return sum(TAGS.invalidate(render(t, envelope, ctx)) for t in templates)
+
+async def ainvalidate(templates: Iterable[str], envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> int:
+    """invalidate 의 async 판. 메모리 항목/세대는 즉시, 디스크 항목은 전용 스레드에서 제거."""
+    tags = [render(t, envelope, ctx) for t in templates]
+    n = sum(TAGS.invalidate(t, disk=False) for t in tags)
+    disk = diskcache.active()
+    if disk is not None and tags:
+        n += await disk.ainvalidate_tags(tags)
+    return n
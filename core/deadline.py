@@ -0,0 +1,51 @@
+# 요청 마감 시각(deadline) 전파: ctx["deadline"] = epoch 초
+#   X-Request-Deadline 헤더(epoch 초 또는 ms) + 매니페스트 resources.timeout_ms 중 빠른 쪽
+#   중첩 registry.run / 외부 HTTP 호출은 remaining()/timeout() 으로 남은 예산만큼만 기다린다
+import time
+from typing import Any, Dict, Optional
+
+from .errors import err_timeout
+
+HEADER = "X-Request-Deadline"
+
+def parse_header(value: Optional[str]) -> Optional[float]:
+    """epoch 초(소수 허용) 또는 epoch ms. 해석할 수 없으면 None."""
+    if not value:
+        return None
+    try:
+        v = float(value)
+    except ValueError:
+        return None
+    if v > 1e11:  # ms 단위
+        v /= 1000.0
+    return v if v > 0 else None
+
+def earliest(*deadlines: Optional[float]) -> Optional[float]:
+    vals = [d for d in deadlines if d is not None]
+    return min(vals) if vals else None
+
+def from_timeout_ms(timeout_ms: Any, now: Optional[float] = None) -> Optional[float]:
+    if not timeout_ms:
+        return None
+    return (now or time.time()) + float(timeout_ms) / 1000.0
+
+def remaining(ctx: Optional[Dict[str, Any]]) -> Optional[float]:
+    """남은 초(음수면 이미 만료). 마감이 없으면 None."""
+    d = (ctx or {}).get("deadline")
+    if d is None:
+        return None
+    return d - time.time()
+
+def check(ctx: Optional[Dict[str, Any]], what: str = "request"):
+    rem = remaining(ctx)
+    if rem is not None and rem <= 0:
+        raise err_timeout("Deadline exceeded", {"stage": what, "over_ms": round(-rem * 1000, 1)})
+
+def timeout(ctx: Optional[Dict[str, Any]], default: float) -> float:
+    """외부 호출 timeout(초): 기본값과 남은 예산 중 작은 값. 이미 만료면 ERR_TIMEOUT."""
+    rem = remaining(ctx)
+    if rem is None:
+        return default
+    if rem <= 0:
+        check(ctx, "outbound")
+    return min(default, rem)
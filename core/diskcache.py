@@ -0,0 +1,249 @@
+# 디스크 2차 캐시(SQLite, data/cache.db): 재시작/다른 uvicorn 워커와 공유되는 TTL 캐시
+#   - 값은 JSON, 행마다 만료 시각(expires)과 태그를 저장
+#   - 총 크기/개수 상한을 넘으면 만료가 가까운 순으로 제거
+#   - 캐시 오류(잠금/디스크 등)는 요청을 실패시키지 않고 miss 로 처리
+#   - async 경로는 aget/aput/ainvalidate_tags — SQLite 호출을 전용 스레드에서 실행(이벤트 루프를 막지 않음)
+#   - encrypt=True 로 넣은 값은 secret_store 키(Fernet)로 암호화해 저장(잔고/토큰 등 민감한 응답)
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from cryptography.fernet import InvalidToken
+
+from . import telemetry
+from . import secret_store
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DB_PATH = os.path.join(ROOT, "data", "cache.db")
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 100_000
+_EVICT_EVERY = 64  # put N회마다 만료/용량 정리
+BUSY_TIMEOUT = 1.0  # 잠금 대기(초) — 캐시는 오래 기다리느니 miss 로 처리
+IO_THREADS = 2
+_ENC = "enc:"  # 암호화된 value 접두어
+
+_IO: Optional[ThreadPoolExecutor] = None
+_IO_LOCK = threading.Lock()
+
+def _io() -> ThreadPoolExecutor:
+    global _IO
+    with _IO_LOCK:
+        if _IO is None:
+            _IO = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="mf-diskcache")
+        return _IO
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries(
+    ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, tags TEXT NOT NULL,
+    expires REAL NOT NULL, size INTEGER NOT NULL, PRIMARY KEY(ns, key));
+CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries(expires);
+CREATE TABLE IF NOT EXISTS entry_tags(
+    tag TEXT NOT NULL, ns TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY(tag, ns, key));
+"""
+
+class DiskCache:
+    def __init__(self, path: str = DB_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._tls = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        # 항목 수/바이트: put/delete/invalidate 에서 증감, _evict 에서 전체를 다시 센다(다른 워커의 쓰기 보정).
+        # stats()(텔레메트리, 이벤트 루프)는 DB 를 읽지 않고 이 값만 보고한다. None = 아직 센 적 없음
+        self._size: Optional[int] = None
+        self._bytes: Optional[int] = None
+        self.hits = self.misses = self.evictions = self.expired = self.invalidated = self.errors = 0
+        telemetry.register_cache(f"disk:{os.path.basename(path)}", self.stats)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._tls.conn = conn
+            if self._size is None:
+                count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+                with self._lock:
+                    if self._size is None:
+                        self._size, self._bytes = count, total
+        return conn
+
+    def _count(self, attr: str, n: int = 1):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def _resize(self, entries: int, size: int):
+        with self._lock:
+            if self._size is not None:
+                self._size = max(0, self._size + entries)
+                self._bytes = max(0, self._bytes + size)
+
+    def get(self, ns: str, key: str) -> Optional[Tuple[Any, float, Tuple[str, ...]]]:
+        """(value, expires(epoch), tags) 또는 None."""
+        try:
+            row = self._conn().execute(
+                "SELECT value, expires, tags FROM entries WHERE ns=? AND key=?", (ns, key)).fetchone()
+        except sqlite3.Error:
+            self._count("errors")
+            return None
+        if row is None:
+            self._count("misses")
+            return None
+        if row[1] <= time.time():
+            self._count("misses")
+            self._count("expired")
+            return None  # 정리는 _evict 에서
+        raw = row[0]
+        if raw.startswith(_ENC):
+            try:
+                raw = secret_store.cipher().decrypt(raw[len(_ENC):].encode("ascii")).decode("utf-8")
+            except (InvalidToken, ValueError):
+                self._count("errors")  # 키가 바뀐 뒤의 항목 등 — miss
+                return None
+        self._count("hits")
+        return json.loads(raw), row[1], tuple(json.loads(row[2]))
+
+    def put(self, ns: str, key: str, value: Any, ttl: float, tags: Iterable[str] = (), encrypt: bool = False):
+        tags = tuple(tags)
+        try:
+            raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return  # JSON 으로 표현할 수 없는 값은 디스크에 두지 않음
+        if encrypt:
+            raw = _ENC + secret_store.cipher().encrypt(raw.encode("utf-8")).decode("ascii")
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN")
+                old = conn.execute("SELECT size FROM entries WHERE ns=? AND key=?", (ns, key)).fetchone()
+                conn.execute("INSERT OR REPLACE INTO entries(ns, key, value, tags, expires, size) VALUES(?,?,?,?,?,?)",
+                             (ns, key, raw, json.dumps(tags), time.time() + float(ttl), len(raw)))
+                conn.execute("DELETE FROM entry_tags WHERE ns=? AND key=?", (ns, key))
+                if tags:
+                    conn.executemany("INSERT OR IGNORE INTO entry_tags(tag, ns, key) VALUES(?,?,?)",
+                                     [(t, ns, key) for t in tags])
+        except sqlite3.Error:
+            self._count("errors")
+            return
+        self._resize(0 if old else 1, len(raw) - (old[0] if old else 0))
+        with self._lock:
+            self._puts += 1
+            due = self._puts % _EVICT_EVERY == 0
+        if due:
+            self._evict()
+
+    # ---- async(이벤트 루프용) ----
+    async def aget(self, ns: str, key: str) -> Optional[Tuple[Any, float, Tuple[str, ...]]]:
+        return await asyncio.get_running_loop().run_in_executor(_io(), self.get, ns, key)
+
+    async def aput(self, ns: str, key: str, value: Any, ttl: float, tags: Iterable[str] = (),
+                   encrypt: bool = False):
+        await asyncio.get_running_loop().run_in_executor(
+            _io(), partial(self.put, ns, key, value, ttl, tuple(tags), encrypt=encrypt))
+
+    async def ainvalidate_tags(self, tags: Iterable[str]) -> int:
+        def run():
+            return sum(self.invalidate_tag(t) for t in tags)
+        return await asyncio.get_running_loop().run_in_executor(_io(), run)
+
+    def delete(self, ns: str, key: str):
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN")
+                old = conn.execute("SELECT size FROM entries WHERE ns=? AND key=?", (ns, key)).fetchone()
+                conn.execute("DELETE FROM entries WHERE ns=? AND key=?", (ns, key))
+                conn.execute("DELETE FROM entry_tags WHERE ns=? AND key=?", (ns, key))
+        except sqlite3.Error:
+            self._count("errors")
+            return
+        if old:
+            self._resize(-1, -old[0])
+
+    def invalidate_tag(self, tag: str) -> int:
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN")
+                freed = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE (ns, key) IN "
+                                     "(SELECT ns, key FROM entry_tags WHERE tag=?)", (tag,)).fetchone()[0]
+                n = conn.execute("DELETE FROM entries WHERE (ns, key) IN "
+                                 "(SELECT ns, key FROM entry_tags WHERE tag=?)", (tag,)).rowcount
+                conn.execute("DELETE FROM entry_tags WHERE tag=?", (tag,))
+        except sqlite3.Error:
+            self._count("errors")
+            return 0
+        if n:
+            self._count("invalidated", n)
+            self._resize(-n, -freed)
+        return n
+
+    def _evict(self):
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN")
+                n = conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),)).rowcount
+                self._count("expired", max(n, 0))
+                count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+                while count > self.max_entries or total > self.max_bytes:
+                    over = max(count - self.max_entries, 1)
+                    batch = max(over, count // 10, 1)  # 용량 초과면 10%씩 제거
+                    rows = conn.execute("SELECT rowid, size FROM entries ORDER BY expires LIMIT ?", (batch,)).fetchall()
+                    if not rows:
+                        break
+                    conn.executemany("DELETE FROM entries WHERE rowid=?", [(r[0],) for r in rows])
+                    self._count("evictions", len(rows))
+                    count -= len(rows)
+                    total -= sum(r[1] for r in rows)
+                conn.execute("DELETE FROM entry_tags WHERE NOT EXISTS "
+                             "(SELECT 1 FROM entries e WHERE e.ns = entry_tags.ns AND e.key = entry_tags.key)")
+        except sqlite3.Error:
+            self._count("errors")
+            return
+        with self._lock:
+            self._size, self._bytes = count, total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": f"disk:{os.path.basename(self.path)}",
+                "size": self._size,
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+                "errors": self.errors,
+            }
+
+_DEFAULT: Optional[DiskCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+def default_cache() -> DiskCache:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = DiskCache()
+        return _DEFAULT
+
+def active() -> Optional[DiskCache]:
+    # DB 파일이 없으면 None(무효화만으로 DB 를 만들지 않음). 다른 워커가 만든 DB 도 무효화 대상
+    if _DEFAULT is None and not os.path.exists(DB_PATH):
+        return None
+    return default_cache()
@@ -31,3 +31,24 @@ def err_timeout(msg: str, details: Optional[Dict[str, Any]] = None) -> Framework
 
 def err_circuit_open(msg: str, details: Optional[Dict[str, Any]] = None) -> FrameworkError:
     return FrameworkError("ERR_CIRCUIT_OPEN", msg, details, 503)
+
+# core.runner / core.security 용 예외(동기 실행 경로)
+class ManifestError(FrameworkError):
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__("ERR_MANIFEST", message, details, 500)
+
+class UnsupportedMode(FrameworkError):
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__("ERR_UNSUPPORTED_MODE", message, details, 400)
+
+class SchemaValidationError(FrameworkError):
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__("ERR_SCHEMA", message, details, 400)
+
+class AuthzDenied(FrameworkError):
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__("ERR_FORBIDDEN", message, details, 403)
+
+class ModuleExecutionError(FrameworkError):
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__("ERR_MODULE", message, details, 500)
@@ -0,0 +1,272 @@
+# 블로킹/CPU 핸들러 오프로딩(매니페스트 resources.executor: thread | process)
+import os
+import time
+import atexit
+import asyncio
+import importlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import resource  # POSIX 전용(Windows에서는 자원 제한 생략)
+except ImportError:  # pragma: no cover
+    resource = None
+
+from . import telemetry
+from .errors import err_internal
+from . import deadline as dl
+
+DEFAULT_POOL_SIZE = 4
+
+_tls = threading.local()
+_LOOPS: list = []
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    # 워커 스레드마다 이벤트 루프 1개를 재사용(async def 핸들러 실행용)
+    loop = getattr(_tls, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _tls.loop = loop
+        _LOOPS.append(loop)
+    return loop
+
+def call_blocking(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    out = fn(*args, **kwargs)
+    if asyncio.iscoroutine(out):
+        out = _thread_loop().run_until_complete(out)
+    return out
+
+class _PoolStats:
+    kind = "?"
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, int(size))
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.max_queued = 0
+        self.wait_ms: deque = deque(maxlen=200)  # 최근 200개
+
+    def _on_enqueue(self):
+        with self._lock:
+            self.queued += 1
+            if self.queued > self.max_queued:
+                self.max_queued = self.queued
+
+    def _on_start(self, wait_ms: float):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_ms.append(wait_ms)
+
+    def _on_done(self):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self.wait_ms)
+            out = {
+                "name": self.name,
+                "kind": self.kind,
+                "size": self.size,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "max_queued": self.max_queued,
+            }
+        out["wait_p50_ms"] = telemetry.percentile(waits, 0.50)
+        out["wait_p95_ms"] = telemetry.percentile(waits, 0.95)
+        out["wait_max_ms"] = waits[-1] if waits else None
+        return out
+
+class ThreadExecutor(_PoolStats):
+    """이름 붙은 고정 크기 스레드 풀. 대기열 깊이/대기 시간을 집계해 풀 크기 산정에 사용."""
+    kind = "thread"
+
+    def __init__(self, name: str, size: int = DEFAULT_POOL_SIZE):
+        super().__init__(name, size)
+        self._pool = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=f"mf-{name}")
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        enqueued = time.perf_counter()
+        self._on_enqueue()
+
+        def task():
+            self._on_start((time.perf_counter() - enqueued) * 1000)
+            try:
+                return call_blocking(fn, args, kwargs)
+            finally:
+                self._on_done()
+
+        return await asyncio.get_running_loop().run_in_executor(self._pool, task)
+
+    async def run_handler(self, module_name: str, handler, envelope: Dict[str, Any],
+                          ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if (ctx or {}).get("deadline") is None:
+            return await self.submit(handler.run, envelope, ctx=ctx, env=env)
+
+        def run(envelope, ctx=None, env=None):
+            dl.check(ctx, "queued")  # 대기열에서 마감을 넘긴 작업은 실행하지 않음
+            return handler.run(envelope, ctx=ctx, env=env)
+
+        return await self.submit(run, envelope, ctx=ctx, env=env)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+# ---- process workers ----
+_PROC_LIMITS: Dict[str, Any] = {}
+
+def _proc_init(module_name: str, limits: Dict[str, Any]):
+    # 워커 기동 시 핸들러를 미리 import(pre-warm)하고 메모리 상한을 건다
+    _PROC_LIMITS.update(limits)
+    mem_mb = limits.get("memory_mb")
+    if resource is not None and mem_mb:
+        nbytes = int(mem_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+    importlib.import_module(f"{module_name}.handler")
+
+def _proc_warm() -> int:
+    time.sleep(0.05)  # 다른 워커가 생성되도록 잠시 점유
+    return os.getpid()
+
+def _proc_call(module_name: str, envelope: Dict[str, Any], ctx, env):
+    started = time.time()
+    cpu = _PROC_LIMITS.get("cpu_seconds")
+    if resource is not None and cpu:
+        # RLIMIT_CPU는 누적값이라 작업마다 "현재 사용량 + 허용치"로 다시 건다(초과 시 SIGXCPU로 워커 종료)
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(ru.ru_utime + ru.ru_stime) + int(cpu) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    mod = importlib.import_module(f"{module_name}.handler")
+    return started, call_blocking(mod.run, (envelope,), {"ctx": ctx, "env": env})
+
+class ProcessExecutor(_PoolStats):
+    """핸들러를 미리 import한 워커 프로세스 풀(GIL 우회용). 워커가 죽으면 풀을 다시 띄운다."""
+    kind = "process"
+
+    def __init__(self, name: str, module_name: str, size: int = 0, limits: Optional[Dict[str, Any]] = None,
+                 max_tasks_per_child: Optional[int] = None):
+        super().__init__(name, size or os.cpu_count() or 1)
+        self.module_name = module_name
+        self.limits = dict(limits or {})
+        self.max_tasks_per_child = max_tasks_per_child
+        self.respawns = 0
+        self._pool_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._spawn()
+
+    def _spawn(self):
+        kw: Dict[str, Any] = {}
+        if self.max_tasks_per_child:
+            kw["max_tasks_per_child"] = int(self.max_tasks_per_child)
+        pool = self._pool = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_proc_init,
+            initargs=(self.module_name, self.limits),
+            **kw,
+        )
+        # pre-warm 은 백그라운드 스레드에서(매니페스트 로드는 이벤트 루프 위에서 일어나므로 기다리지 않는다)
+        self.warm = False
+        threading.Thread(target=self._warm, args=(pool,), name=f"mf-{self.name}-warm", daemon=True).start()
+
+    def _warm(self, pool: ProcessPoolExecutor):
+        # 워커 수만큼 작업을 던져 프로세스를 모두 기동
+        try:
+            for f in [pool.submit(_proc_warm) for _ in range(self.size)]:
+                f.result()
+        except Exception:
+            return  # 기동 중 풀이 깨졌거나 종료됨 — 첫 요청에서 재기동
+        if self._pool is pool:
+            self.warm = True
+
+    def _respawn(self, broken: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self._pool is not broken:
+                return  # 다른 호출이 이미 재기동함
+            self.respawns += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._spawn()
+
+    async def run_handler(self, module_name: str, handler, envelope: Dict[str, Any],
+                          ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        enqueued = time.time()
+        self._on_enqueue()  # 프로세스 풀은 제출~완료 구간을 in-flight로 집계
+        pool = self._pool
+        try:
+            fut = pool.submit(_proc_call, module_name, envelope, ctx, env)
+            started, out = await asyncio.wrap_future(fut)
+            with self._lock:
+                self.wait_ms.append((started - enqueued) * 1000)
+            return out
+        except BrokenProcessPool:
+            # 워커 비정상 종료(CPU/메모리 한도 초과 등) — 해당 요청은 실패, 풀은 재기동
+            await asyncio.get_running_loop().run_in_executor(None, self._respawn, pool)
+            raise err_internal("Worker process died", {"pool": self.name, "respawns": self.respawns})
+        finally:
+            with self._lock:
+                self.queued -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        inflight = out["queued"]
+        out["active"] = min(inflight, self.size)
+        out["queued"] = max(0, inflight - self.size)
+        out["respawns"] = self.respawns
+        out["warm"] = self.warm
+        out["limits"] = dict(self.limits)
+        return out
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+_EXECUTORS: Dict[str, _PoolStats] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+def get_executor(resources: Dict[str, Any], default_name: str):
+    """resources.executor 선언에 맞는 풀을 돌려준다. 같은 이름(resources.pool, 기본은 모듈명)은
+    프로세스 내에서 공유되며, 크기는 처음 생성될 때의 pool_size로 고정된다.
+    process 풀의 워커는 처음 선언한 모듈의 핸들러를 미리 import 해 둔다."""
+    kind = str(resources.get("executor") or "").lower()
+    if kind in ("", "inline", "none"):
+        return None
+    if kind not in ("thread", "process"):
+        raise ValueError(f"unsupported executor: {kind}")
+    name = str(resources.get("pool") or default_name)
+    with _EXECUTORS_LOCK:
+        ex = _EXECUTORS.get(name)
+        if ex is None:
+            if kind == "thread":
+                ex = ThreadExecutor(name, int(resources.get("pool_size") or DEFAULT_POOL_SIZE))
+            else:
+                limits = {k: resources[k] for k in ("cpu_seconds", "memory_mb") if resources.get(k)}
+                ex = ProcessExecutor(name, default_name, int(resources.get("pool_size") or 0), limits,
+                                     resources.get("max_tasks_per_child"))
+            _EXECUTORS[name] = ex
+            telemetry.register_pool(name, ex.stats)
+        elif ex.kind != kind:
+            raise ValueError(f"pool '{name}' already declared as {ex.kind}")
+    return ex
+
+@atexit.register
+def _shutdown_all():
+    # 풀 스레드가 모두 종료된 뒤 스레드별 루프를 닫는다
+    for ex in list(_EXECUTORS.values()):
+        ex.shutdown(wait=True)
+    for loop in _LOOPS:
+        if not loop.is_closed():
+            loop.close()
@@ -2,8 +2,9 @@ import os
 import time
 import uuid
 from typing import Dict, Tuple, Any, Optional
-from .errors import err_forbidden, err_secret, err_rate_limit
+from .errors import err_forbidden, err_secret, err_rate_limit, err_schema, err_timeout
 from . import jwt_utils
+from . import deadline as dl
 
 class TokenBucket:
     def __init__(self, rate_per_sec: float, burst: int):
@@ -51,35 +52,16 @@ def _client_ip_from_headers(headers: Dict[str,str]) -> Optional[str]:
 class Pipeline:
     def __init__(self, registry):
         self.registry = registry
-        self.buckets: Dict[str, TokenBucket] = {}
-        self.circuits: Dict[str, CircuitBreaker] = {}
-
-    def _ensure_controls(self, module_name: str, action: str):
-        spec = self.registry.get_action_spec(module_name, action) or {}
-        res = (spec.get("resources") or {})
-        rps = float(res.get("rps", 50))
-        burst = int(res.get("burst", 100))
-        key = f"{module_name}:{action}"
-        if key not in self.buckets:
-            self.buckets[key] = TokenBucket(rps, burst)
-        if key not in self.circuits:
-            self.circuits[key] = CircuitBreaker()
-
-        if not self.circuits[key].allowed():
-            raise err_rate_limit("Circuit open", {"module": module_name, "action": action})
-
-        if not self.buckets[key].allow():
-            raise err_rate_limit("Rate limit exceeded", {"module": module_name, "action": action})
-
-    def pre(self, headers: Dict[str, str], payload: Dict[str, Any], module_name: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-        req_id = headers.get("X-Request-ID") or str(uuid.uuid4())
-        action = payload.get("action")
-        mode = payload.get("mode", "SINGLE")
-        if not action:
-            from .errors import err_schema
-            raise err_schema("Missing 'action' in envelope")
 
-        # Bearer -> scopes, user_id
+    def _ensure_controls(self, plan):
+        if not plan.circuit.allowed():
+            raise err_rate_limit("Circuit open", {"module": plan.module, "action": plan.action})
+
+        if not plan.bucket.allow():
+            raise err_rate_limit("Rate limit exceeded", {"module": plan.module, "action": plan.action})
+
+    def authenticate(self, headers: Dict[str, str]) -> Dict[str, Any]:
+        """Bearer 토큰/X-Scopes 해석(요청당 1회). /run/batch 는 결과를 모든 항목에 재사용."""
         provided = set((headers.get("X-Scopes") or "").split())
         auth = headers.get("Authorization") or headers.get("authorization")
         user_id = None
@@ -92,35 +74,61 @@ class Pipeline:
                     if s: provided.add(s)
             except Exception:
                 pass
+        return {"user_id": user_id, "scopes": frozenset(provided), "client_ip": _client_ip_from_headers(headers)}
+
+    def pre(self, headers: Dict[str, str], payload: Dict[str, Any], module_name: str,
+            auth: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        req_id = headers.get("X-Request-ID") or str(uuid.uuid4())
+        action = payload.get("action")
+        mode = payload.get("mode", "SINGLE")
+        if not action:
+            raise err_schema("Missing 'action' in envelope")
+        plan = self.registry.get_plan(module_name, action)
+        if plan is None:
+            raise err_schema(f"Unknown action '{action}' for {module_name}")
+
+        # Bearer -> scopes, user_id
+        if auth is None:
+            auth = self.authenticate(headers)
+        provided = auth["scopes"]
+        user_id = auth["user_id"]
 
         # scopes check
-        required = set(self.registry.get_required_scopes(module_name, action) or [])
-        if required and not required.issubset(provided):
+        required = plan.scopes
+        if required and not required <= provided:
             raise err_forbidden("Missing required scopes", {"required": list(required), "provided": list(provided)})
 
         # secrets
-        secrets = (self.registry.get_required_secrets(module_name, action) or [])
-        missing = [s for s in secrets if not os.environ.get(s)]
+        missing = [s for s in plan.secrets if not os.environ.get(s)]
         if missing:
             raise err_secret("Missing required secrets", {"missing": missing})
 
+        # deadline: X-Request-Deadline 과 resources.timeout_ms 중 빠른 쪽
+        now = time.time()
+        client_deadline = dl.parse_header(headers.get(dl.HEADER) or headers.get(dl.HEADER.lower()))
+        if client_deadline is not None and client_deadline <= now:
+            raise err_timeout("Deadline already exceeded", {"deadline": client_deadline})
+        deadline = dl.earliest(client_deadline, dl.from_timeout_ms(plan.resources.get("timeout_ms"), now))
+
         # rate/circuit
-        self._ensure_controls(module_name, action)
+        self._ensure_controls(plan)
 
         ctx = {"request_id": req_id, "scopes": list(provided)}
+        if deadline is not None:
+            ctx["deadline"] = deadline
         if user_id:
             ctx["user_id"] = user_id
-        cip = _client_ip_from_headers(headers)
+        cip = auth["client_ip"]
         if cip:
             ctx["client_ip"] = cip
         env = {"start_ts": time.time(), "module": module_name, "action": action, "mode": mode}
         return ctx, env
 
     def notify(self, module_name: str, action: str, ok: bool):
-        key = f"{module_name}:{action}"
-        c = self.circuits.get(key)
-        if not c:
+        plan = self.registry.get_plan(module_name, action, load=False)
+        if not plan:
             return
+        c = plan.circuit
         if ok:
             c.on_success()
         else:
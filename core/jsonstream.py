@@ -0,0 +1,170 @@
+# 대용량 BULK 본문 점진 파서: {"action":..., "options":..., "inputs":[{...}, ...]} 를 청크 단위로 해석
+import json
+import codecs
+from typing import Any, Iterator, Tuple
+
+DEFAULT_MAX_VALUE_CHARS = 1 << 20  # 항목 1개(또는 필드 값 1개)의 최대 크기
+
+_WS = " \t\r\n"
+
+class IncrementalEnvelopeParser:
+    """feed()로 받은 바이트 청크에서 해석 가능한 만큼 이벤트를 꺼낸다.
+    이벤트: ("field", (key, value)) / ("item", value) / ("end", None)
+    - 최상위 객체의 "inputs" 배열 항목은 하나씩 "item" 으로 나오고, 배열 전체를 메모리에 두지 않는다.
+    - "inputs" 뒤에 오는 필드는 허용하지 않는다(디스패치가 이미 시작되었으므로)."""
+
+    def __init__(self, max_value_chars: int = DEFAULT_MAX_VALUE_CHARS):
+        self.max_value_chars = max_value_chars
+        self._dec = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+        self._key = None
+        self._seen_inputs = False
+
+    def feed(self, chunk: bytes):
+        if chunk:
+            self._buf += self._dec.decode(chunk)
+
+    def close(self):
+        self._buf += self._dec.decode(b"", final=True)
+        self._eof = True
+
+    def _peek(self):
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WS:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _value(self):
+        """완결된 JSON 값 1개를 읽는다. 데이터가 더 필요하면 (False, None)."""
+        self._peek()  # raw_decode 는 앞쪽 공백을 건너뛰지 않는다
+        try:
+            val, end = self._json.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise ValueError(f"invalid JSON at offset {self._pos}")
+            if len(self._buf) - self._pos > self.max_value_chars:
+                raise ValueError(f"JSON value exceeds {self.max_value_chars} chars")
+            return False, None
+        if end >= len(self._buf) and not self._eof:
+            return False, None  # 숫자 등이 청크 경계에서 잘렸을 수 있음
+        self._pos = end
+        return True, val
+
+    def _expect(self, ch: str) -> bool:
+        c = self._peek()
+        if c is None:
+            if self._eof:
+                raise ValueError(f"unexpected end of body (expected '{ch}')")
+            return False
+        if c != ch:
+            raise ValueError(f"expected '{ch}' at offset {self._pos}, got '{c}'")
+        self._pos += 1
+        return True
+
+    def _compact(self):
+        if self._pos > 65536:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def events(self) -> Iterator[Tuple[str, Any]]:
+        while True:
+            st = self._state
+            if st == "start":
+                if not self._expect("{"):
+                    break
+                self._state = "key_or_end"
+            elif st in ("key_or_end", "key"):
+                c = self._peek()
+                if c is None:
+                    if self._eof:
+                        raise ValueError("unexpected end of body")
+                    break
+                if c == "}" and st == "key_or_end":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                ok, key = self._value()
+                if not ok:
+                    break
+                if not isinstance(key, str):
+                    raise ValueError("object key must be a string")
+                self._key = key
+                self._state = "colon"
+            elif st == "colon":
+                if not self._expect(":"):
+                    break
+                if self._key == "inputs":
+                    self._state = "inputs_open"
+                else:
+                    if self._seen_inputs:
+                        raise ValueError(f"field '{self._key}' must precede 'inputs'")
+                    self._state = "field_value"
+            elif st == "field_value":
+                ok, val = self._value()
+                if not ok:
+                    break
+                self._state = "after_value"
+                yield "field", (self._key, val)
+            elif st == "inputs_open":
+                if self._seen_inputs:
+                    raise ValueError("duplicate 'inputs'")
+                if not self._expect("["):
+                    break
+                self._seen_inputs = True
+                self._state = "item_or_close"
+            elif st in ("item_or_close", "item"):
+                c = self._peek()
+                if c is None:
+                    if self._eof:
+                        raise ValueError("unexpected end of body inside 'inputs'")
+                    break
+                if c == "]" and st == "item_or_close":
+                    self._pos += 1
+                    self._state = "after_value"
+                    continue
+                ok, val = self._value()
+                if not ok:
+                    break
+                self._state = "item_sep"
+                self._compact()
+                yield "item", val
+            elif st == "item_sep":
+                c = self._peek()
+                if c is None:
+                    if self._eof:
+                        raise ValueError("unexpected end of body inside 'inputs'")
+                    break
+                self._pos += 1
+                if c == ",":
+                    self._state = "item"
+                elif c == "]":
+                    self._state = "after_value"
+                else:
+                    raise ValueError(f"expected ',' or ']' at offset {self._pos - 1}")
+            elif st == "after_value":
+                c = self._peek()
+                if c is None:
+                    if self._eof:
+                        raise ValueError("unexpected end of body")
+                    break
+                self._pos += 1
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._state = "done"
+                else:
+                    raise ValueError(f"expected ',' or '}}' at offset {self._pos - 1}")
+            elif st == "done":
+                if self._peek() is not None:
+                    raise ValueError("trailing data after envelope")
+                if self._eof:
+                    self._state = "ended"
+                    yield "end", None
+                break
+            else:  # ended
+                break
@@ -0,0 +1,195 @@
+# 외부 API 호출용 송신(outbound) 속도 제한: 키(예: KIS appkey)별 토큰 버킷 + 우선순위 대기열
+#   - core.interceptor.TokenBucket 은 수신(module:action) 기준이라 여러 모듈이 같은 upstream 한도를 나눠 쓰는 경우를 못 막는다
+#     (core.ratelimit 은 로그인 시도 제한용 sliding window)
+#   - 프로세스 전체에서 공유: 어느 이벤트 루프(executor 스레드 포함)/동기 스레드에서 호출해도 같은 버킷을 쓴다
+#   - 대기열은 priority 오름차순(INTERACTIVE 먼저) -> 도착 순. 대기 시간은 telemetry "outbound" 로 노출
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from . import telemetry
+from . import deadline as dl
+from .errors import err_rate_limit
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_MAX_WAIT = 5.0  # 초. 요청 마감이 더 이르면 그쪽을 따른다
+
+class _Waiter:
+    __slots__ = ("loop", "fut", "event", "granted", "abandoned")
+
+    def __init__(self, loop=None, fut=None, event=None):
+        self.loop = loop
+        self.fut = fut
+        self.event = event
+        self.granted = False
+        self.abandoned = False
+
+class OutboundLimiter:
+    """rate(초당 허용 수), burst(한 번에 몰아 보낼 수 있는 수). 토큰이 없으면 대기열에서 차례를 기다린다."""
+
+    def __init__(self, name: str, rate: float, burst: int = 1, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.name = name
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(1, int(burst))
+        self.max_queue = max_queue
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue: list = []  # (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self.granted = self.waited = self.rejected = self.timeouts = self.throttled = 0
+        self.max_queued = 0
+        self.wait_ms: deque = deque(maxlen=200)  # 최근 200개(대기한 호출만)
+        telemetry.register_limiter(name, self.stats)
+
+    # ---- 토큰 ----
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def _try_take(self) -> bool:
+        self._refill(time.monotonic())
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def penalize(self):
+        """upstream 이 한도 초과를 알려오면 버킷을 비워 다음 호출을 늦춘다."""
+        with self._cond:
+            self.throttled += 1
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    def _refund(self):
+        with self._cond:
+            self._tokens = min(self.capacity, self._tokens + 1)
+            self._cond.notify()
+
+    # ---- 대기열 ----
+    def _enqueue(self, priority: int, waiter: _Waiter):
+        # self._cond 보유 상태에서 호출
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise err_rate_limit("Outbound queue full", {"limiter": self.name, "queued": len(self._queue)})
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        self.max_queued = max(self.max_queued, len(self._queue))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch, name=f"outbound:{self.name}", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                while self._queue and self._queue[0][2].abandoned:
+                    heapq.heappop(self._queue)
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                if not self._try_take():
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                    continue
+                _, _, w = heapq.heappop(self._queue)
+                w.granted = True
+                if w.event is not None:
+                    w.event.set()
+                else:
+                    try:
+                        w.loop.call_soon_threadsafe(self._wake, w)
+                    except RuntimeError:  # 루프가 닫힘
+                        self._tokens = min(self.capacity, self._tokens + 1)
+
+    def _wake(self, w: _Waiter):
+        if w.fut.done():  # 그 사이 포기한 호출자 — 토큰을 돌려준다
+            self._refund()
+        else:
+            w.fut.set_result(None)
+
+    def _record(self, started: float):
+        self.waited += 1
+        self.granted += 1
+        self.wait_ms.append((time.monotonic() - started) * 1000.0)
+
+    async def acquire(self, priority: int = INTERACTIVE, ctx: Optional[Dict[str, Any]] = None,
+                      max_wait: float = DEFAULT_MAX_WAIT):
+        with self._cond:
+            if not self._queue and self._try_take():
+                self.granted += 1
+                return
+            loop = asyncio.get_running_loop()
+            w = _Waiter(loop=loop, fut=loop.create_future())
+            self._enqueue(priority, w)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(w.fut, dl.timeout(ctx, max_wait))
+        except asyncio.TimeoutError:
+            self._abandon(w, timed_out=True)
+            dl.check(ctx, "outbound queue")
+            raise err_rate_limit("Outbound rate limit wait exceeded", {"limiter": self.name, "max_wait": max_wait}) from None
+        except BaseException:
+            self._abandon(w)
+            raise
+        with self._cond:
+            self._record(started)
+
+    def acquire_sync(self, priority: int = INTERACTIVE, max_wait: float = DEFAULT_MAX_WAIT):
+        with self._cond:
+            if not self._queue and self._try_take():
+                self.granted += 1
+                return
+            w = _Waiter(event=threading.Event())
+            self._enqueue(priority, w)
+        started = time.monotonic()
+        w.event.wait(max_wait)
+        with self._cond:
+            if not w.granted:  # 시간 초과(판정은 락 안에서 — 직전에 토큰을 받았으면 그대로 진행)
+                w.abandoned = True
+                self.timeouts += 1
+                raise err_rate_limit("Outbound rate limit wait exceeded", {"limiter": self.name, "max_wait": max_wait})
+            self._record(started)
+
+    def _abandon(self, w: _Waiter, timed_out: bool = False):
+        # async 대기자: 이미 토큰이 배정됐으면 _wake 가 환불한다
+        with self._cond:
+            w.abandoned = True
+            if timed_out:
+                self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self.wait_ms)
+            return {
+                "name": self.name,
+                "rate": self.rate,
+                "burst": self.capacity,
+                "queued": sum(1 for _, _, w in self._queue if not w.abandoned),
+                "max_queued": self.max_queued,
+                "granted": self.granted,
+                "waited": self.waited,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "throttled": self.throttled,
+                "wait_p50_ms": telemetry.percentile(waits, 0.50),
+                "wait_p95_ms": telemetry.percentile(waits, 0.95),
+                "wait_max_ms": waits[-1] if waits else None,
+            }
+
+_LIMITERS: Dict[str, OutboundLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+def limiter(name: str, rate: float, burst: int = 1) -> OutboundLimiter:
+    """이름별 공유 limiter(처음 호출 시 생성)."""
+    with _LIMITERS_LOCK:
+        lim = _LIMITERS.get(name)
+        if lim is None:
+            lim = _LIMITERS[name] = OutboundLimiter(name, rate, burst)
+        return lim
@@ -0,0 +1,47 @@
+# 액션별 디스패치 계획(매니페스트 로드 시 1회 생성, 요청당 dict 조회 1회)
+from typing import Any, Dict, Optional
+from .interceptor import TokenBucket, CircuitBreaker
+from .schema import CompiledSchema
+from .executor import get_executor
+from .cache import ActionCache
+from .singleflight import SingleFlight
+
+class ActionPlan:
+    __slots__ = ("module", "action", "key", "modes", "scopes", "secrets",
+                 "resources", "v_in", "v_out", "bucket", "circuit", "executor",
+                 "cache", "invalidates", "flight")
+
+    def __init__(self, module: str, action: str, spec: Dict[str, Any],
+                 v_in: Optional[CompiledSchema] = None, v_out: Optional[CompiledSchema] = None):
+        res = dict(spec.get("resources") or {})
+        set_ = object.__setattr__
+        set_(self, "module", module)
+        set_(self, "action", action)
+        set_(self, "key", f"{module}:{action}")
+        set_(self, "modes", frozenset(spec.get("modes", ["SINGLE"])))
+        set_(self, "scopes", frozenset(spec.get("required_scopes") or []))
+        set_(self, "secrets", tuple(spec.get("secrets") or []))
+        set_(self, "resources", res)
+        set_(self, "v_in", v_in)
+        set_(self, "v_out", v_out)
+        # bucket/circuit 자체는 상태를 가지지만, 계획이 가리키는 객체는 바뀌지 않음
+        set_(self, "bucket", TokenBucket(float(res.get("rps", 50)), int(res.get("burst", 100))))
+        set_(self, "circuit", CircuitBreaker())
+        # resources.executor: thread -> 모듈(또는 resources.pool) 단위 스레드 풀
+        set_(self, "executor", get_executor(res, module))
+        # cache: {ttl, key, max_entries, tags} -> 읽기 액션 결과 캐시 / invalidates: 실행 후 제거할 태그
+        cache = spec.get("cache")
+        set_(self, "cache", ActionCache(self.key, cache) if cache else None)
+        set_(self, "invalidates", tuple(spec.get("invalidates") or ()))
+        # coalesce: true | {key} -> 같은 키의 동시 호출은 실행 1개를 공유
+        coalesce = spec.get("coalesce")
+        set_(self, "flight", SingleFlight(self.key, coalesce) if coalesce else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ActionPlan is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ActionPlan is immutable")
+
+    def __repr__(self) -> str:
+        return f"ActionPlan({self.key}, modes={sorted(self.modes)})"
@@ -1,11 +1,49 @@
 import json
+import time
+import asyncio
+import functools
 import importlib
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
 import yaml
-from jsonschema import validate as jsonschema_validate, ValidationError
+from jsonschema import ValidationError, SchemaError
 
-from .errors import err_schema, err_internal, err_unsupported_mode
+from .errors import FrameworkError, err_schema, err_internal, err_unsupported_mode, err_timeout
+from . import deadline as dl
+from .schema import CompiledSchema, compile_schema
+from .plan import ActionPlan
+from .cache import TAGS, ainvalidate
+
+DEFAULT_PARALLELISM = 8  # options.parallelism / resources.parallelism 미지정 시
+DEFAULT_STREAM_CHUNK = 100  # 스트림 입력을 BULK 지원 액션에 넘길 때 청크 크기(options.chunk_size)
+
+def _bulk_metrics(total: int, done: int, ok_count: int, t0: float) -> Dict[str, Any]:
+    return {
+        "items": total,
+        "succeeded": ok_count,
+        "failed": done - ok_count,
+        "skipped": total - done,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+    }
+
+class ModuleHandle:
+    """core.runner(동기 경로)용 핸들: 매니페스트 + 실행 모듈 + 컴파일된 검증기를 가진 registry."""
+    __slots__ = ("name", "manifest", "base_dir", "module", "registry")
+
+    def __init__(self, name: str, manifest: Dict[str, Any], base_dir: str, module, registry: "Registry"):
+        self.name = name
+        self.manifest = manifest
+        self.base_dir = base_dir
+        self.module = module
+        self.registry = registry
+
+def _error_obj(ex: Exception) -> Dict[str, Any]:
+    if isinstance(ex, FrameworkError):
+        return {"code": ex.code, "message": ex.message, "details": ex.details}
+    if isinstance(ex, ValidationError):
+        return {"code": "ERR_SCHEMA", "message": "Schema validation failed", "details": {"error": str(ex)}}
+    return {"code": "ERR_INTERNAL", "message": str(ex)}
 
 class Registry:
     def __init__(self, modules_root: Path | None = None):
@@ -13,6 +51,8 @@ class Registry:
         self._handlers: Dict[str, Any] = {}
         self._manifests: Dict[str, Dict[str, Any]] = {}
         self._schemas: Dict[Tuple[str, str, str], Dict[str, Any]] = {}  # (module, action, in|out)
+        self._validators: Dict[Tuple[str, str, str], CompiledSchema] = {}  # 로드 시 1회 컴파일
+        self._plans: Dict[Tuple[str, str], ActionPlan] = {}  # (module, action)
 
     def _module_dir(self, module_name: str) -> Path:
         parts = module_name.split(".")
@@ -36,16 +76,26 @@ class Registry:
         # engine_api 간단 체크
         if not str(mani.get("engine_api", "")).startswith("^1.4"):
             pass
-        self._manifests[module_name] = mani
-        # preload schemas
+        # preload + compile schemas
         actions = mani.get("actions", {})
         for act, spec in actions.items():
-            in_schema_path = spec.get("input_schema")
-            out_schema_path = spec.get("output_schema")
-            if in_schema_path:
-                self._schemas[(module_name, act, "in")] = json.loads((self._module_dir(module_name) / in_schema_path).read_text(encoding="utf-8"))
-            if out_schema_path:
-                self._schemas[(module_name, act, "out")] = json.loads((self._module_dir(module_name) / out_schema_path).read_text(encoding="utf-8"))
+            for direction, field in (("in", "input_schema"), ("out", "output_schema")):
+                rel = spec.get(field)
+                if not rel:
+                    continue
+                schema = json.loads((moddir / rel).read_text(encoding="utf-8"))
+                try:
+                    compiled = compile_schema(schema)
+                except SchemaError as se:
+                    raise ValueError(f"invalid {field} for {module_name}:{act}: {se.message}")
+                self._schemas[(module_name, act, direction)] = schema
+                self._validators[(module_name, act, direction)] = compiled
+            self._plans[(module_name, act)] = ActionPlan(
+                module_name, act, spec,
+                self._validators.get((module_name, act, "in")),
+                self._validators.get((module_name, act, "out")),
+            )
+        self._manifests[module_name] = mani
         return mani
 
     def get_manifest(self, module_name: str) -> Dict[str, Any]:
@@ -63,6 +113,17 @@ class Registry:
         spec = self.get_action_spec(module_name, action) or {}
         return spec.get("secrets")
 
+    def get_plan(self, module_name: str, action: str, load: bool = True) -> Optional[ActionPlan]:
+        plan = self._plans.get((module_name, action))
+        if plan is None and load and module_name not in self._manifests:
+            self._load_manifest(module_name)
+            plan = self._plans.get((module_name, action))
+        return plan
+
+    def get_validator(self, module_name: str, action: str, direction: str) -> Optional[CompiledSchema]:
+        self._load_manifest(module_name)
+        return self._validators.get((module_name, action, direction))
+
     def _load_handler(self, module_name: str):
         if module_name in self._handlers:
             return self._handlers[module_name]
@@ -76,40 +137,502 @@ class Registry:
         self._handlers[module_name] = mod
         return mod
 
-    async def run(self, module_name: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]] = None, env: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        mani = self._load_manifest(module_name)
-        handler = self._load_handler(module_name)
-
+    def _prepare(self, module_name: str, envelope: Dict[str, Any]) -> Tuple[ActionPlan, Any, bool]:
+        """액션/모드 확인 + 입력 검증. (plan, handler, fanout 여부) 반환."""
         action = envelope.get("action")
         mode = envelope.get("mode", "SINGLE")
-        if action not in mani.get("actions", {}):
+        plan = self.get_plan(module_name, action)
+        handler = self._load_handler(module_name)
+        if plan is None:
             raise err_schema(f"Unknown action '{action}' for {module_name}")
-        supported_modes = mani["actions"][action].get("modes", ["SINGLE"])
-        if mode not in supported_modes:
+        if mode not in plan.modes:
+            opts = envelope.get("options") or {}
+            # SINGLE 전용 액션의 BULK 는 options.auto_fanout=true 일 때만 항목별 SINGLE 로 실행(쓰기 액션 보호)
+            if mode == "BULK" and "SINGLE" in plan.modes and opts.get("auto_fanout") is True:
+                return plan, handler, True  # 항목별 검증은 fan-out 에서
             raise err_unsupported_mode(f"Action '{action}' does not support mode '{mode}' for {module_name}")
 
         try:
+            v_in = plan.v_in
             if mode == "SINGLE":
-                sch_in = self._schemas.get((module_name, action, "in"))
-                if sch_in is not None:
-                    jsonschema_validate(envelope.get("input", {}), sch_in)
+                if v_in is not None:
+                    v_in.validate(envelope.get("input", {}))
             elif mode == "BULK":
-                sch_in = self._schemas.get((module_name, action, "in"))
-                if sch_in is not None:
+                if v_in is not None:
                     for item in envelope.get("inputs", []):
-                        jsonschema_validate(item, sch_in)
+                        v_in.validate(item)
             else:
                 raise err_unsupported_mode("Unsupported mode")
         except ValidationError as ve:
             raise err_schema("Input schema validation failed", {"error": str(ve)})
+        return plan, handler, False
+
+    async def run(self, module_name: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]] = None, env: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        plan, handler, fanout = self._prepare(module_name, envelope)
+        ctx = self._with_deadline(plan, ctx)
+        if fanout:
+            return await self._fanout(plan, handler, envelope, ctx, env)
+        return await self._execute(plan, handler, envelope, ctx, env)
+
+    def run_sync(self, module_name: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]] = None,
+                 env: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """동기 코드(core.runner, pages)용 run. 프로세스 공용 이벤트 루프에서 실행해 결과를 기다린다(await_sync)."""
+        return await_sync(self.run(module_name, envelope, ctx, env))
 
-        result = await handler.run(envelope, ctx=ctx, env=env)
+    async def _execute(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                       ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if envelope.get("mode", "SINGLE") == "BULK" and plan.executor is not None and plan.executor.kind == "process":
+            result = await self._split_bulk(plan, handler, envelope, ctx, env)
+        else:
+            result = await self._call(plan, handler, envelope, ctx, env)
 
         try:
-            sch_out = self._schemas.get((module_name, action, "out"))
-            if sch_out is not None:
+            v_out = plan.v_out
+            if v_out is not None:
                 if result.get("mode") == "SINGLE" and "data" in result:
-                    jsonschema_validate(result.get("data", {}), sch_out)
+                    v_out.validate(result.get("data", {}))
         except ValidationError as ve:
             raise err_schema("Output schema validation failed", {"error": str(ve)})
         return result
+
+    async def run_stream(self, module_name: str, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]] = None,
+                         env: Optional[Dict[str, Any]] = None,
+                         inputs: Optional[AsyncIterator[Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """BULK 결과를 끝나는 대로 하나씩 내보내는 async iterator 를 반환.
+        검증 오류는 await 시점에 바로 발생하고, 마지막 레코드는 {"done": True, "ok", "partial_ok", ...}.
+        SINGLE 전용 액션은 fan-out(options.auto_fanout), 핸들러에 stream()이 있으면 그것을, 없으면 run() 결과를 나눠 보낸다.
+        stream() 은 {"index", "partial": True, "data"} 레코드로 항목 결과를 나눠 보낼 수 있다(집계 제외).
+        stream(envelope, ctx, env, offload) 의 offload(fn, *args) 는 블로킹 호출을 매니페스트 executor 에서 실행한다.
+        inputs(async iterator)를 주면 envelope["inputs"] 대신 도착하는 대로 항목을 읽어 검증/실행한다
+        (fan-out 은 워커가 직접 당겨가고, BULK 지원 액션은 chunk_size 단위로 나눠 호출)."""
+        if envelope.get("mode", "SINGLE") != "BULK":
+            raise err_unsupported_mode("Streaming is only supported for BULK")
+        plan, handler, fanout = self._prepare(module_name, envelope)
+        ctx = self._with_deadline(plan, ctx)
+        if inputs is not None:
+            seen = [0]
+            source = self._counted(inputs, seen)
+            if fanout:
+                items = self._fanout_iter(plan, handler, envelope, ctx, env, source=source)
+            else:
+                items = self._validated(plan, self._chunk_iter(plan, handler, envelope, source, ctx, env))
+            return self._with_trailer(items, lambda: seen[0])
+        if fanout:
+            items = self._fanout_iter(plan, handler, envelope, ctx, env)
+        elif callable(getattr(handler, "stream", None)):
+            # stream() 은 이벤트 루프에서 도는 async generator — 블로킹 호출(비밀 저장소 등)은 offload 로 넘긴다
+            items = self._validated(plan, handler.stream(envelope, ctx=ctx, env=env, offload=self._offload(plan)))
+        else:
+            items = self._validated(plan, self._result_iter(self._execute(plan, handler, envelope, ctx, env)))
+        return self._with_trailer(items, len(envelope.get("inputs") or []))
+
+    @staticmethod
+    def _offload(plan: ActionPlan) -> Callable[..., Awaitable[Any]]:
+        # thread executor 가 있으면 그 풀에서, 없으면(또는 process) 루프 기본 스레드 풀에서 실행
+        ex = plan.executor
+
+        async def offload(fn: Callable[..., Any], *args, **kwargs) -> Any:
+            if ex is not None and ex.kind == "thread":
+                return await ex.submit(fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        return offload
+
+    @staticmethod
+    async def _counted(source: AsyncIterator[Any], seen: list) -> AsyncIterator[Any]:
+        async for item in source:
+            seen[0] += 1
+            yield item
+
+    @staticmethod
+    async def _result_iter(pending) -> AsyncIterator[Dict[str, Any]]:
+        out = await pending
+        for r in out.get("results") or []:
+            yield r
+
+    @staticmethod
+    async def _validated(plan: ActionPlan, items: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        # /run 과 같은 출력 스키마 검증을 항목 단위로(fan-out 항목은 _run_item 에서 이미 검증). partial 레코드는 제외
+        v_out = plan.v_out
+        async for r in items:
+            if v_out is not None and not r.get("partial") and r.get("ok") and r.get("data") is not None:
+                try:
+                    v_out.validate(r["data"])
+                except ValidationError as ve:
+                    r = {"ok": False, "index": r.get("index"),
+                         "error": {"code": "ERR_SCHEMA", "message": "Output schema validation failed",
+                                   "details": {"error": str(ve)}}}
+            yield r
+
+    @staticmethod
+    async def _with_trailer(items: AsyncIterator[Dict[str, Any]], total) -> AsyncIterator[Dict[str, Any]]:
+        # total: 항목 수, 또는 스트림 입력이면 끝난 뒤 읽은 항목 수를 돌려주는 callable
+        t0 = time.perf_counter()
+        done = ok_count = 0
+        async for r in items:
+            if r.get("partial"):
+                yield r  # 항목 결과의 일부(예: 페이지 단위 positions) — 집계하지 않음
+                continue
+            done += 1
+            if r.get("ok"):
+                ok_count += 1
+            yield r
+        if callable(total):
+            total = total()
+        yield {
+            "done": True,
+            "ok": ok_count == total,
+            "mode": "BULK",
+            "partial_ok": 0 < ok_count < total,
+            "metrics": _bulk_metrics(total, done, ok_count, t0),
+        }
+
+    @staticmethod
+    def _with_deadline(plan: ActionPlan, ctx: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # resources.timeout_ms 를 상위(ctx) 마감과 합친다. 더 짧아질 때만 ctx 를 복사해 바꾼다(호출자 ctx 는 그대로)
+        d = dl.from_timeout_ms(plan.resources.get("timeout_ms"))
+        if d is None:
+            return ctx
+        cur = (ctx or {}).get("deadline")
+        if cur is not None and cur <= d:
+            return ctx
+        return {**(ctx or {}), "deadline": d}
+
+    async def _invoke(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                      ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        rem = dl.remaining(ctx)
+        if rem is not None and rem <= 0:
+            raise err_timeout("Deadline exceeded", {"module": plan.module, "action": plan.action})
+        admit = getattr(handler, "admit", None)
+        if admit is not None:
+            # 핸들러의 admit(envelope, ctx) 는 항상 서버 프로세스에서 — 워커끼리 나눌 수 없는 상태(로그인 시도 제한 등)용.
+            # None 이면 통과, 아니면 그 응답을 그대로 돌려준다
+            denied = admit(envelope, ctx)
+            if denied is not None:
+                return denied
+        if plan.executor is not None:
+            pending = plan.executor.run_handler(plan.module, handler, envelope, ctx, env)
+        else:
+            pending = handler.run(envelope, ctx=ctx, env=env)
+        if rem is None:
+            return await pending
+        try:
+            # 마감이 지나면 대기 중인 작업을 취소(스레드에서 이미 실행 중인 핸들러는 끝까지 돌지만 결과는 버림)
+            return await asyncio.wait_for(pending, rem)
+        except asyncio.TimeoutError:
+            raise err_timeout("Deadline exceeded", {"module": plan.module, "action": plan.action,
+                                                    "budget_ms": round(rem * 1000, 1)})
+
+    async def _call(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                    ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """_invoke + 매니페스트 coalesce(동일 동시 호출 합치기)/cache(SINGLE 성공 결과 재사용)/
+        invalidates(실행 후 태그 무효화). options.no_cache 면 캐시를 건너뛴다(무효화는 그대로)."""
+        try:
+            if envelope.get("mode", "SINGLE") != "SINGLE":
+                return await self._invoke(plan, handler, envelope, ctx, env)
+            if plan.flight is not None:
+                key = plan.flight.key(envelope, ctx)
+                if plan.cache is not None and plan.cache.tag_templates:
+                    # 무효화 이후 도착한 호출은 그 전에 시작된 실행에 합류하지 않는다
+                    key += repr(TAGS.generations(plan.cache.tags(envelope, ctx)))
+                # 합류한 호출도 자기 마감까지만 기다린다(리더의 예산을 물려받지 않음)
+                return await plan.flight.do(key, lambda: self._cached(plan, handler, envelope, ctx, env), ctx)
+            return await self._cached(plan, handler, envelope, ctx, env)
+        finally:
+            if plan.invalidates:
+                if envelope.get("mode", "SINGLE") == "BULK":
+                    for item in envelope.get("inputs") or []:
+                        await ainvalidate(plan.invalidates, {"input": item}, ctx)
+                else:
+                    await ainvalidate(plan.invalidates, envelope, ctx)
+
+    async def _cached(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                      ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        cache = plan.cache
+        if cache is None or (envelope.get("options") or {}).get("no_cache"):
+            return await self._invoke(plan, handler, envelope, ctx, env)
+        key = cache.key(envelope, ctx)
+        tags = cache.tags(envelope, ctx)
+        out = await cache.aget(key, tags)
+        if out is not None:
+            return out
+        gens = TAGS.generations(tags)
+        out = await self._invoke(plan, handler, envelope, ctx, env)
+        if out.get("ok", True):
+            await cache.aput(key, out, tags, gens)
+        return out
+
+    async def _run_item(self, plan: ActionPlan, handler, envelope: Dict[str, Any], index: int, item: Dict[str, Any],
+                        ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        sub = {"action": plan.action, "mode": "SINGLE", "input": item}
+        if envelope.get("request_id"):
+            sub["request_id"] = envelope["request_id"]
+        if (envelope.get("options") or {}).get("no_cache"):
+            sub["options"] = {"no_cache": True}  # 캐시 우회는 항목별 SINGLE 호출에도 적용
+        try:
+            if plan.v_in is not None:
+                plan.v_in.validate(item)
+            out = await self._call(plan, handler, sub, ctx, env)
+            if out.get("ok", True):
+                data = out.get("data")
+                if plan.v_out is not None and data is not None:
+                    plan.v_out.validate(data)
+                res = {"ok": True, "data": data, "index": index}
+            else:
+                res = {"ok": False, "error": out.get("error") or {"code": "ERR_INTERNAL", "message": "failed"}, "index": index}
+        except Exception as ex:
+            res = {"ok": False, "error": _error_obj(ex), "index": index}
+        res["metrics"] = {"elapsed_ms": round((time.perf_counter() - t0) * 1000, 3)}
+        return res
+
+    def _fanout_parallelism(self, plan: ActionPlan, envelope: Dict[str, Any], bounded: bool = True) -> int:
+        opts = envelope.get("options") or {}
+        default_par = plan.executor.size if plan.executor is not None and plan.executor.kind == "process" else DEFAULT_PARALLELISM
+        parallelism = int(opts.get("parallelism") or plan.resources.get("parallelism") or default_par)
+        if not bounded:
+            return max(1, parallelism)
+        return max(1, min(parallelism, len(envelope.get("inputs") or []) or 1))
+
+    async def _fanout_iter(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                           ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]],
+                           source: Optional[AsyncIterator[Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """SINGLE 전용 액션의 BULK 요청을 항목별 SINGLE 호출로 병렬 실행하고 끝나는 순서대로 내보낸다.
+        options.parallelism 만큼의 워커가 inputs(또는 source)를 나눠 처리하고, continue_on_error가
+        아니면 첫 실패 이후 새 항목을 시작하지 않는다(진행 중인 항목은 끝까지 실행, 남은 입력은 읽기만).
+        결과 큐 크기도 parallelism 으로 묶여 소비가 느리면 워커가 멈춘다(backpressure)."""
+        cont = bool((envelope.get("options") or {}).get("continue_on_error"))
+        parallelism = self._fanout_parallelism(plan, envelope, bounded=source is None)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=parallelism)
+        stopped = False
+        failure: Optional[BaseException] = None
+
+        if source is None:
+            pending = iter(enumerate(envelope.get("inputs") or []))
+
+            async def pull():
+                return next(pending, None)
+        else:
+            # async generator 는 동시에 __anext__ 할 수 없으므로 워커끼리 잠금으로 순번을 정한다
+            lock = asyncio.Lock()
+            counter = iter(range(1 << 62))
+
+            async def pull():
+                async with lock:
+                    try:
+                        item = await source.__anext__()
+                    except StopAsyncIteration:
+                        return None
+                    return next(counter), item
+
+        async def worker():
+            nonlocal stopped, failure
+            while True:
+                try:
+                    nxt = await pull()
+                except Exception as ex:  # 입력 스트림 오류(본문 파싱 실패 등)
+                    stopped = True
+                    failure = failure or ex
+                    return
+                if nxt is None:
+                    return
+                if stopped:
+                    continue
+                i, item = nxt
+                res = await self._run_item(plan, handler, envelope, i, item, ctx, env)
+                if not res["ok"] and not cont:
+                    stopped = True
+                await queue.put(res)
+
+        async def close():
+            await asyncio.gather(*(worker() for _ in range(parallelism)))
+            await queue.put(None)
+
+        closer = asyncio.ensure_future(close())
+        try:
+            while True:
+                res = await queue.get()
+                if res is None:
+                    break
+                yield res
+        finally:
+            closer.cancel()
+        if failure is not None:
+            raise failure
+
+    async def _chunk_iter(self, plan: ActionPlan, handler, envelope: Dict[str, Any], source: AsyncIterator[Any],
+                          ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """BULK 지원 액션에 스트림 입력을 options.chunk_size 개씩 묶어 BULK 호출로 넘긴다.
+        청크 1개를 실행하는 동안 다음 청크를 읽어 두며(메모리는 청크 2개분), 결과 index 는 전체 기준.
+        continue_on_error가 아니면 실패한 청크 이후로는 실행하지 않고 남은 입력은 읽기만 한다."""
+        opts = envelope.get("options") or {}
+        cont = bool(opts.get("continue_on_error"))
+        size = max(1, int(opts.get("chunk_size") or plan.resources.get("chunk_size") or DEFAULT_STREAM_CHUNK))
+        v_in = plan.v_in
+
+        async def call(idxs: list, chunk: list) -> list:
+            try:
+                out = await self._execute(plan, handler, {**envelope, "inputs": chunk}, ctx, env)
+            except Exception as ex:
+                err = _error_obj(ex)
+                return [{"ok": False, "error": err, "index": i} for i in idxs]
+            results = []
+            for r in out.get("results") or []:
+                r = dict(r)
+                local = r.get("index")
+                if isinstance(local, int) and 0 <= local < len(idxs):
+                    r["index"] = idxs[local]
+                results.append(r)
+            return results
+
+        index = 0
+        idxs: list = []
+        chunk: list = []
+        running: Optional[asyncio.Future] = None
+        stopped = halted = False  # stopped: 새 항목을 받지 않음 / halted: 청크 실패로 대기 중인 항목도 실행하지 않음
+        try:
+            async for item in source:
+                i, index = index, index + 1
+                if stopped:
+                    continue
+                try:
+                    if v_in is not None:
+                        v_in.validate(item)
+                except ValidationError as ve:
+                    yield {"ok": False, "error": _error_obj(ve), "index": i}
+                    if cont:
+                        continue
+                    stopped = True  # 앞서 받은 항목까지는 실행
+                else:
+                    idxs.append(i)
+                    chunk.append(item)
+                    if len(chunk) < size:
+                        continue
+                if running is not None:
+                    for r in await running:
+                        if not r.get("ok") and not cont:
+                            stopped = halted = True
+                        yield r
+                    running = None
+                if chunk and not halted:
+                    running = asyncio.ensure_future(call(idxs, chunk))
+                idxs, chunk = [], []
+            if running is not None:
+                for r in await running:
+                    if not r.get("ok") and not cont:
+                        halted = True
+                    yield r
+                running = None
+            if chunk and not halted:
+                for r in await call(idxs, chunk):
+                    yield r
+        finally:
+            if running is not None:
+                running.cancel()
+
+    async def _fanout(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                      ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        total = len(envelope.get("inputs") or [])
+        done = [r async for r in self._fanout_iter(plan, handler, envelope, ctx, env)]
+        done.sort(key=lambda r: r["index"])
+        ok_count = sum(1 for r in done if r["ok"])
+        metrics = _bulk_metrics(total, len(done), ok_count, t0)
+        metrics["parallelism"] = self._fanout_parallelism(plan, envelope)
+        return {
+            "ok": ok_count == total,
+            "mode": "BULK",
+            "results": done,
+            "partial_ok": 0 < ok_count < total,
+            "metrics": metrics,
+        }
+
+    async def _split_bulk(self, plan: ActionPlan, handler, envelope: Dict[str, Any],
+                          ctx: Optional[Dict[str, Any]], env: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """BULK 지원 액션을 process 풀의 워커 수만큼 청크로 나눠 동시에 실행하고 index 순서로 합친다.
+        continue_on_error=false 는 청크 단위로 적용된다(다른 청크는 이미 실행 중)."""
+        inputs = envelope.get("inputs") or []
+        workers = min(plan.executor.size, len(inputs))
+        if workers <= 1:
+            return await self._call(plan, handler, envelope, ctx, env)
+        step = -(-len(inputs) // workers)
+        offsets = list(range(0, len(inputs), step))
+        outs = await asyncio.gather(*(
+            self._call(plan, handler, {**envelope, "inputs": inputs[o:o + step]}, ctx, env)
+            for o in offsets
+        ), return_exceptions=True)
+
+        results: list = []
+        for o, out in zip(offsets, outs):
+            if isinstance(out, BaseException):
+                chunk = inputs[o:o + step]
+                results.extend({"ok": False, "error": _error_obj(out), "index": o + i} for i in range(len(chunk)))
+                continue
+            for r in out.get("results") or []:
+                r = dict(r)
+                if r.get("index") is not None:
+                    r["index"] = r["index"] + o
+                results.append(r)
+        results.sort(key=lambda r: r.get("index") if r.get("index") is not None else -1)
+        ok_count = sum(1 for r in results if r.get("ok"))
+        return {
+            "ok": ok_count == len(inputs),
+            "mode": "BULK",
+            "results": results,
+            "partial_ok": 0 < ok_count < len(inputs),
+            "metrics": {"items": len(inputs), "chunks": len(offsets), "workers": workers},
+        }
+
+    def load(self, module_name: str) -> ModuleHandle:
+        mani = self._load_manifest(module_name)
+        mod = self._handlers.get(module_name)
+        if mod is None:
+            if (self._module_dir(module_name) / "handler.py").exists():
+                mod = self._load_handler(module_name)
+            else:
+                # handler.py 없이 패키지 __init__ 에 run 을 둔 모듈(InEnvelope 스타일)
+                mod = importlib.import_module(module_name)
+                if not callable(getattr(mod, "run", None)):
+                    raise err_internal(f"{module_name} has no 'run' callable")
+                self._handlers[module_name] = mod
+        return ModuleHandle(module_name, mani, str(self._module_dir(module_name)), mod, self)
+
+# run_sync 용 공용 이벤트 루프 1개(전용 스레드) — 호출 스레드/요청마다 루프를 만들지 않음(루프별 httpx 클라이언트 등도 공유)
+_SYNC_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None or _SYNC_LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="registry-sync-loop", daemon=True).start()
+            _SYNC_LOOP = loop
+        return _SYNC_LOOP
+
+def await_sync(coro: Awaitable[Any]) -> Any:
+    """동기 코드에서 코루틴을 공용 루프에서 실행하고 결과를 기다린다.
+    그 루프 위의 async 핸들러에서는 부를 수 없다(await 할 것)."""
+    loop = _sync_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise err_internal("await_sync called from the shared loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+_DEFAULT: Optional[Registry] = None
+_DEFAULT_LOCK = threading.Lock()
+
+def default_registry() -> Registry:
+    """프로세스 공용 Registry. server.main(/run)과 core.runner/pages 가 같은 계획
+    (토큰 버킷, 서킷, 캐시, 풀)을 쓰도록 Registry() 를 따로 만들지 말고 이것을 쓴다."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = Registry()
+        return _DEFAULT
+
+def load(module_name: str) -> ModuleHandle:
+    return default_registry().load(module_name)
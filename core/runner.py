@@ -1,17 +1,17 @@
-
-import os, json, traceback
+import os, inspect, asyncio
 from typing import Dict, Any, List
-from jsonschema import validate as jsonschema_validate, ValidationError as JsonSchemaError
+from jsonschema import ValidationError as JsonSchemaError
 
 from core.contract import InEnvelope, OutEnvelope, ResultItem, ErrorObj, Context
 from core.errors import UnsupportedMode, SchemaValidationError, ModuleExecutionError, ManifestError
-from core.registry import load as load_module
+from core.registry import load as load_module, await_sync, ModuleHandle
 from core.security import check_required_scopes, required_secrets
 
-def _read_schema(base_dir: str, rel_path: str) -> Dict[str, Any]:
-    path = os.path.join(base_dir, rel_path)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+DEFAULT_FANOUT_PARALLELISM = 8  # options.parallelism 미지정 시
+
+# async 핸들러/fan-out 은 공용 registry 의 run_sync(공용 이벤트 루프 1개)로 실행한다
+#   - server.main(/run)과 같은 Registry(default_registry) — 계획/토큰 버킷/서킷/캐시/풀을 공유
+#   - registry 경로(plan.executor, cache/invalidates, 출력 검증)를 그대로 탄다
 
 def _ensure_mode(manifest: Dict[str, Any], action: str, mode: str):
     actions = manifest.get("actions", {})
@@ -21,15 +21,13 @@ def _ensure_mode(manifest: Dict[str, Any], action: str, mode: str):
     if mode not in modes:
         raise UnsupportedMode(f"요청 모드 {mode}는 지원 목록 {modes}에 없음")
 
-def _validate_schema(base_dir: str, manifest: Dict[str, Any], action: str, payload: Dict[str, Any], *, in_out: str):
-    a = manifest.get("actions", {}).get(action, {})
-    key = "input_schema" if in_out == "in" else "output_schema"
-    schema_rel = a.get(key)
-    if not schema_rel:
+def _validate_schema(h: ModuleHandle, action: str, payload: Dict[str, Any], *, in_out: str):
+    # Registry가 매니페스트 로드 시 컴파일해 둔 검증기 재사용(파일 재읽기 없음)
+    v = h.registry.get_validator(h.name, action, in_out)
+    if v is None:
         return  # 스키마 선언 없으면 통과
     try:
-        schema = _read_schema(base_dir, schema_rel)
-        jsonschema_validate(payload, schema)
+        v.validate(payload)
     except JsonSchemaError as e:
         raise SchemaValidationError(str(e)) from e
 
@@ -41,45 +39,96 @@ def _load_secrets_to_ctx(ctx: Context, manifest: Dict[str, Any], action: str):
         if v is not None:
             ctx.secrets[s] = v
 
+def _ctx_dict(ctx: Context) -> Dict[str, Any]:
+    # ctx 는 캐시/single-flight 키, 로그에 쓰인다 — 시크릿은 넣지 않는다(_env_dict)
+    return {**ctx.vars, "request_id": ctx.request_id, "scopes": list(ctx.scopes)}
+
+def _env_dict(h: ModuleHandle, env: InEnvelope, ctx: Context) -> Dict[str, Any]:
+    return {"module": h.name, "action": env.action, "mode": env.mode, "secrets": dict(ctx.secrets)}
+
+def _run_registry(h: ModuleHandle, env: InEnvelope, ctx: Context) -> OutEnvelope:
+    # Registry 규약(async, dict 봉투) 핸들러: registry 실행 경로(executor/cache/invalidates, auto_fanout) 사용
+    out = h.registry.run_sync(h.name, env.model_dump(exclude_none=True), _ctx_dict(ctx), _env_dict(h, env, ctx))
+    return OutEnvelope.model_validate(out)
+
+def _call(h: ModuleHandle, env: InEnvelope, ctx: Context) -> OutEnvelope:
+    run = h.module.run
+    if not inspect.iscoroutinefunction(run):
+        return run(env, ctx)
+    return _run_registry(h, env, ctx)
+
+async def _fanout_sync(h: ModuleHandle, env: InEnvelope, ctx: Context) -> OutEnvelope:
+    # InEnvelope 스타일(동기) 핸들러: 매니페스트 thread 풀(없으면 공용 루프의 기본 풀)에서 parallelism 개씩
+    inputs = env.inputs or []
+    par = int((env.options.parallelism if env.options else None) or DEFAULT_FANOUT_PARALLELISM)
+    sem = asyncio.Semaphore(max(1, min(par, len(inputs) or 1)))
+    plan = h.registry.get_plan(h.name, env.action)
+    pool = plan.executor if plan is not None and plan.executor is not None and plan.executor.kind == "thread" else None
+    loop = asyncio.get_running_loop()
+
+    def one(i: int, it: Dict[str, Any]) -> ResultItem:
+        sub = InEnvelope(action=env.action, mode="SINGLE", input=it, request_id=env.request_id)
+        try:
+            out = h.module.run(sub, ctx)
+            if not out.ok:
+                return ResultItem(ok=False, error=out.error or ErrorObj(code="ERR_MODULE", message="failed"), index=i)
+            data = out.data or {}
+            # Schema 검증(OUT)
+            _validate_schema(h, env.action, data, in_out="out")
+            return ResultItem(ok=True, data=data, index=i)
+        except Exception as ex:
+            return ResultItem(ok=False, error=ErrorObj(code=getattr(ex, "code", "ERR_MODULE"), message=str(ex)), index=i)
+
+    async def bounded(i: int, it: Dict[str, Any]) -> ResultItem:
+        async with sem:
+            if pool is not None:
+                return await pool.submit(one, i, it)
+            return await loop.run_in_executor(None, one, i, it)
+
+    # gather 는 입력 순서(index)를 유지
+    results: List[ResultItem] = list(await asyncio.gather(*(bounded(i, it) for i, it in enumerate(inputs))))
+    all_ok = all(r.ok for r in results)
+    return OutEnvelope(ok=all_ok, mode="BULK", results=results, partial_ok=(not all_ok))
+
+def _fanout(h: ModuleHandle, env: InEnvelope, ctx: Context) -> OutEnvelope:
+    if not inspect.iscoroutinefunction(h.module.run):
+        return await_sync(_fanout_sync(h, env, ctx))
+    # registry fan-out(options.auto_fanout): 항목마다 plan.executor 로 실행(같은 pool 을 쓰는 쓰기 액션은 직렬화됨)
+    return _run_registry(h, env, ctx)
+
+def _auto_fanout(h: ModuleHandle, env: InEnvelope) -> bool:
+    # BULK 미지원(SINGLE 전용) 액션 + options.auto_fanout 이면 항목별 SINGLE 실행
+    action_def = h.manifest.get("actions", {}).get(env.action)
+    if action_def is None or env.mode != "BULK" or not (env.options and env.options.auto_fanout):
+        return False
+    modes = action_def.get("modes", ["SINGLE"])
+    return "BULK" not in modes and "SINGLE" in modes
+
 def execute(module_name: str, env: InEnvelope, ctx: Context) -> OutEnvelope:
     h = load_module(module_name)  # 핫로딩
-    _ensure_mode(h.manifest, env.action, env.mode)
+    fanout = _auto_fanout(h, env)
+    if not fanout:
+        _ensure_mode(h.manifest, env.action, env.mode)
     check_required_scopes(h.manifest, env.action, ctx.scopes)
     _load_secrets_to_ctx(ctx, h.manifest, env.action)
 
     # Schema 검증(IN)
     if env.mode == "SINGLE" and env.input is not None:
-        _validate_schema(h.base_dir, h.manifest, env.action, env.input, in_out="in")
+        _validate_schema(h, env.action, env.input, in_out="in")
     elif env.mode == "BULK":
-        for i, it in enumerate(env.inputs or []):
-            _validate_schema(h.base_dir, h.manifest, env.action, it, in_out="in")
+        for it in env.inputs or []:
+            _validate_schema(h, env.action, it, in_out="in")
 
     # auto_fanout
-    action_def = h.manifest["actions"][env.action]
-    supports_bulk = "BULK" in action_def.get("modes", ["SINGLE"])
-    if env.mode == "BULK" and not supports_bulk and (env.options and env.options.auto_fanout):
-        results: List[ResultItem] = []
-        all_ok = True
-        for i, it in enumerate(env.inputs or []):
-            sub = InEnvelope(action=env.action, mode="SINGLE", input=it, request_id=env.request_id)
-            try:
-                out = h.module.run(sub, ctx)
-                data = out.data or {}
-                # Schema 검증(OUT)
-                _validate_schema(h.base_dir, h.manifest, env.action, data, in_out="out")
-                results.append(ResultItem(ok=True, data=data, index=i))
-            except Exception as ex:
-                all_ok = False
-                results.append(ResultItem(ok=False, error=ErrorObj(code=getattr(ex, "code", "ERR_MODULE"),
-                                                                  message=str(ex)), index=i))
-        return OutEnvelope(ok=all_ok, mode="BULK", results=results, partial_ok=(not all_ok))
+    if fanout:
+        return _fanout(h, env, ctx)
 
     # 모듈 직접 실행
     try:
-        out = h.module.run(env, ctx)
+        out = _call(h, env, ctx)
         # OUT Schema
         if out.data is not None:
-            _validate_schema(h.base_dir, h.manifest, env.action, out.data, in_out="out")
+            _validate_schema(h, env.action, out.data, in_out="out")
         return out
     except Exception as ex:
         raise ModuleExecutionError(f"{ex}") from ex
@@ -0,0 +1,90 @@
+# JSON 스키마 사전 컴파일(매니페스트 로드 시 1회)
+from typing import Any, Callable, Dict, Optional
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+# fast path가 이해하는 키워드만 있는 스키마에 한해 사전 컴파일된 검사기를 사용
+_ANNOTATIONS = {"$schema", "$id", "title", "description", "$comment", "examples"}
+_OBJECT_KEYS = {"type", "properties", "required", "additionalProperties"} | _ANNOTATIONS
+_PROP_KEYS = {"type"} | _ANNOTATIONS
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_int,  # 1.0 같은 float은 fast path에서 거절 -> 전체 검증기로 위임
+    "number": _is_number,
+    "boolean": lambda v: v is True or v is False,
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+def _compile_fast(schema: Dict[str, Any]) -> Optional[Callable[[Any], bool]]:
+    """단순 object 스키마(type/properties/required/additionalProperties)만 컴파일.
+    반환된 검사기가 True면 유효, False면 전체 검증기로 다시 확인한다."""
+    if not isinstance(schema, dict) or schema.get("type") != "object":
+        return None
+    if set(schema) - _OBJECT_KEYS:
+        return None
+    additional = schema.get("additionalProperties", True)
+    if not isinstance(additional, bool):
+        return None
+    props: Dict[str, Optional[Callable[[Any], bool]]] = {}
+    for name, sub in (schema.get("properties") or {}).items():
+        if not isinstance(sub, dict) or set(sub) - _PROP_KEYS:
+            return None
+        t = sub.get("type")
+        if t is None:
+            props[name] = None
+        elif isinstance(t, str) and t in _TYPE_CHECKS:
+            props[name] = _TYPE_CHECKS[t]
+        else:
+            return None
+    required = tuple(schema.get("required") or ())
+
+    def check(instance: Any) -> bool:
+        if not isinstance(instance, dict):
+            return False
+        for k in required:
+            if k not in instance:
+                return False
+        for k, v in instance.items():
+            if k in props:
+                chk = props[k]
+                if chk is not None and not chk(v):
+                    return False
+            elif not additional:
+                return False
+        return True
+    return check
+
+class CompiledSchema:
+    __slots__ = ("schema", "validator", "fast")
+
+    def __init__(self, schema: Dict[str, Any]):
+        cls = validator_for(schema)
+        cls.check_schema(schema)  # 스키마 자체 검사는 로드 시 1회만
+        self.schema = schema
+        self.validator = cls(schema)
+        self.fast = _compile_fast(schema)
+
+    def is_valid(self, instance: Any) -> bool:
+        if self.fast is not None and self.fast(instance):
+            return True
+        return self.validator.is_valid(instance)
+
+    def validate(self, instance: Any) -> None:
+        """jsonschema.validate()와 같은 ValidationError(best_match)를 발생."""
+        if self.fast is not None and self.fast(instance):
+            return
+        error = best_match(self.validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    return CompiledSchema(schema)
@@ -1,53 +1,173 @@
-import os, json, base64
-from typing import Optional, Dict
+import os, json, time, logging, sqlite3, threading
+from typing import Optional, Dict, Iterable, Mapping, Tuple
 from cryptography.fernet import Fernet
 
+log = logging.getLogger(__name__)
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(ROOT, "data")
 KEY_PATH = os.path.join(DATA_DIR, ".secrets_key")
-STORE_PATH = os.path.join(DATA_DIR, "secrets.enc")
+DB_PATH = os.path.join(DATA_DIR, "secrets.db")
+STORE_PATH = os.path.join(DATA_DIR, "secrets.enc")  # 이전 JSON 저장소 — 처음 열 때 DB 로 옮기고 .migrated 로 보관
+
+# 저장소: SQLite(WAL) 사용자x키 행 단위. 값은 Fernet 암호문 그대로 저장
+#   - set_user_secrets 는 한 트랜잭션 — 키 1개 쓰기 비용이 전체 사용자 수와 무관
+#   - 동시 쓰기는 SQLite 잠금으로 직렬화(마지막 쓰기가 이김, 다른 키는 잃지 않음)
+# 프로세스 캐시: 키(Fernet)는 메모리에 1회 로드, 사용자별 복호화 결과는 DB 가 바뀔 때까지 재사용
+#   (다른 연결/워커의 커밋은 PRAGMA data_version 으로 감지, 이 프로세스의 쓰기는 _gen 으로 — 읽는 중에 쓰기가
+#    끼어들면 읽은 값을 캐시에 넣지 않는다)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS secrets(
+    user_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL,
+    PRIMARY KEY(user_id, key)) WITHOUT ROWID;
+"""
+
+_lock = threading.RLock()
+_tls = threading.local()
+_ready = False
+_key: Optional[Tuple[Tuple[int, int], Fernet]] = None   # (key 파일 버전, Fernet)
+_plain: Dict[str, Dict[str, Optional[str]]] = {}          # user_id -> 복호화된 값
+_gen = 0                                                  # 이 프로세스의 쓰기마다 +1
+
+def _version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 def _ensure_key() -> bytes:
     os.makedirs(DATA_DIR, exist_ok=True)
     if not os.path.exists(KEY_PATH):
         key = Fernet.generate_key()
         with open(KEY_PATH, "wb") as f: f.write(key)
-    return open(KEY_PATH, "rb").read()
+    with open(KEY_PATH, "rb") as f:
+        return f.read()
 
 def _fernet() -> Fernet:
-    return Fernet(_ensure_key())
+    global _key
+    with _lock:
+        ver = _version(KEY_PATH)
+        if _key is None or ver is None or _key[0] != ver:
+            f = Fernet(_ensure_key())
+            _key = (_version(KEY_PATH), f)
+            _plain.clear()  # 키가 바뀌면 복호화 결과도 무효
+        return _key[1]
 
-def set_user_secret(user_id: str, key: str, value: str) -> None:
-    f = _fernet()
-    store: Dict[str, Dict[str, str]] = {}
-    if os.path.exists(STORE_PATH):
-        store = json.load(open(STORE_PATH, "r", encoding="utf-8"))
-    user = store.get(user_id) or {}
-    token = f.encrypt(value.encode("utf-8")).decode("utf-8")
-    user[key] = token
-    store[user_id] = user
-    json.dump(store, open(STORE_PATH, "w", encoding="utf-8"), ensure_ascii=False, indent=2)
+def cipher() -> Fernet:
+    """저장소 키(Fernet). 다른 로컬 저장소(디스크 캐시 등)의 민감한 값 암호화용."""
+    return _fernet()
 
-def get_user_secret(user_id: str, key: str) -> Optional[str]:
-    if not os.path.exists(STORE_PATH): return None
-    store = json.load(open(STORE_PATH, "r", encoding="utf-8"))
-    user = store.get(user_id) or {}
-    token = user.get(key)
+def _migrate_json(conn: sqlite3.Connection) -> int:
+    """secrets.enc(JSON) -> DB. 이미 DB 에 있는 값은 덮어쓰지 않는다(여러 워커가 동시에 해도 같은 결과).
+    파일을 읽을 수 없으면 예외 — 저장소를 준비 완료로 두지 않아 기존 자격 증명이 조용히 사라지지 않는다."""
+    if not os.path.exists(STORE_PATH):
+        return 0
+    try:
+        with open(STORE_PATH, "r", encoding="utf-8") as f:
+            store = json.load(f)
+        if not isinstance(store, dict):
+            raise ValueError("top-level value is not an object")
+    except FileNotFoundError:
+        return 0  # 다른 워커가 먼저 옮김
+    except (OSError, ValueError) as e:
+        log.error("secret store migration failed: cannot read %s (%s); fix or move the file aside", STORE_PATH, e)
+        raise RuntimeError(f"cannot migrate {STORE_PATH}: {e}") from e
+    now = time.time()
+    rows = [(uid, k, v, now) for uid, kv in store.items() for k, v in (kv or {}).items() if v]
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR IGNORE INTO secrets(user_id, key, value, updated_at) VALUES(?,?,?,?)", rows)
+    try:
+        os.replace(STORE_PATH, STORE_PATH + ".migrated")
+    except FileNotFoundError:
+        pass  # 다른 워커가 먼저 옮김
+    return len(rows)
+
+def _conn() -> sqlite3.Connection:
+    global _ready
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _tls.conn = conn
+        _tls.data_version = None
+    if not _ready:
+        with _lock:
+            if not _ready:
+                conn.executescript(_SCHEMA)
+                _migrate_json(conn)
+                _ready = True
+    return conn
+
+def _changed(conn: sqlite3.Connection) -> bool:
+    # 이 연결이 마지막으로 본 뒤 다른 연결이 커밋했는지
+    v = conn.execute("PRAGMA data_version").fetchone()[0]
+    if v != _tls.data_version:
+        _tls.data_version = v
+        return True
+    return False
+
+def _decrypt(f: Fernet, token: Optional[str]) -> Optional[str]:
     if not token: return None
-    f = _fernet()
     try:
         return f.decrypt(token.encode("utf-8")).decode("utf-8")
     except Exception:
         return None
 
-def get_user_all(user_id: str) -> Dict[str, str]:
-    if not os.path.exists(STORE_PATH): return {}
-    store = json.load(open(STORE_PATH, "r", encoding="utf-8"))
+def _user(user_id: str) -> Dict[str, Optional[str]]:
+    conn = _conn()
+    with _lock:
+        if _changed(conn):
+            _plain.clear()
+        plain = _plain.get(user_id)
+        if plain is not None:
+            return plain
+        gen = _gen
+    rows = conn.execute("SELECT key, value FROM secrets WHERE user_id=?", (user_id,)).fetchall()
+    f = _fernet() if rows else None
+    plain = {k: _decrypt(f, v) for k, v in rows}
+    with _lock:
+        if _gen == gen:  # 읽는 동안 쓰기가 있었으면 오래된 값일 수 있으니 캐시하지 않음
+            _plain[user_id] = plain
+    return plain
+
+def set_user_secrets(user_id: str, values: Mapping[str, str]) -> None:
+    """여러 키를 한 트랜잭션으로 저장."""
+    global _gen
     f = _fernet()
-    out = {}
-    for k, v in (store.get(user_id) or {}).items():
-        try:
-            out[k] = f.decrypt(v.encode("utf-8")).decode("utf-8")
-        except Exception:
-            out[k] = None
-    return out
+    now = time.time()
+    rows = [(user_id, k, f.encrypt(str(v).encode("utf-8")).decode("utf-8"), now) for k, v in values.items()]
+    conn = _conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT INTO secrets(user_id, key, value, updated_at) VALUES(?,?,?,?) "
+                         "ON CONFLICT(user_id, key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
+                         rows)
+    with _lock:
+        _gen += 1
+        _plain.pop(user_id, None)
+
+def set_user_secret(user_id: str, key: str, value: str) -> None:
+    set_user_secrets(user_id, {key: value})
+
+def get_user_secret(user_id: str, key: str) -> Optional[str]:
+    return _user(user_id).get(key)
+
+def get_user_secrets(user_id: str, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+    """여러 키를 한 번에(없는 키는 None)."""
+    plain = _user(user_id)
+    return {k: plain.get(k) for k in keys}
+
+def get_user_all(user_id: str) -> Dict[str, str]:
+    return dict(_user(user_id))
+
+def compact() -> Dict[str, int]:
+    """WAL 을 본 파일로 합치고 빈 페이지를 회수(운영 점검/배포 후 수동 실행)."""
+    conn = _conn()
+    before = os.path.getsize(DB_PATH)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    return {"bytes_before": before, "bytes_after": os.path.getsize(DB_PATH)}
@@ -0,0 +1,70 @@
+# 동일 요청 합치기(single-flight): 같은 키로 동시에 들어온 호출은 진행 중인 실행 1개의 결과를 함께 받는다
+#   coalesce: true                       # 키 기본값 [user_id, input]
+#   coalesce: { key: [user_id] }
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from . import telemetry
+from . import deadline as dl
+from .cache import cache_key
+from .errors import err_timeout
+
+class SingleFlight:
+    """액션 1개의 in-flight 실행 테이블. 결과는 공유되므로 호출자는 반환된 dict 를 수정하지 않는다.
+    실행은 별도 task 로 돌려, 먼저 온 호출자가 취소되어도 나머지는 결과를 받는다."""
+
+    def __init__(self, name: str, spec: Any):
+        spec = spec if isinstance(spec, dict) else {}
+        self.name = name
+        self.key_parts: Tuple[str, ...] = tuple(spec.get("key") or ("user_id", "input"))
+        self._lock = threading.Lock()
+        # (event loop, key) -> task — 스레드별 루프(executor.call_blocking)끼리는 섞지 않는다
+        self._inflight: Dict[Tuple[Any, str], asyncio.Future] = {}
+        self.leaders = self.joined = self.timeouts = 0
+        telemetry.register_flight(name, self.stats)
+
+    def key(self, envelope: Dict[str, Any], ctx: Optional[Dict[str, Any]]) -> str:
+        return cache_key(self.key_parts, envelope, ctx)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]],
+                 ctx: Optional[Dict[str, Any]] = None) -> Any:
+        """ctx["deadline"] 이 있으면 그 안에서만 기다린다(합류한 호출이 리더의 남은 예산만큼 묶이지 않도록)."""
+        k = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._inflight.get(k)
+            if task is None:
+                task = asyncio.ensure_future(factory())
+                self._inflight[k] = task
+                self.leaders += 1
+                task.add_done_callback(lambda t: self._done(k, t))
+            else:
+                self.joined += 1
+        rem = dl.remaining(ctx)
+        if rem is None:
+            return await asyncio.shield(task)
+        try:
+            # 기다리기를 포기해도 실행(task)은 취소하지 않는다 — 다른 호출자가 결과를 받는다
+            return await asyncio.wait_for(asyncio.shield(task), max(rem, 0.0))
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise err_timeout("Deadline exceeded", {"stage": "coalesce", "flight": self.name,
+                                                    "budget_ms": round(max(rem, 0.0) * 1000, 1)})
+
+    def _done(self, k, task: asyncio.Future):
+        with self._lock:
+            if self._inflight.get(k) is task:
+                del self._inflight[k]
+        if not task.cancelled():
+            task.exception()  # 기다리는 호출자가 모두 취소된 경우 "never retrieved" 경고 방지
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "inflight": len(self._inflight),
+                "leaders": self.leaders,
+                "joined": self.joined,
+                "timeouts": self.timeouts,
+            }
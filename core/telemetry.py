@@ -9,6 +9,29 @@ _METRICS = {
     "latency_ms": defaultdict(lambda: deque(maxlen=200)),  # 최근 200개
 }
 
+_POOLS = {}  # name -> stats callable (core.executor 등에서 등록)
+_CACHES = {}  # name -> stats callable (core.cache 에서 등록)
+_FLIGHTS = {}  # name -> stats callable (core.singleflight 에서 등록)
+_LIMITERS = {}  # name -> stats callable (core.outbound 에서 등록)
+
+def percentile(sorted_values, p):
+    if not sorted_values: return None
+    i = int(len(sorted_values)*p)
+    i = min(max(i, 0), len(sorted_values)-1)
+    return sorted_values[i]
+
+def register_pool(name: str, stats):
+    _POOLS[name] = stats
+
+def register_cache(name: str, stats):
+    _CACHES[name] = stats
+
+def register_flight(name: str, stats):
+    _FLIGHTS[name] = stats
+
+def register_limiter(name: str, stats):
+    _LIMITERS[name] = stats
+
 def record(module: str, action: str, ok: bool, ms: float):
     key = f"{module}:{action}"
     _METRICS["calls"][key] += 1
@@ -24,10 +47,7 @@ def snapshot():
         lat = list(_METRICS["latency_ms"][key])
         lat_sorted = sorted(lat)
         def perc(p):
-            if not lat_sorted: return None
-            i = int(len(lat_sorted)*p)
-            i = min(max(i, 0), len(lat_sorted)-1)
-            return lat_sorted[i]
+            return percentile(lat_sorted, p)
         out.append({
             "key": key,
             "calls": calls,
@@ -38,4 +58,9 @@ def snapshot():
             "p99_ms": perc(0.99),
             "last_ms": lat[-1] if lat else None,
         })
-    return {"ts": time.time(), "series": sorted(out, key=lambda x: x["key"])}
+    pools = [stats() for _, stats in sorted(_POOLS.items())]
+    caches = [stats() for _, stats in sorted(_CACHES.items())]
+    coalesce = [stats() for _, stats in sorted(_FLIGHTS.items())]
+    outbound = [stats() for _, stats in sorted(_LIMITERS.items())]
+    return {"ts": time.time(), "series": sorted(out, key=lambda x: x["key"]), "pools": pools, "caches": caches,
+            "coalesce": coalesce, "outbound": outbound}
@@ -1,15 +1,72 @@
-import os, sqlite3, time, hashlib, secrets
+import os, sqlite3, time, hashlib, secrets, threading
+from contextlib import contextmanager
 from typing import Optional, Dict, Any, List
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 DB_PATH = os.path.join(ROOT, "data", "auth.db")
 
-def _conn():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# 연결 풀: 요청마다 connect 하지 않고 스레드 간에 연결을 재사용(연결마다 prepared statement 캐시 유지)
+#   - 스키마 생성/점검은 프로세스(와 DB_PATH)당 한 번
+#   - fork 된 워커나 DB_PATH 가 바뀐 경우 풀을 새로 만든다
+POOL_SIZE = int(os.getenv("AUTH_DB_POOL_SIZE", "8"))
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",     # 8MB
+    "PRAGMA mmap_size=67108864",   # 64MB
+)
+_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_lock = threading.Lock()
+_pool: List[sqlite3.Connection] = []
+_owner = None  # (pid, DB_PATH) — 풀과 스키마 초기화가 유효한 범위
+
+def _open() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=5, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    for p in _PRAGMAS:
+        conn.execute(p)
     return conn
 
+def _checkout() -> sqlite3.Connection:
+    global _owner
+    owner = (os.getpid(), DB_PATH)
+    with _lock:
+        if _owner != owner:
+            _pool.clear()  # 이전 프로세스/경로의 연결은 버린다(fork 후 닫으면 부모 연결을 건드릴 수 있음)
+            os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+            conn = _open()
+            _ensure_tables_and_migrate(conn)
+            _owner = owner
+            return conn
+        if _pool:
+            return _pool.pop()
+    return _open()
+
+def _checkin(conn: sqlite3.Connection):
+    with _lock:
+        if _owner == (os.getpid(), DB_PATH) and len(_pool) < POOL_SIZE:
+            _pool.append(conn)
+            return
+    conn.close()
+
+@contextmanager
+def _conn():
+    """풀에서 연결을 빌려 한 트랜잭션으로 실행(정상 종료 시 commit, 예외 시 rollback)."""
+    conn = _checkout()
+    try:
+        with conn:
+            yield conn
+    except sqlite3.Error:
+        conn.close()  # 상태를 알 수 없는 연결은 풀에 돌려놓지 않는다
+        raise
+    except BaseException:
+        _checkin(conn)
+        raise
+    _checkin(conn)
+
 def _hash_pw(password: str, salt: str) -> str:
     h = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 150_000)
     return h.hex()
@@ -24,8 +81,8 @@ def _has_column(cur, table: str, column: str) -> bool:
             return True
     return False
 
-def _ensure_tables_and_migrate():
-    with _conn() as c:
+def _ensure_tables_and_migrate(c: sqlite3.Connection):
+    with c:
         cur = c.cursor()
         # users table — create if missing
         cur.execute("""CREATE TABLE IF NOT EXISTS users(
@@ -62,16 +119,15 @@ def _ensure_tables_and_migrate():
         c.commit()
 
 def init():
-    _ensure_tables_and_migrate()
+    """스키마 준비(프로세스당 한 번만 실제로 실행)."""
+    _checkin(_checkout())
 
 def email_exists(email: str) -> bool:
-    init()
     with _conn() as c:
         r = c.execute("SELECT 1 FROM users WHERE lower(email)=?", (_norm(email),)).fetchone()
         return bool(r)
 
 def create_user(email: str, password: str, nickname: str) -> str:
-    init()
     nemail = _norm(email)
     if email_exists(nemail):
         raise ValueError("email exists")
@@ -85,13 +141,11 @@ def create_user(email: str, password: str, nickname: str) -> str:
     return uid
 
 def get_user_by_email(email: str) -> Optional[Dict[str,Any]]:
-    init()
     with _conn() as c:
         r = c.execute("SELECT * FROM users WHERE lower(email)=?", (_norm(email),)).fetchone()
         return dict(r) if r else None
 
 def get_user_by_id(uid: str) -> Optional[Dict[str,Any]]:
-    init()
     with _conn() as c:
         r = c.execute("SELECT * FROM users WHERE id=?", (uid,)).fetchone()
         return dict(r) if r else None
@@ -103,19 +157,16 @@ def verify_password(email: str, password: str) -> Optional[Dict[str,Any]]:
     return u
 
 def update_profile(uid: str, nickname: str):
-    init()
     with _conn() as c:
         c.execute("UPDATE users SET nickname=? WHERE id=?", (nickname, uid))
 
 def change_password(uid: str, new_password: str):
-    init()
     salt = secrets.token_hex(16)
     pw_hash = _hash_pw(new_password, salt)
     with _conn() as c:
         c.execute("UPDATE users SET pw_hash=?, pw_salt=? WHERE id=?", (pw_hash, salt, uid))
 
 def create_refresh(user_id: str, days: int = 30) -> str:
-    init()
     tok = secrets.token_urlsafe(32)
     now = int(time.time())
     exp = now + days*86400
@@ -124,30 +175,24 @@ def create_refresh(user_id: str, days: int = 30) -> str:
                   (tok, user_id, exp, now))
     return tok
 
-def get_refresh(token: str) -> Optional[Dict[str,Any]]:
-    init()
-    with _conn() as c:
-        r = c.execute("SELECT * FROM refresh_tokens WHERE token=?", (token,)).fetchone()
-        if not r: return None
-        rec = dict(r)
-        if rec["expires_at"] < int(time.time()):
-            c.execute("DELETE FROM refresh_tokens WHERE token=?", (token,))
-            return None
-        return rec
-
-def rotate_refresh(old_token: str, user_id: str, days: int = 30) -> str:
-    init()
-    new_tok = secrets.token_urlsafe(32)
+def exchange_refresh(token: str, days: int = 30) -> Optional[Dict[str,Any]]:
+    """refresh 토큰을 한 트랜잭션에서 소비하고 새 토큰 발급. 같은 토큰으로 동시에 와도 한 번만 성공."""
     now = int(time.time())
-    exp = now + days*86400
     with _conn() as c:
-        c.execute("DELETE FROM refresh_tokens WHERE token=?", (old_token,))
+        if _RETURNING:
+            r = c.execute("DELETE FROM refresh_tokens WHERE token=? RETURNING user_id, expires_at", (token,)).fetchone()
+        else:
+            c.execute("BEGIN IMMEDIATE")
+            r = c.execute("SELECT user_id, expires_at FROM refresh_tokens WHERE token=?", (token,)).fetchone()
+            if r: c.execute("DELETE FROM refresh_tokens WHERE token=?", (token,))
+        if not r or r["expires_at"] < now:
+            return None
+        new_tok = secrets.token_urlsafe(32)
         c.execute("INSERT INTO refresh_tokens(token,user_id,expires_at,created_at) VALUES(?,?,?,?)",
-                  (new_tok, user_id, exp, now))
-    return new_tok
+                  (new_tok, r["user_id"], now + days*86400, now))
+        return {"user_id": r["user_id"], "refresh_token": new_tok}
 
 def revoke_refresh(token: str):
-    init()
     with _conn() as c:
         c.execute("DELETE FROM refresh_tokens WHERE token=?", (token,))
 
@@ -157,7 +202,6 @@ def _hash_code(code: str) -> str:
     return _hl.sha256(code.encode("utf-8")).hexdigest()
 
 def create_reset(email: str, code: str, ttl_min: int = 10) -> str:
-    init()
     tok = secrets.token_urlsafe(16)
     now = int(time.time())
     exp = now + ttl_min*60
@@ -168,7 +212,6 @@ def create_reset(email: str, code: str, ttl_min: int = 10) -> str:
     return tok
 
 def consume_reset(email: str, code: str) -> bool:
-    init()
     ch = _hash_code(code)
     with _conn() as c:
         r = c.execute("SELECT token,expires_at FROM reset_tokens WHERE email=? AND code_hash=? ORDER BY created_at DESC LIMIT 1",
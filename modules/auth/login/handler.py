@@ -5,15 +5,22 @@ from core.ratelimit import LOGIN_EMAIL_LIMITER, LOGIN_IP_LIMITER
 
 DEFAULT_SCOPES = ["auth:profile"]
 
+def admit(envelope: Dict[str, Any], ctx=None):
+    # LOGIN 은 process 풀에서 실행되므로 시도 제한은 서버 프로세스에서(워커마다 따로 세면 한도가 풀 크기배가 된다)
+    if envelope.get("action") != "LOGIN":
+        return None
+    email = (envelope.get("input") or {}).get("email","").strip().lower()
+    ip = (ctx or {}).get("client_ip","-")
+    if not LOGIN_EMAIL_LIMITER.allow(f"e:{email}") or not LOGIN_IP_LIMITER.allow(f"ip:{ip}"):
+        return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_RATE_LIMIT","message":"too many login attempts"}}
+    return None
+
 async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
     act = envelope.get("action")
     body = envelope.get("input", {})
 
     if act == "LOGIN":
         email = body.get("email","").strip().lower()
-        ip = (ctx or {}).get("client_ip","-")
-        if not LOGIN_EMAIL_LIMITER.allow(f"e:{email}") or not LOGIN_IP_LIMITER.allow(f"ip:{ip}"):
-            return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_RATE_LIMIT","message":"too many login attempts"}}
         u = _store.verify_password(email, body.get("password",""))
         if not u:
             return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_FORBIDDEN","message":"invalid credentials"}}
@@ -24,13 +31,12 @@ async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
 
     if act == "REFRESH":
         rt = body.get("refresh_token","")
-        rec = _store.get_refresh(rt)
+        # rotate token (조회+삭제+발급을 한 트랜잭션으로)
+        rec = _store.exchange_refresh(rt, days=30)
         if not rec:
             return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_FORBIDDEN","message":"invalid refresh"}}
-        # rotate token
-        new_rt = _store.rotate_refresh(rt, rec["user_id"], days=30)
         access = jwt_utils.issue_access(rec["user_id"], scopes=DEFAULT_SCOPES, minutes=30)
-        return {"ok": True, "mode":"SINGLE", "data":{"access_token": access, "refresh_token": new_rt}}
+        return {"ok": True, "mode":"SINGLE", "data":{"access_token": access, "refresh_token": rec["refresh_token"]}}
 
     if act == "LOGOUT":
         _store.revoke_refresh(body.get("refresh_token",""))
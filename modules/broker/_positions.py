@@ -0,0 +1,251 @@
+# 컬럼형(column) 보유 종목 묶음 + 벡터 평가 엔진 — SUMMARY/포트폴리오 화면 공용
+#   - 종목코드는 프로세스 공용 심볼 테이블에 intern 하고 정수 id 배열로 보관
+#   - 수량/평균단가/현재가/손익은 종목별 dict 대신 같은 길이의 배열 4개
+#   - numpy(필수 의존성, requirements.txt) 배열로 벡터 연산. import 할 수 없는 환경에서만 array.array + 파이썬 루프(결과 동일, 더 느림)
+# 평가금액 규칙은 기존 SUMMARY 와 같다: 종목별 int(qty * eval_price) 의 합, 손익은 증권사가 준 종목별 pnl 의 합
+import threading
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 설치가 깨진 환경용 폴백
+    np = None
+
+class SymbolTable:
+    """종목코드 <-> 정수 id. id 는 프로세스가 살아 있는 동안 바뀌지 않는다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def intern(self, symbol: str) -> int:
+        i = self._ids.get(symbol)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(symbol)
+                if i is None:
+                    i = self._ids[symbol] = len(self._names)
+                    self._names.append(symbol)
+        return i
+
+    def ids(self, symbols: Sequence[str]) -> List[int]:
+        get = self._ids.get
+        out = [get(s, -1) for s in symbols]
+        if -1 in out:
+            out = [i if i >= 0 else self.intern(s) for i, s in zip(out, symbols)]
+        return out
+
+    def symbol(self, i: int) -> str:
+        return self._names[i]
+
+    def names(self, ids: Iterable[int]) -> List[str]:
+        names = self._names
+        return [names[i] for i in ids]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+SYMBOLS = SymbolTable()
+
+def _num(v: Any) -> float:
+    try:
+        return float(str(v or "0").replace(",", ""))
+    except ValueError:
+        return 0.0
+
+def _floats(values: Sequence[Any]) -> List[float]:
+    try:
+        return list(map(float, values))  # KIS 는 "123" / "123.45" 문자열
+    except (TypeError, ValueError):
+        return [_num(v) for v in values]
+
+def _column(values: Sequence[Any], kind: str):
+    # kind: "q"(int64) | "d"(float64). 문자열(KIS 응답)도 받는다
+    if kind == "q":
+        try:
+            ints = list(map(int, values))
+        except (TypeError, ValueError):
+            ints = list(map(int, _floats(values)))
+        return np.array(ints, dtype=np.int64) if np is not None else array("q", ints)
+    floats = _floats(values)
+    return np.array(floats, dtype=np.float64) if np is not None else array("d", floats)
+
+def _empty(kind: str):
+    if np is not None:
+        return np.empty(0, dtype=np.int64 if kind == "q" else np.float64)
+    return array(kind)
+
+class Positions:
+    """같은 길이의 컬럼: sym(심볼 id), qty, avg_price, eval_price, pnl. 생성 후에는 바꾸지 않는다."""
+    __slots__ = ("sym", "qty", "avg_price", "eval_price", "pnl", "symbols")
+
+    def __init__(self, sym, qty, avg_price, eval_price, pnl, symbols: SymbolTable = SYMBOLS):
+        self.sym = sym
+        self.qty = qty
+        self.avg_price = avg_price
+        self.eval_price = eval_price
+        self.pnl = pnl
+        self.symbols = symbols
+
+    def __len__(self) -> int:
+        return len(self.sym)
+
+    # ---- 생성 ----
+    @classmethod
+    def empty(cls) -> "Positions":
+        return cls(_empty("q"), _empty("q"), _empty("d"), _empty("d"), _empty("q"))
+
+    @classmethod
+    def from_columns(cls, symbols: Sequence[str], qty: Sequence[Any], avg_price: Sequence[Any],
+                     eval_price: Sequence[Any], pnl: Sequence[Any]) -> "Positions":
+        return cls(_column(SYMBOLS.ids(symbols), "q"), _column(qty, "q"), _column(avg_price, "d"),
+                   _column(eval_price, "d"), _column(pnl, "q"))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "Positions":
+        """SUMMARY positions 형식({"symbol","qty","avg_price","eval_price","pnl"})의 행들."""
+        rows = [r for r in rows if r.get("symbol")]
+        return cls.from_columns([str(r["symbol"]) for r in rows], [r.get("qty") for r in rows],
+                                [r.get("avg_price") for r in rows], [r.get("eval_price") for r in rows],
+                                [r.get("pnl") for r in rows])
+
+    @classmethod
+    def from_kis(cls, rows: Optional[Iterable[Mapping[str, Any]]]) -> "Positions":
+        """KIS inquire-balance output1 원본 행(문자열 숫자)을 중간 dict 없이 바로 컬럼으로."""
+        rows = [r for r in rows or () if isinstance(r, dict) and r.get("pdno")]
+        try:
+            # 컬럼별로 한 번씩 훑는다(필드가 모두 있는 일반적인 경우)
+            return cls.from_columns([str(r["pdno"]) for r in rows], [r["hldg_qty"] for r in rows],
+                                    [r["pchs_avg_pric"] for r in rows], [r["prpr"] for r in rows],
+                                    [r["evlu_pfls_amt"] for r in rows])
+        except KeyError:
+            return cls.from_columns([str(r["pdno"]) for r in rows], [r.get("hldg_qty") for r in rows],
+                                    [r.get("pchs_avg_pric") for r in rows], [r.get("prpr") for r in rows],
+                                    [r.get("evlu_pfls_amt") for r in rows])
+
+    @classmethod
+    def concat(cls, parts: Iterable["Positions"]) -> "Positions":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        cols = []
+        for name in ("sym", "qty", "avg_price", "eval_price", "pnl"):
+            arrs = [getattr(p, name) for p in parts]
+            if np is not None:
+                cols.append(np.concatenate(arrs))
+            else:
+                out = array(arrs[0].typecode)
+                for a in arrs:
+                    out.extend(a)
+                cols.append(out)
+        return cls(*cols)
+
+    # ---- 평가 ----
+    def values(self):
+        """종목별 평가금액 int(qty * eval_price)."""
+        if np is not None:
+            return np.trunc(self.qty * self.eval_price).astype(np.int64)
+        return array("q", (int(q * p) for q, p in zip(self.qty, self.eval_price)))
+
+    def costs(self):
+        """종목별 매입금액 int(qty * avg_price)."""
+        if np is not None:
+            return np.trunc(self.qty * self.avg_price).astype(np.int64)
+        return array("q", (int(q * p) for q, p in zip(self.qty, self.avg_price)))
+
+    def eval_amount(self) -> int:
+        return int(sum(self.values())) if np is None else int(self.values().sum())
+
+    def cost_amount(self) -> int:
+        return int(sum(self.costs())) if np is None else int(self.costs().sum())
+
+    def pnl_amount(self) -> int:
+        return int(sum(self.pnl)) if np is None else int(self.pnl.sum())
+
+    def totals(self, cash: int = 0) -> Dict[str, int]:
+        """SUMMARY 합계: eval_amount 는 현금 포함."""
+        return {"cash": int(cash), "eval_amount": self.eval_amount() + int(cash), "pnl": self.pnl_amount()}
+
+    def weights(self, values=None) -> List[float]:
+        """종목별 평가금액 비중(합 1.0). 평가금액 합이 0 이면 모두 0."""
+        values = self.values() if values is None else values
+        if np is not None:
+            total = values.sum()
+            return (values / total).tolist() if total else [0.0] * len(values)
+        total = sum(values)
+        return [v / total for v in values] if total else [0.0] * len(values)
+
+    def group_sum(self, keys, size: int) -> Dict[str, List[int]]:
+        """정수 그룹 키(0..size-1)별 qty/평가금액/매입금액/손익 합."""
+        if np is not None:
+            keys = np.asarray(keys, dtype=np.int64)
+
+            def agg(col):
+                return np.bincount(keys, weights=col, minlength=size).round().astype(np.int64).tolist()
+            return {"qty": agg(self.qty), "eval_amount": agg(self.values()), "cost": agg(self.costs()),
+                    "pnl": agg(self.pnl)}
+        out = {name: [0] * size for name in ("qty", "eval_amount", "cost", "pnl")}
+        q_, v_, c_, p_ = out["qty"], out["eval_amount"], out["cost"], out["pnl"]
+        for k, q, a, e, p in zip(keys, self.qty, self.avg_price, self.eval_price, self.pnl):
+            q_[k] += q
+            v_[k] += int(q * e)
+            c_[k] += int(q * a)
+            p_[k] += p
+        return out
+
+    def by_symbol(self) -> List[Dict[str, Any]]:
+        """종목별 합산(여러 계좌/페이지) — 평가금액 내림차순, weight 포함."""
+        if not len(self):
+            return []
+        if np is not None:
+            uniq, keys = np.unique(self.sym, return_inverse=True)
+            ids = uniq.tolist()
+        else:
+            index: Dict[int, int] = {}
+            keys = array("q", (index.setdefault(s, len(index)) for s in self.sym))
+            ids = list(index)
+        sums = self.group_sum(keys, len(ids))
+        total = sum(sums["eval_amount"])
+        rows = [{"symbol": s, "qty": q, "eval_amount": v, "cost": c, "pnl": p, "weight": (v / total if total else 0.0)}
+                for s, q, v, c, p in zip(self.symbols.names(ids), sums["qty"], sums["eval_amount"],
+                                         sums["cost"], sums["pnl"])]
+        rows.sort(key=lambda r: -r["eval_amount"])
+        return rows
+
+    def exposure(self, group_of: Union[Mapping[str, str], Callable[[str], str]],
+                 default: str = "other") -> Dict[str, Dict[str, Any]]:
+        """종목 -> 그룹(업종/시장/계좌 등) 매핑별 평가금액/손익/비중. 매핑은 심볼 id 단위로 한 번만 조회."""
+        if isinstance(group_of, Mapping):
+            mapping = group_of
+            group_of = lambda sym: mapping.get(sym, default)
+        labels: Dict[str, int] = {}
+        if np is not None:
+            ids, inverse = np.unique(self.sym, return_inverse=True)
+            lut = np.fromiter((labels.setdefault(group_of(sym) or default, len(labels))
+                               for sym in self.symbols.names(ids.tolist())), dtype=np.int64, count=len(ids))
+            keys = lut[inverse]
+        else:
+            per_sym: Dict[int, int] = {}
+            keys = array("q")
+            for s in self.sym:
+                k = per_sym.get(s)
+                if k is None:
+                    k = per_sym[s] = labels.setdefault(group_of(self.symbols.symbol(s)) or default, len(labels))
+                keys.append(k)
+        sums = self.group_sum(keys, len(labels))
+        total = sum(sums["eval_amount"])
+        return {label: {"eval_amount": sums["eval_amount"][k], "pnl": sums["pnl"][k],
+                        "weight": (sums["eval_amount"][k] / total if total else 0.0)}
+                for label, k in labels.items()}
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """SUMMARY positions 형식으로(JSON 응답용)."""
+        def lst(col):
+            return col.tolist()
+        return [{"symbol": s, "qty": q, "avg_price": a, "eval_price": e, "pnl": p}
+                for s, q, a, e, p in zip(self.symbols.names(lst(self.sym)), lst(self.qty), lst(self.avg_price),
+                                         lst(self.eval_price), lst(self.pnl))]
@@ -0,0 +1,91 @@
+# KIS 주식잔고조회(inquire-balance) 연속조회
+#   - 응답 헤더 tr_cont 가 F/M 이면 다음 페이지가 있음 -> 요청 헤더 tr_cont=N + CTX_AREA_FK100/NK100(응답 본문 값)으로 이어서 조회
+#   - 다음 페이지 요청을 먼저 띄워 두고 현재 페이지를 파싱/전달(pipelining)
+#   - output1: 보유 종목(페이지마다 일부), output2: 계좌 합계(마지막 페이지 값을 사용)
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from . import _client
+from .._positions import Positions
+
+PATH = "/uapi/domestic-stock/v1/trading/inquire-balance"
+MAX_PAGES = 200   # 비정상 응답(연속키 반복)으로 무한 조회하지 않도록
+MORE = ("F", "M")
+
+def tr_id(is_paper: bool) -> str:
+    return "VTTC8434R" if is_paper else "TTTC8434R"
+
+def _int(v: Any) -> int:
+    try:
+        return int(float(str(v or "0").replace(",", "")))
+    except ValueError:
+        return 0
+
+def parse_cash(out2: Any) -> int:
+    if isinstance(out2, list):
+        out2 = out2[0] if out2 else {}
+    return _int((out2 or {}).get("dnca_tot_amt"))
+
+async def pages(base: str, token: str, app_key: str, app_secret: str, account_no: str, product_code: str,
+                custtype: str, is_paper: bool, ctx: Optional[Dict[str, Any]] = None,
+                timeout: float = 10.0) -> AsyncIterator[Dict[str, Any]]:
+    """페이지별 {"page", "book"(Positions), "cash", "last"} 를 도착하는 대로 내보낸다.
+    첫 페이지가 잔고 응답이 아니면 ValueError(호출자는 mock 으로 대체)."""
+    url = base + PATH
+    headers = {
+        "authorization": f"Bearer {token}",
+        "appkey": app_key,
+        "appsecret": app_secret,
+        "tr_id": tr_id(is_paper),
+        "custtype": custtype,
+        "tr_cont": "",
+    }
+    params = {
+        "CANO": account_no[:8],
+        "ACNT_PRDT_CD": product_code,
+        "AFHR_FLPR_YN": "N",
+        "OFL_YN": "N",
+        "INQR_DVSN": "02",
+        "UNPR_DVSN": "01",
+        "FUND_STTL_ICLD_YN": "N",
+        "FNCG_AMT_AUTO_RDPT_YN": "N",
+        "PRCS_DVSN": "01",
+        "CTX_AREA_FK100": "",
+        "CTX_AREA_NK100": "",
+    }
+
+    def fetch(fk: str, nk: str, cont: str):
+        return asyncio.ensure_future(_client.get(url, headers={**headers, "tr_cont": cont},
+                                                 params={**params, "CTX_AREA_FK100": fk, "CTX_AREA_NK100": nk},
+                                                 ctx=ctx, timeout=timeout))
+
+    pending = fetch("", "", "")
+    try:
+        for page in range(MAX_PAGES):
+            r = await pending
+            pending = None
+            j = r.json()
+            if "output1" not in j and "output2" not in j:
+                if page == 0:
+                    raise ValueError(f"unexpected inquire-balance response: {j.get('msg_cd')} {j.get('msg1')}")
+                break
+            more = r.headers.get("tr_cont", "") in MORE and bool((j.get("ctx_area_nk100") or "").strip())
+            if more and page + 1 < MAX_PAGES:
+                pending = fetch(j.get("ctx_area_fk100") or "", j.get("ctx_area_nk100") or "", "N")
+            yield {"page": page, "book": Positions.from_kis(j.get("output1")), "cash": parse_cash(j.get("output2")),
+                   "last": pending is None}
+            if pending is None:
+                break
+    finally:
+        if pending is not None:  # 소비자가 중간에 멈춤 -> 미리 띄운 요청 취소
+            pending.cancel()
+
+async def summary(*args, **kwargs) -> Dict[str, Any]:
+    """모든 페이지를 합친 SUMMARY data(account_no 제외)."""
+    books: List[Positions] = []
+    cash = 0
+    async for p in pages(*args, **kwargs):
+        books.append(p["book"])
+        cash = p["cash"]
+    book = Positions.concat(books)
+    return {**book.totals(cash), "positions": book.to_rows(), "pages": len(books)}
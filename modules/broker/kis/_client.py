@@ -0,0 +1,149 @@
+# KIS OpenAPI 공용 HTTP 클라이언트: 호스트(실/모의)별 keep-alive 연결 풀 + 단계별 timeout
+#   - async: 이벤트 루프마다 httpx.AsyncClient (executor 스레드 루프끼리 연결을 섞지 않음)
+#   - sync : 스레드 안전한 httpx.Client (동기 진단 도구/레거시 handler(payload, context)용)
+# 풀 한도/timeout 은 환경변수로 조정: KIS_HTTP_MAX_CONNECTIONS, KIS_HTTP_MAX_KEEPALIVE, KIS_HTTP_KEEPALIVE_EXPIRY,
+#   KIS_HTTP_CONNECT_TIMEOUT, KIS_HTTP_READ_TIMEOUT, KIS_HTTP_WRITE_TIMEOUT, KIS_HTTP_POOL_TIMEOUT (초)
+# 모든 요청은 appkey(헤더 또는 토큰 발급 body)별 송신 limiter(core.outbound)를 거친다
+#   KIS_RPS_PROD / KIS_RPS_VTS (초당 건수), KIS_RPS_BURST. upstream 이 초당 건수 초과(EGW00201/429)를 알리면 버킷을 비우고 재시도
+import os
+import atexit
+import hashlib
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from core import deadline
+from core import outbound
+from core.outbound import INTERACTIVE, BACKGROUND
+
+PROD_BASE = "https://openapi.koreainvestment.com:9443"
+VTS_BASE = "https://openapivts.koreainvestment.com:29443"
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+MAX_CONNECTIONS = int(_env_num("KIS_HTTP_MAX_CONNECTIONS", 20))
+MAX_KEEPALIVE = int(_env_num("KIS_HTTP_MAX_KEEPALIVE", 10))
+KEEPALIVE_EXPIRY = _env_num("KIS_HTTP_KEEPALIVE_EXPIRY", 60.0)
+CONNECT_TIMEOUT = _env_num("KIS_HTTP_CONNECT_TIMEOUT", 3.0)
+READ_TIMEOUT = _env_num("KIS_HTTP_READ_TIMEOUT", 10.0)
+WRITE_TIMEOUT = _env_num("KIS_HTTP_WRITE_TIMEOUT", 5.0)
+POOL_TIMEOUT = _env_num("KIS_HTTP_POOL_TIMEOUT", 2.0)
+# KIS 공지 한도(실전 20건/초, 모의 2건/초)보다 약간 낮게
+RPS_PROD = _env_num("KIS_RPS_PROD", 18.0)
+RPS_VTS = _env_num("KIS_RPS_VTS", 2.0)
+RPS_BURST = int(_env_num("KIS_RPS_BURST", 1))
+THROTTLE_RETRIES = 2
+
+def base_url(is_paper: bool) -> str:
+    return VTS_BASE if is_paper else PROD_BASE
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+def _timeout(budget: Optional[float]) -> httpx.Timeout:
+    """budget(초)는 응답 대기(read) 상한. 다른 단계도 budget 을 넘지 않게 줄인다."""
+    read = READ_TIMEOUT if budget is None else budget
+    return httpx.Timeout(connect=min(CONNECT_TIMEOUT, read), read=read,
+                         write=min(WRITE_TIMEOUT, read), pool=min(POOL_TIMEOUT, read))
+
+def _origin(url: str) -> str:
+    u = urlsplit(url)
+    return f"{u.scheme}://{u.netloc}"
+
+def _appkey(kwargs: Dict[str, Any]) -> Optional[str]:
+    headers = kwargs.get("headers") or {}
+    body = kwargs.get("json") if isinstance(kwargs.get("json"), dict) else {}
+    return headers.get("appkey") or body.get("appkey")
+
+def limiter(app_key: str, origin: str) -> outbound.OutboundLimiter:
+    """appkey x 호스트별 송신 limiter. 이름에는 appkey 해시 앞부분만 남긴다."""
+    paper = origin == VTS_BASE
+    name = f"kis:{'vts' if paper else 'prod'}:{hashlib.sha256(app_key.encode('utf-8')).hexdigest()[:8]}"
+    return outbound.limiter(name, RPS_VTS if paper else RPS_PROD, RPS_BURST)
+
+def _throttled(r: httpx.Response) -> bool:
+    return r.status_code == 429 or (r.status_code >= 400 and b"EGW00201" in r.content)
+
+_lock = threading.Lock()
+_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_sync: Dict[str, httpx.Client] = {}
+
+def _async_client(origin: str) -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async.setdefault(loop, {})
+        client = per_loop.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(limits=_limits(), timeout=_timeout(None))
+            per_loop[origin] = client
+    return client
+
+def _sync_client(origin: str) -> httpx.Client:
+    with _lock:
+        client = _sync.get(origin)
+        if client is None:
+            client = httpx.Client(limits=_limits(), timeout=_timeout(None))
+            _sync[origin] = client
+    return client
+
+async def request(method: str, url: str, *, ctx: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None, priority: int = INTERACTIVE, **kwargs) -> httpx.Response:
+    """비동기 요청. ctx 에 마감이 있으면 남은 예산으로 timeout 을 줄이고, 이미 지났으면 ERR_TIMEOUT.
+    priority: INTERACTIVE(사용자 요청) / BACKGROUND(토큰 갱신 등) — limiter 대기열 순서."""
+    origin = _origin(url)
+    app_key = _appkey(kwargs)
+    lim = limiter(app_key, origin) if app_key else None
+    for attempt in range(THROTTLE_RETRIES + 1):
+        if lim is not None:
+            await lim.acquire(priority, ctx)
+        budget = deadline.timeout(ctx, timeout if timeout is not None else READ_TIMEOUT)
+        r = await _async_client(origin).request(method, url, timeout=_timeout(budget), **kwargs)
+        if lim is None or attempt == THROTTLE_RETRIES or not _throttled(r):
+            return r
+        lim.penalize()
+    return r
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+def request_sync(method: str, url: str, *, timeout: Optional[float] = None, priority: int = INTERACTIVE,
+                 **kwargs) -> httpx.Response:
+    origin = _origin(url)
+    app_key = _appkey(kwargs)
+    lim = limiter(app_key, origin) if app_key else None
+    for attempt in range(THROTTLE_RETRIES + 1):
+        if lim is not None:
+            lim.acquire_sync(priority)
+        r = _sync_client(origin).request(method, url, timeout=_timeout(timeout), **kwargs)
+        if lim is None or attempt == THROTTLE_RETRIES or not _throttled(r):
+            return r
+        lim.penalize()
+    return r
+
+def get_sync(url: str, **kwargs) -> httpx.Response:
+    return request_sync("GET", url, **kwargs)
+
+def post_sync(url: str, **kwargs) -> httpx.Response:
+    return request_sync("POST", url, **kwargs)
+
+def pools() -> Tuple[int, int]:
+    """(async 클라이언트 수, sync 클라이언트 수) — 진단용."""
+    with _lock:
+        return sum(len(v) for v in _async.values()), len(_sync)
+
+@atexit.register
+def _close_sync():
+    for client in list(_sync.values()):
+        client.close()
@@ -0,0 +1,223 @@
+# KIS 접근 토큰 관리자: (appkey, env, appkey+secret 해시) 별 메모리 보관 + 발급 single-flight + 만료 전 백그라운드 갱신
+#   - KIS 는 토큰 발급 횟수를 제한하므로 발급된 토큰은 만료 직전(REFRESH_AHEAD)까지 재사용한다
+#   - 디스크(core.diskcache, data/cache.db)는 재시작/다른 워커용 보조 저장소 — 메모리에 없을 때만 읽는다
+#   - 발급은 프로세스 전체에서 키당 1개만 진행(전용 루프 스레드에서 실행, 모든 이벤트 루프가 합류)
+#   - 키에 secret 해시를 포함 — appkey 만 같고 secret 이 다른 호출은 다른 호출자의 토큰을 받지 못한다
+#   - 디스크에는 암호문으로 저장하고, 디스크 조회는 이벤트 루프 밖(diskcache 전용 스레드)에서
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Dict, Optional, Tuple
+
+from core import deadline
+from core.diskcache import default_cache
+from core.errors import err_forbidden, err_timeout
+from . import _client
+
+log = logging.getLogger(__name__)
+
+TOKEN_NS = "kis.token"   # 디스크 캐시 네임스페이스
+REFRESH_AHEAD = float(os.getenv("KIS_TOKEN_REFRESH_AHEAD", "300"))  # 만료 N초 전부터 백그라운드 갱신
+MIN_VALID = 60.0          # 남은 수명이 이보다 짧은 토큰은 쓰지 않음
+RETRY_AFTER = 60.0        # 백그라운드 갱신 실패 후 재시도 간격(발급 제한 보호)
+MINT_TIMEOUT = 10.0
+
+def _env(is_paper: bool) -> str:
+    return "vts" if is_paper else "prod"
+
+def _cred(app_key: str, app_secret: str) -> str:
+    return hashlib.sha256((app_key + "\0" + app_secret).encode("utf-8")).hexdigest()
+
+def _key(app_key: str, app_secret: str, is_paper: bool) -> Tuple[str, str, str]:
+    return app_key, _env(is_paper), _cred(app_key, app_secret)
+
+def _disk_key(app_key: str, env: str, cred: str) -> str:
+    # appkey/secret 원문은 저장하지 않는다
+    return cred[:32] + ":" + env
+
+def _legacy(path: str, app_key: str) -> Optional[Dict[str, Any]]:
+    # 이전 버전이 남긴 data/kist_{uid}.json. 파일은 사용자별이라 appkey 를 바꾼 뒤에도 이전 appkey 의 토큰이
+    # 남아 있을 수 있다 — 발급한 appkey 가 기록되어 있고 지금 appkey 와 같을 때만 쓴다
+    # (appkey 가 없는 옛 형식은 건너뛰고 새로 발급, 사용자당 한 번)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            d = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(d, dict) or d.get("appkey") != app_key:
+        return None
+    return d
+
+class TokenManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[Tuple[str, str, str], Tuple[str, float]] = {}   # (appkey, env, cred) -> (token, exp)
+        self._minting: Dict[Tuple[str, str, str], concurrent.futures.Future] = {}
+        self._retry_at: Dict[Tuple[str, str, str], float] = {}
+        self._bg_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = self.disk_loads = self.mints = self.joined = self.refreshes = self.failures = 0
+
+    def peek(self, app_key: str, app_secret: str, is_paper: bool) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            return self._tokens.get(_key(app_key, app_secret, is_paper))
+
+    async def get(self, app_key: str, app_secret: str, is_paper: bool, ctx: Optional[Dict[str, Any]] = None,
+                  legacy_file: Optional[str] = None) -> Tuple[str, str]:
+        """(token, source) — source: memory | disk | network. 발급 거부는 ERR_FORBIDDEN."""
+        key = _key(app_key, app_secret, is_paper)
+        now = time.time()
+        with self._lock:
+            ent = self._tokens.get(key)
+        if ent is not None and ent[1] > now + MIN_VALID:
+            with self._lock:
+                self.hits += 1
+            if ent[1] <= now + REFRESH_AHEAD:
+                self._refresh_ahead(key, app_secret, ent)
+            return ent[0], "memory"
+        ent = await self._load(key, legacy_file)
+        if ent is not None:
+            return ent[0], "disk"
+        token, _ = await self._mint(key, app_secret, ctx)
+        return token, "network"
+
+    def get_sync(self, app_key: str, app_secret: str, is_paper: bool,
+                 timeout: float = MINT_TIMEOUT) -> Tuple[str, str]:
+        """동기 코드(진단 라우터 등)용 get. 전용 루프 스레드에서 실행 — 이벤트 루프 스레드에서 부르지 말 것."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("TokenManager.get_sync called from an event loop; use await get()")
+        loop = self._loop()
+        ctx = {"deadline": time.time() + timeout}
+        return asyncio.run_coroutine_threadsafe(self.get(app_key, app_secret, is_paper, ctx), loop).result(timeout + 1)
+
+    async def _load(self, key: Tuple[str, str, str], legacy_file: Optional[str]) -> Optional[Tuple[str, float]]:
+        found = await default_cache().aget(TOKEN_NS, _disk_key(*key))
+        d = found[0] if found else None
+        if d is None and legacy_file:
+            d = _legacy(legacy_file, key[0])
+        if not d or not d.get("access_token") or d.get("exp", 0) <= time.time() + MIN_VALID:
+            return None
+        ent = (d["access_token"], float(d["exp"]))
+        with self._lock:
+            cur = self._tokens.get(key)
+            if cur is not None and cur[1] >= ent[1]:
+                return cur
+            self._tokens[key] = ent
+            self.disk_loads += 1
+        return ent
+
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        # executor 스레드 루프는 호출 중에만 돌기 때문에 발급/갱신은 전용 루프 스레드에서 실행
+        with self._lock:
+            if self._bg_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="kis-token", daemon=True).start()
+                self._bg_loop = loop
+            return self._bg_loop
+
+    def _start_mint(self, key: Tuple[str, str, str], app_secret: str,
+                    priority: int = _client.INTERACTIVE) -> Tuple[concurrent.futures.Future, bool]:
+        with self._lock:
+            fut = self._minting.get(key)
+            if fut is not None:
+                self.joined += 1
+                return fut, False
+        loop = self._loop()
+        with self._lock:
+            fut = self._minting.get(key)
+            if fut is not None:
+                self.joined += 1
+                return fut, False
+            fut = asyncio.run_coroutine_threadsafe(self._issue(key, app_secret, priority), loop)
+            self._minting[key] = fut
+        fut.add_done_callback(lambda f: self._settle(key, f))
+        return fut, True
+
+    def _settle(self, key: Tuple[str, str, str], fut: concurrent.futures.Future):
+        with self._lock:
+            if self._minting.get(key) is fut:
+                del self._minting[key]
+            if fut.cancelled() or fut.exception() is not None:
+                self.failures += 1
+
+    async def _mint(self, key: Tuple[str, str, str], app_secret: str, ctx: Optional[Dict[str, Any]]) -> Tuple[str, float]:
+        # 진행 중인 발급이 있으면 합류. 호출자가 먼저 포기(마감/취소)해도 발급은 끝까지 진행되어 다음 호출이 쓴다
+        fut, _ = self._start_mint(key, app_secret)
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), deadline.timeout(ctx, MINT_TIMEOUT))
+        except asyncio.TimeoutError:
+            raise err_timeout("KIS token request timed out", {"stage": "token"}) from None
+
+    async def _issue(self, key: Tuple[str, str, str], app_secret: str, priority: int) -> Tuple[str, float]:
+        app_key, env, _ = key
+        if priority == _client.BACKGROUND:
+            # 다른 워커가 이미 갱신해 디스크에 둔 토큰이 있으면 그것을 쓴다
+            with self._lock:
+                cur = self._tokens.get(key)
+            found = await default_cache().aget(TOKEN_NS, _disk_key(*key))
+            if found and cur is not None and found[0].get("exp", 0) > cur[1]:
+                ent = (found[0]["access_token"], float(found[0]["exp"]))
+                with self._lock:
+                    self._tokens[key] = ent
+                return ent
+        url = _client.base_url(env == "vts") + ("/oauth2/token" if env == "vts" else "/oauth2/tokenP")
+        body = {"grant_type": "client_credentials", "appkey": app_key, "appsecret": app_secret}
+        r = await _client.post(url, json=body, timeout=MINT_TIMEOUT, priority=priority)
+        j = r.json()
+        if "access_token" not in j:
+            raise err_forbidden("KIS token request rejected", {"status": r.status_code, "response": j})
+        ttl = float(j.get("expires_in", 3600))
+        ent = (j["access_token"], time.time() + ttl)
+        with self._lock:
+            self._tokens[key] = ent
+            self._retry_at.pop(key, None)
+            self.mints += 1
+        # 디스크 저장은 보조 — 실패해도 토큰은 유효(DiskCache 는 오류를 삼킨다)
+        await default_cache().aput(TOKEN_NS, _disk_key(*key), {"access_token": ent[0], "exp": ent[1]}, ttl,
+                                   encrypt=True)
+        return ent
+
+    def _refresh_ahead(self, key: Tuple[str, str, str], app_secret: str, ent: Tuple[str, float]):
+        now = time.time()
+        with self._lock:
+            if key in self._minting or self._retry_at.get(key, 0) > now:
+                return
+            self._retry_at[key] = now + RETRY_AFTER  # 실패해도 RETRY_AFTER 동안은 다시 시도하지 않음(발급 제한 보호)
+        fut, started = self._start_mint(key, app_secret, _client.BACKGROUND)
+        if started:
+            with self._lock:
+                self.refreshes += 1
+            fut.add_done_callback(self._log_refresh)
+
+    @staticmethod
+    def _log_refresh(fut: concurrent.futures.Future):
+        if not fut.cancelled() and fut.exception() is not None:
+            log.warning("KIS token refresh failed (%s); keeping current token until exp", fut.exception())
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._retry_at.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tokens": len(self._tokens),
+                "minting": len(self._minting),
+                "hits": self.hits,
+                "disk_loads": self.disk_loads,
+                "mints": self.mints,
+                "joined": self.joined,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+            }
+
+TOKENS = TokenManager()
@@ -1,7 +1,13 @@
-from typing import Dict, Any, List
-import os, json, time, requests
-from core import secret_store
-from ..auth.handler import _conf, _load_cached, _save_cached
+from typing import Dict, Any, List, Optional
+import os, time, asyncio
+from core import secret_store, deadline
+from core.errors import FrameworkError, err_secret
+from .. import _balance, _client
+from .._token import TOKENS
+from ..._positions import Positions
+from ..auth.handler import _conf
+
+PER_APPKEY_CONCURRENCY = int(os.getenv("KIS_PER_APPKEY_CONCURRENCY", "4"))
 
 def _mock(uid: str) -> Dict[str, Any]:
     return {
@@ -15,80 +21,163 @@ def _mock(uid: str) -> Dict[str, Any]:
         ]
     }
 
-def _token(uid: str):
-    app_key = secret_store.get_user_secret(uid, "KIS_APP_KEY")
-    app_secret = secret_store.get_user_secret(uid, "KIS_APP_SECRET")
-    is_paper = (secret_store.get_user_secret(uid, "KIS_IS_PAPER") or "1") == "1"
-    base = "https://openapivts.koreainvestment.com:29443" if is_paper else "https://openapi.koreainvestment.com:9443"
-    _, _, _, _, token_file = _conf(uid)
-    tok = _load_cached(token_file)
-    return tok, app_key, app_secret, base, is_paper
+def _creds(uid: str, item: Optional[Dict[str, Any]] = None):
+    """(app_key, app_secret, is_paper, token_file, acc, prd, cust) 또는 자격 증명이 없으면 None. 비밀 저장소(SQLite)를 읽는 블로킹 호출.
+    item(BULK 입력)의 account_no/product_code/custtype/app_key/app_secret/is_paper 가 저장된 값보다 우선.
+    item 의 app_key 는 app_secret 과 함께일 때만 쓴다. 토큰 캐시는 (appkey, secret) 으로 찾으므로
+    다른 사람의 appkey 만으로는 그 사람의 토큰(=계좌 조회 권한)을 얻을 수 없다."""
+    item = item or {}
+    app_key, app_secret, is_paper, _, token_file = _conf(uid)
+    if item.get("app_key"):
+        app_key, app_secret, token_file = item["app_key"], item.get("app_secret"), None
+    if "is_paper" in item:
+        is_paper = bool(item["is_paper"])
+    s = secret_store.get_user_secrets(uid, ("KIS_ACCOUNT_NO", "KIS_PRODUCT_CODE", "KIS_CUSTTYPE"))
+    acc = item.get("account_no") or s["KIS_ACCOUNT_NO"]
+    prd = item.get("product_code") or s["KIS_PRODUCT_CODE"] or "01"
+    cust = item.get("custtype") or s["KIS_CUSTTYPE"] or "P"
+    if not app_key or not app_secret or not acc:
+        return None
+    return app_key, app_secret, is_paper, token_file, acc, prd, cust
+
+async def _inline(fn, *args):
+    return fn(*args)
+
+async def _source(uid: str, ctx=None, item: Optional[Dict[str, Any]] = None, offload=None):
+    """잔고 조회 인자(_balance.pages 용) 또는 자격 증명이 없으면 None.
+    offload 를 주면 비밀 저장소 조회를 그쪽(매니페스트 executor)에서 실행."""
+    c = await (offload or _inline)(_creds, uid, item)
+    if c is None:
+        return None
+    app_key, app_secret, is_paper, token_file, acc, prd, cust = c
+    tok, _ = await TOKENS.get(app_key, app_secret, is_paper, ctx, legacy_file=token_file)
+    return acc, (_client.base_url(is_paper), tok, app_key, app_secret, acc, prd, cust, is_paper)
+
+def _explicit(item: Optional[Dict[str, Any]]) -> bool:
+    # 계좌/키를 직접 지정한 입력은 mock 으로 대체하지 않고 오류를 돌려준다
+    return bool(item and (item.get("account_no") or item.get("app_key")))
+
+async def _summary(uid: str, ctx=None, item: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    explicit = _explicit(item)
+    try:
+        src = await _source(uid, ctx, item)
+    except Exception:
+        if explicit:
+            raise
+        src = None  # 토큰 발급 실패/시간 초과 -> mock
+    if src is None:
+        if explicit:
+            raise err_secret("KIS app key/secret/account not set")
+        # no credentials -> mock
+        return _mock(uid)
+    acc, args = src
+    # KIS balance (best-effort; fallback to mock on failure). 연속조회로 전체 보유 종목을 합친다
+    http_timeout = deadline.timeout(ctx, 10)  # 남은 요청 예산만큼만 대기(만료 시 ERR_TIMEOUT)
+    try:
+        data = await _balance.summary(*args, ctx=ctx, timeout=http_timeout)
+    except Exception:
+        if explicit:
+            raise
+        return _mock(uid)
+    return {"account_no": acc, **data}
+
+def _error(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, FrameworkError):
+        return {"code": e.code, "message": e.message}
+    return {"code": "ERR_INTERNAL", "message": str(e)}
+
+def _portfolio(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # 성공한 계좌 합계 + 종목별 수량/평가/손익/비중(컬럼형 엔진으로 합산), 계좌별 비중
+    ok = [r for r in results if r.get("ok")]
+    book = Positions.concat(Positions.from_rows(r["data"]["positions"]) for r in ok)
+    eval_amount = sum(r["data"]["eval_amount"] for r in ok)
+    return {"accounts": len(results), "ok_accounts": len(ok),
+            "cash": sum(r["data"]["cash"] for r in ok), "eval_amount": eval_amount,
+            "pnl": sum(r["data"]["pnl"] for r in ok), "positions": book.by_symbol(),
+            "by_account": [{"index": r["index"], "account_no": r["data"]["account_no"],
+                            "eval_amount": r["data"]["eval_amount"],
+                            "weight": r["data"]["eval_amount"] / eval_amount if eval_amount else 0.0} for r in ok]}
+
+async def _bulk(uid: str, envelope: Dict[str, Any], ctx=None) -> Dict[str, Any]:
+    """계좌 목록을 동시에 조회. 같은 appkey 끼리는 options.parallelism(기본 PER_APPKEY_CONCURRENCY)개까지만 동시에."""
+    inputs = envelope.get("inputs") or []
+    cap = max(1, int((envelope.get("options") or {}).get("parallelism") or PER_APPKEY_CONCURRENCY))
+    sems: Dict[str, asyncio.Semaphore] = {}
+
+    async def one(idx: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        sem = sems.setdefault(item.get("app_key") or "", asyncio.Semaphore(cap))  # "" = 저장된 appkey
+        t0 = time.perf_counter()
+        async with sem:
+            try:
+                data = await _summary(uid, ctx, item)
+            except Exception as e:
+                return {"ok": False, "index": idx, "error": _error(e),
+                        "metrics": {"ms": round((time.perf_counter() - t0) * 1000, 1)}}
+        return {"ok": True, "index": idx, "data": data, "metrics": {"ms": round((time.perf_counter() - t0) * 1000, 1)}}
+
+    results = list(await asyncio.gather(*(one(i, it) for i, it in enumerate(inputs))))
+    ok_count = sum(1 for r in results if r["ok"])
+    return {"ok": ok_count == len(results), "mode": "BULK", "results": results,
+            "partial_ok": 0 < ok_count < len(results), "data": _portfolio(results)}
 
 async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
     uid = (ctx or {}).get("user_id")
+    mode = envelope.get("mode", "SINGLE")
     if not uid:
-        return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_FORBIDDEN","message":"no token"}}
+        return {"ok": False, "mode": mode, "error":{"code":"ERR_FORBIDDEN","message":"no token"}}
     act = envelope.get("action")
     if act != "SUMMARY":
-        return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_SCHEMA","message":"unsupported action"}}
-
-    acc = secret_store.get_user_secret(uid, "KIS_ACCOUNT_NO")
-    prd = secret_store.get_user_secret(uid, "KIS_PRODUCT_CODE") or "01"
-    cust = secret_store.get_user_secret(uid, "KIS_CUSTTYPE") or "P"
-
-    tok, app_key, app_secret, base, is_paper = _token(uid)
-    if not tok or not app_key or not app_secret or not acc:
-        # no credentials -> mock
-        return {"ok": True, "mode":"SINGLE", "data": _mock(uid)}
-
-    # KIS balance (best-effort; fallback to mock on failure)
+        return {"ok": False, "mode": mode, "error":{"code":"ERR_SCHEMA","message":"unsupported action"}}
+    if mode == "BULK":
+        return await _bulk(uid, envelope, ctx)
     try:
-        # Domestic balance; TR IDs differ by env
-        tr_id = "VTTC8434R" if is_paper else "TTTC8434R"
-        url = base + "/uapi/domestic-stock/v1/trading/inquire-balance"
-        headers = {
-            "authorization": f"Bearer {tok}",
-            "appkey": app_key,
-            "appsecret": app_secret,
-            "tr_id": tr_id,
-            "custtype": cust
-        }
-        params = {
-            "CANO": acc[:8],
-            "ACNT_PRDT_CD": prd,
-            "AFHR_FLPR_YN": "N",
-            "OFL_YN": "N",
-            "INQR_DVSN": "02",
-            "UNPR_DVSN": "01",
-            "FUND_STTL_ICLD_YN": "N",
-            "FNCG_AMT_AUTO_ICLD_YN": "N",
-            "PRCS_DVSN": "01",
-            "CTX_AREA_FK100": "",
-            "CTX_AREA_NK100": ""
-        }
-        r = requests.get(url, headers=headers, params=params, timeout=10)
-        j = r.json()
-        # Extremely simplified mapping; schema varies by account
-        # If no data, fallback to mock
-        if "output1" not in j and "output2" not in j:
-            return {"ok": True, "mode":"SINGLE", "data": _mock(uid)}
-        cash = int(j.get("output1", [{}])[0].get("dnca_tot_amt", "0")) if isinstance(j.get("output1"), list) else int(j.get("output1", {}).get("dnca_tot_amt","0"))
-        positions = []
-        for it in j.get("output2", []) or []:
-            try:
-                positions.append({
-                    "symbol": it.get("pdno"),
-                    "qty": int(it.get("hldg_qty","0")),
-                    "avg_price": float(it.get("pchs_avg_pric","0")),
-                    "eval_price": float(it.get("prpr","0")),
-                    "pnl": int(float(it.get("evlu_pfls_amt","0")))
-                })
-            except Exception:
+        data = await _summary(uid, ctx, envelope.get("input"))
+    except Exception as e:
+        return {"ok": False, "mode": "SINGLE", "error": _error(e)}
+    return {"ok": True, "mode":"SINGLE", "data": data}
+
+async def stream(envelope: Dict[str, Any], ctx=None, env=None, offload=None):
+    # 스트리밍 SUMMARY: 페이지가 도착하는 대로 {"index", "partial": true, "data": {"page", "positions"}} 를 보내고
+    # 계좌별 마지막 레코드(ResultItem)에는 합계만 담는다(positions 는 이미 보냈으므로 빈 배열, pages 에 페이지 수)
+    # 이벤트 루프에서 돌므로 비밀 저장소 조회(_creds, _mock)는 offload(매니페스트 executor)로
+    uid = (ctx or {}).get("user_id")
+    offload = offload or _inline
+    for idx, item in enumerate(envelope.get("inputs") or []):
+        if not uid:
+            yield {"ok": False, "index": idx, "error": {"code": "ERR_FORBIDDEN", "message": "no token"}}
+            continue
+        explicit = _explicit(item)
+        try:
+            src = await _source(uid, ctx, item, offload)
+        except Exception as e:
+            if explicit:
+                yield {"ok": False, "index": idx, "error": _error(e)}
                 continue
-        eval_amount = sum(int(p["qty"]*p["eval_price"]) for p in positions) + cash
-        pnl = sum(int(p["pnl"]) for p in positions)
-        return {"ok": True, "mode":"SINGLE", "data":{
-            "account_no": acc, "cash": cash, "eval_amount": eval_amount, "pnl": pnl, "positions": positions
-        }}
-    except Exception:
-        return {"ok": True, "mode":"SINGLE", "data": _mock(uid)}
+            src = None
+        if src is None:
+            if explicit:
+                yield {"ok": False, "index": idx, "error": {"code": "ERR_SECRET", "message": "KIS app key/secret/account not set"}}
+            else:
+                yield {"ok": True, "index": idx, "data": await offload(_mock, uid)}
+            continue
+        acc, args = src
+        cash = eval_amount = pnl = n = 0
+        try:
+            async for page in _balance.pages(*args, ctx=ctx, timeout=deadline.timeout(ctx, 10)):
+                book = page["book"]
+                cash = page["cash"]
+                eval_amount += book.eval_amount()
+                pnl += book.pnl_amount()
+                n += 1
+                yield {"index": idx, "partial": True, "data": {"page": page["page"], "positions": book.to_rows()}}
+        except FrameworkError as e:
+            yield {"ok": False, "index": idx, "error": _error(e)}
+            continue
+        except Exception as e:
+            if n == 0 and not explicit:  # 첫 페이지 실패는 SUMMARY 와 같이 mock 으로 대체
+                yield {"ok": True, "index": idx, "data": await offload(_mock, uid)}
+            else:
+                yield {"ok": False, "index": idx, "error": {"code": "ERR_INTERNAL", "message": str(e)}}
+            continue
+        yield {"ok": True, "index": idx, "data": {"account_no": acc, "cash": cash, "eval_amount": eval_amount + cash,
+                                                  "pnl": pnl, "positions": [], "pages": n}}
@@ -28,3 +28,8 @@ async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
         }
     else:
         return {"ok": False, "mode": mode, "error": {"code":"ERR_UNSUPPORTED_MODE","message":"unsupported"}}
+
+async def stream(envelope: Dict[str, Any], ctx=None, env=None, offload=None):
+    # BULK 결과를 항목 단위로 내보냄(/run 스트리밍 응답, Registry.run_stream)
+    for idx, item in enumerate(envelope.get("inputs", [])):
+        yield {"ok": True, "data": {"echo": item.get("echo", "")}, "index": idx}
@@ -0,0 +1,86 @@
+# 온라인 backfill: 큰 테이블의 데이터 정리/변환을 짧은 트랜잭션 여러 개로
+#   - rowid 키셋 페이지(rowid > last_key ORDER BY rowid LIMIT n) — OFFSET 없이 항상 인덱스 탐색
+#   - 청크 하나 = BEGIN IMMEDIATE ~ COMMIT 한 번. 변경과 체크포인트(last_key)를 같은 트랜잭션에 기록
+#     → 중간에 죽어도 마지막 커밋된 청크 다음부터 이어서 실행, 같은 job 을 동시에 돌려도 청크가 겹치지 않음
+#   - rows_per_sec 로 속도 제한: 청크 사이에 쉬면서 쓰기 잠금을 로그인 요청에 양보
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TABLE = """CREATE TABLE IF NOT EXISTS backfill_jobs(
+    name TEXT PRIMARY KEY, last_key INTEGER NOT NULL DEFAULT 0, scanned INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL,
+    started_at INTEGER, updated_at INTEGER, finished_at INTEGER)"""
+
+class Job:
+    def __init__(self, table: str, sql: str, params: Optional[Callable[[], Tuple[Any, ...]]] = None):
+        self.table = table
+        self.sql = sql          # "rowid>? AND rowid<=?" 범위에 적용할 UPDATE/DELETE (뒤에 params() 값)
+        self.params = params
+
+JOBS: Dict[str, Job] = {
+    # 대소문자가 섞여 저장된 이메일 정리. 정규화하면 다른 계정과 겹치는 행은 건드리지 않는다(OR IGNORE)
+    "users.email_lower": Job("users", "UPDATE OR IGNORE users SET email=lower(trim(email)) "
+                                      "WHERE rowid>? AND rowid<=? AND email<>lower(trim(email))"),
+    "refresh_tokens.purge_expired": Job("refresh_tokens", "DELETE FROM refresh_tokens "
+                                                          "WHERE rowid>? AND rowid<=? AND expires_at<?",
+                                        params=lambda: (int(time.time()),)),
+    "reset_tokens.purge_expired": Job("reset_tokens", "DELETE FROM reset_tokens "
+                                                      "WHERE rowid>? AND rowid<=? AND expires_at<?",
+                                      params=lambda: (int(time.time()),)),
+}
+
+def row(c, name: str) -> Optional[Dict[str, Any]]:
+    cur = c.execute("SELECT * FROM backfill_jobs WHERE name=?", (name,))
+    r = cur.fetchone()
+    return dict(zip([d[0] for d in cur.description], r)) if r else None
+
+def progress(rec: Dict[str, Any]) -> Dict[str, Any]:
+    total = rec["total"] or 0
+    pct = 100.0 if rec["status"] == "done" else (round(min(rec["scanned"] / total, 1.0) * 100, 1) if total else 0.0)
+    return {**rec, "pct": pct}
+
+def status(c) -> List[Dict[str, Any]]:
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='backfill_jobs'").fetchone() is None:
+        return []  # 읽기 전용(CHECK) — 한 번도 BACKFILL 하지 않은 DB
+    cur = c.execute("SELECT * FROM backfill_jobs ORDER BY name")
+    cols = [d[0] for d in cur.description]
+    return [progress(dict(zip(cols, r))) for r in cur.fetchall()]
+
+def start(c, name: str, reset: bool = False) -> Dict[str, Any]:
+    """체크포인트 준비. 이미 있으면 이어서(reset=True 면 처음부터)."""
+    c.execute(_TABLE)
+    rec = row(c, name)
+    if rec is None or reset:
+        now = int(time.time())
+        total = c.execute(f"SELECT count(*) FROM {JOBS[name].table}").fetchone()[0]
+        c.execute("INSERT OR REPLACE INTO backfill_jobs(name, last_key, scanned, changed, total, status, started_at, "
+                  "updated_at, finished_at) VALUES(?,0,0,0,?,'running',?,?,NULL)", (name, total, now, now))
+        rec = row(c, name)
+    return rec
+
+def chunk(c, name: str, size: int) -> Tuple[int, int, bool]:
+    """청크 하나 처리 -> (읽은 행, 바뀐 행, 끝났는지)."""
+    job = JOBS[name]
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        rec = row(c, name)  # 다른 실행이 앞서 갔을 수 있으니 트랜잭션 안에서 다시 읽는다
+        if rec["status"] == "done":
+            c.execute("COMMIT")
+            return 0, 0, True
+        lo = rec["last_key"]
+        n, hi = c.execute(f"SELECT count(*), max(rowid) FROM (SELECT rowid FROM {job.table} "
+                          f"WHERE rowid>? ORDER BY rowid LIMIT ?)", (lo, size)).fetchone()
+        now = int(time.time())
+        if not n:
+            c.execute("UPDATE backfill_jobs SET status='done', updated_at=?, finished_at=? WHERE name=?",
+                      (now, now, name))
+            c.execute("COMMIT")
+            return 0, 0, True
+        changed = c.execute(job.sql, (lo, hi) + (job.params() if job.params else ())).rowcount
+        c.execute("UPDATE backfill_jobs SET last_key=?, scanned=scanned+?, changed=changed+?, updated_at=? "
+                  "WHERE name=?", (hi, n, changed, now, name))
+        c.execute("COMMIT")
+        return n, changed, False
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
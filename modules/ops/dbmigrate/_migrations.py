@@ -0,0 +1,128 @@
+# auth DB 버전 마이그레이션
+#   - 단계(Step)는 version 오름차순으로 한 번씩 적용, schema_migrations 에 (version, name, checksum) 기록
+#   - 단계마다 한 트랜잭션(BEGIN IMMEDIATE) — 여러 워커가 동시에 MIGRATE 해도 한 번만 적용
+#   - 이미 적용된 단계의 SQL 이 바뀌면(checksum 불일치) drift 로 보고하고 더 진행하지 않는다
+#     → 적용된 단계는 고치지 말고 새 단계를 추가할 것
+import hashlib, sqlite3, time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations(
+    version INTEGER PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, applied_at INTEGER NOT NULL)"""
+
+def _has_column(c: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(str(r[1]).lower() == column.lower() for r in c.execute(f"PRAGMA table_info({table})"))
+
+class Step:
+    def __init__(self, version: int, name: str, sql: Sequence[str],
+                 skip_if: Optional[Callable[[sqlite3.Connection], bool]] = None):
+        self.version = version
+        self.name = name
+        self.sql = tuple(sql)
+        self.skip_if = skip_if  # 이전 방식(_store.init 등)으로 이미 반영된 DB 면 SQL 없이 기록만
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256("\n".join((self.name,) + self.sql).encode("utf-8")).hexdigest()[:16]
+
+STEPS: List[Step] = [
+    Step(1, "users.role", ["ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user'"],
+         skip_if=lambda c: _has_column(c, "users", "role")),
+    # 로그인/재설정: WHERE lower(email)=? — email UNIQUE 인덱스는 lower() 조회에 쓰이지 않음
+    Step(2, "users.email_lower index", ["CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email))"]),
+    Step(3, "refresh_tokens indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens(expires_at)",
+    ]),
+    # consume_reset: WHERE email=? AND code_hash=? ORDER BY created_at DESC LIMIT 1
+    Step(4, "reset_tokens indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_reset_tokens_email ON reset_tokens(email, code_hash, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON reset_tokens(expires_at)",
+    ]),
+    Step(5, "analyze", ["ANALYZE"]),
+]
+
+# CHECK 에서 실행 계획을 보는 조회 — modules/auth/_store.py 가 실제로 실행하는 SQL 만(바꾸면 여기도 같이)
+HOT_QUERIES: Dict[str, str] = {
+    "user_by_email": "SELECT * FROM users WHERE lower(email)=?",            # 로그인/가입/재설정
+    "user_by_id": "SELECT * FROM users WHERE id=?",
+    # exchange_refresh: 3.35+ 는 DELETE ... RETURNING, 그 전 버전은 SELECT 후 DELETE
+    "refresh_exchange": ("DELETE FROM refresh_tokens WHERE token=? RETURNING user_id, expires_at"
+                         if sqlite3.sqlite_version_info >= (3, 35, 0)
+                         else "SELECT user_id, expires_at FROM refresh_tokens WHERE token=?"),
+    "refresh_revoke": "DELETE FROM refresh_tokens WHERE token=?",
+    "reset_by_email": "SELECT token,expires_at FROM reset_tokens WHERE email=? AND code_hash=? "
+                      "ORDER BY created_at DESC LIMIT 1",
+    "reset_consume": "DELETE FROM reset_tokens WHERE token=?",
+}
+
+def connect(path: str) -> sqlite3.Connection:
+    c = sqlite3.connect(path, timeout=30, isolation_level=None)
+    c.execute("PRAGMA busy_timeout=30000")
+    c.execute(_TABLE)
+    return c
+
+def connect_readonly(path: str) -> sqlite3.Connection:
+    """CHECK 용 — 파일을 만들거나 쓰지 않는다(없으면 sqlite3.OperationalError)."""
+    c = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5, isolation_level=None)
+    c.execute("PRAGMA query_only=ON")
+    return c
+
+def has_table(c: sqlite3.Connection, name: str) -> bool:
+    return c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+def applied(c: sqlite3.Connection) -> Dict[int, Dict[str, Any]]:
+    if not has_table(c, "schema_migrations"):
+        return {}  # 읽기 전용 연결 + 아직 MIGRATE 한 적 없는 DB
+    return {r[0]: {"version": r[0], "name": r[1], "checksum": r[2], "applied_at": r[3]}
+            for r in c.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")}
+
+def status(c: sqlite3.Connection, steps: Sequence[Step] = STEPS) -> Dict[str, Any]:
+    return status_of(applied(c), steps)
+
+def status_of(done: Dict[int, Dict[str, Any]], steps: Sequence[Step] = STEPS) -> Dict[str, Any]:
+    drift = [{"version": s.version, "name": s.name, "expected": s.checksum, "recorded": done[s.version]["checksum"]}
+             for s in steps if s.version in done and done[s.version]["checksum"] != s.checksum]
+    return {"version": max(done, default=0), "latest": max((s.version for s in steps), default=0),
+            "pending": [{"version": s.version, "name": s.name} for s in steps if s.version not in done],
+            "drift": drift}
+
+def migrate(path: str, steps: Sequence[Step] = STEPS) -> Dict[str, Any]:
+    """아직 적용되지 않은 단계를 순서대로 적용. drift 가 있으면 아무것도 하지 않는다."""
+    c = connect(path)
+    try:
+        st = status(c, steps)
+        if st["drift"]:
+            return {**st, "applied": [], "skipped": []}
+        done, skipped = [], []
+        for s in sorted(steps, key=lambda s: s.version):
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                if c.execute("SELECT 1 FROM schema_migrations WHERE version=?", (s.version,)).fetchone():
+                    c.execute("COMMIT")  # 다른 워커가 먼저 적용
+                    continue
+                t0 = time.perf_counter()
+                if s.skip_if is not None and s.skip_if(c):
+                    skipped.append(s.name)
+                else:
+                    for sql in s.sql:
+                        c.execute(sql)
+                c.execute("INSERT INTO schema_migrations(version, name, checksum, applied_at) VALUES(?,?,?,?)",
+                          (s.version, s.name, s.checksum, int(time.time())))
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+            done.append({"version": s.version, "name": s.name, "ms": round((time.perf_counter() - t0) * 1e3, 1)})
+        return {**status(c, steps), "applied": done, "skipped": skipped}
+    finally:
+        c.close()
+
+def explain(c: sqlite3.Connection, queries: Dict[str, str] = HOT_QUERIES) -> List[Dict[str, Any]]:
+    """조회별 EXPLAIN QUERY PLAN. 인덱스 없이 테이블 전체를 읽으면 full_scan."""
+    out = []
+    for name, sql in queries.items():
+        plan = [str(r[3]) for r in c.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))]
+        # "SCAN users" = 전체 스캔, "SCAN t USING INDEX ..." / "SEARCH ..." 는 인덱스 사용
+        full = [p for p in plan if p.startswith("SCAN ") and " USING " not in p]
+        out.append({"name": name, "plan": plan, "full_scan": bool(full)})
+    return out
@@ -1,46 +1,114 @@
 from typing import Dict, Any
-import sqlite3, os
+import sqlite3, os, time, asyncio
+from contextlib import closing
+from core import deadline, secret_store
+from core.executor import get_executor
+from core.errors import err_forbidden, err_internal
 from modules.auth import _store
+from . import _backfill, _migrations
+
+ADMIN_SCOPE = "ops:admin"
 
 def _db_path():
     return _store.DB_PATH
 
-def _has_column(cur, table, col):
-    rows = cur.execute(f"PRAGMA table_info({table})").fetchall()
-    for r in rows:
-        if str(r[1]).lower() == col.lower():
-            return True
-    return False
+def _require_admin(ctx) -> None:
+    # 매니페스트 required_scopes 는 /run(Pipeline)에서 검사 — Registry 를 직접 부르는 경로도 막는다
+    scopes = (ctx or {}).get("scopes") or []
+    if ADMIN_SCOPE not in scopes:
+        raise err_forbidden("Missing required scopes", {"required": [ADMIN_SCOPE], "provided": list(scopes)})
 
 def _migrate() -> Dict[str, Any]:
     _store.init()  # ensure tables
-    changed = []
-    with sqlite3.connect(_db_path()) as c:
-        cur = c.cursor()
-        # role column
-        if not _has_column(cur, "users", "role"):
-            cur.execute("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user'")
-            changed.append("users.role += TEXT DEFAULT 'user'")
-        # normalize hint only (no destructive update)
-        c.commit()
-    return {"changed": changed, "db_path": _db_path()}
+    details = _migrations.migrate(_db_path())
+    if details["drift"]:
+        raise err_internal("applied migration changed (checksum mismatch)", {"drift": details["drift"]})
+    return {**details, "db_path": _db_path()}
 
 def _check() -> Dict[str, Any]:
-    with sqlite3.connect(_db_path()) as c:
+    # 읽기 전용 — CHECK 는 auth.db 를 만들거나 고치지 않는다
+    path = _db_path()
+    if not os.path.exists(path):
+        return {"tables": [], "columns": {}, "indexes": [], **_migrations.status_of({}), "plans": [],
+                "full_scans": [], "backfill": [], "db_path": path, "exists": False}
+    c = _migrations.connect_readonly(path)
+    try:
         cur = c.cursor()
         tbls = [r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()]
         cols = {}
         for t in tbls:
             info = cur.execute(f"PRAGMA table_info({t})").fetchall()
             cols[t] = [str(r[1]) for r in info]
-        return {"tables": tbls, "columns": cols, "db_path": _db_path()}
+        indexes = [r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='index' AND sql IS NOT NULL")]
+        plans = _migrations.explain(c) if {"users", "refresh_tokens", "reset_tokens"} <= set(tbls) else []
+        return {"tables": tbls, "columns": cols, "indexes": indexes, **_migrations.status(c),
+                "plans": plans, "full_scans": [p["name"] for p in plans if p["full_scan"]],
+                "backfill": _backfill.status(c), "db_path": path, "exists": True}
+    finally:
+        c.close()
+
+# BACKFILL/COMPACT_SECRETS 가 함께 쓰는 1스레드 풀(매니페스트 COMPACT_SECRETS 와 같은 이름)
+_MAINTENANCE = {"executor": "thread", "pool": "ops-maintenance", "pool_size": 1}
+
+def _start_job(path: str, name: str, reset: bool) -> Dict[str, Any]:
+    _store.init()  # ensure tables
+    with closing(_migrations.connect(path)) as c:
+        return _backfill.start(c, name, reset=reset)
+
+def _chunk(path: str, name: str, size: int):
+    with closing(_migrations.connect(path)) as c:
+        return _backfill.chunk(c, name, size)
+
+def _job(path: str, name: str) -> Dict[str, Any]:
+    with closing(_migrations.connect(path)) as c:
+        return _backfill.progress(_backfill.row(c, name))
+
+async def _run_backfill(body: Dict[str, Any], ctx=None) -> Dict[str, Any]:
+    """max_seconds(와 요청 마감) 안에서 청크를 반복. 끝나지 않았으면 다시 호출하면 이어서 진행.
+    SQLite 작업(잠금 대기 포함)은 전용 스레드에서, 이벤트 루프에서는 청크 사이의 쉬는 시간만 기다린다."""
+    name = body["job"]
+    size = int(body.get("chunk_size", 500))
+    rps = float(body.get("rows_per_sec", 2000))
+    budget = float(body.get("max_seconds", 30))
+    rem = deadline.remaining(ctx)
+    if rem is not None:
+        budget = min(budget, rem - 1.0)  # 마지막 청크 커밋 + 응답 여유
+    pool = get_executor(_MAINTENANCE, "modules.ops.dbmigrate")
+    path = _db_path()
+    t0 = time.monotonic()
+    chunks = scanned = changed = 0
+    await pool.submit(_start_job, path, name, bool(body.get("reset")))
+    while time.monotonic() - t0 < budget:
+        t1 = time.monotonic()
+        n, m, done = await pool.submit(_chunk, path, name, size)
+        if done:
+            break
+        chunks += 1; scanned += n; changed += m
+        # 속도 제한: 이 청크가 rows_per_sec 기준으로 차지해야 할 시간만큼 쉰다
+        wait = n / rps - (time.monotonic() - t1)
+        if wait > 0:
+            await asyncio.sleep(min(wait, max(0.0, budget - (time.monotonic() - t0))))
+    rec = await pool.submit(_job, path, name)
+    return {**rec, "done": rec["status"] == "done",
+            "run": {"chunks": chunks, "scanned": scanned, "changed": changed,
+                    "elapsed_ms": round((time.monotonic() - t0) * 1e3, 1)},
+            "db_path": path}
 
 async def run(envelope: Dict[str, Any], ctx=None, env=None) -> Dict[str, Any]:
     act = envelope.get("action")
     if act == "MIGRATE":
         details = _migrate()
         return {"ok": True, "mode":"SINGLE", "data":{"ok": True, "details": details}}
+    if act == "BACKFILL":
+        _require_admin(ctx)
+        details = await _run_backfill(envelope.get("input", {}), ctx)
+        return {"ok": True, "mode":"SINGLE", "data":{"ok": True, "details": details}}
+    if act == "COMPACT_SECRETS":
+        _require_admin(ctx)
+        details = secret_store.compact()  # executor: thread — VACUUM 동안 이벤트 루프를 막지 않음
+        return {"ok": True, "mode":"SINGLE", "data":{"ok": True, "details": details}}
     if act == "CHECK":
         details = _check()
-        return {"ok": True, "mode":"SINGLE", "data":{"ok": True, "details": details}}
+        healthy = not (details["full_scans"] or details["drift"] or details["pending"])
+        return {"ok": True, "mode":"SINGLE", "data":{"ok": healthy, "details": details}}
     return {"ok": False, "mode":"SINGLE", "error":{"code":"ERR_SCHEMA","message":"unsupported action"}}
@@ -1,7 +1,7 @@
 # pages orchestrator example
-from core.registry import Registry
+from core.registry import default_registry
 
-registry = Registry()
+registry = default_registry()  # server.main(/run), core.runner 와 같은 인스턴스
 
 async def RUN(input: dict):
     a = await registry.run("modules.common.ping", {"action":"PING","mode":"SINGLE","input":{"echo":"hi"}})
@@ -1,5 +1,5 @@
-from core.registry import Registry
-registry = Registry()
+from core.registry import default_registry
+registry = default_registry()  # server.main(/run), core.runner 와 같은 인스턴스
 
 async def RUN(input: dict):
     snap = await registry.run("modules.ops.snapshot", {"action":"SNAPSHOT","mode":"SINGLE","input":{}})
@@ -0,0 +1,105 @@
+# /run 응답 인코더: JSON(orjson 있으면 사용) / msgpack, gzip·zstd 압축을 Accept / Accept-Encoding 으로 협상
+import gzip
+import json
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # requirements 에 포함 — 최소 설치(requirements 미적용) 환경에서만 표준 json
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+COMPRESS_MIN_BYTES = 1024   # 이보다 작은 본문은 압축하지 않음(헤더/CPU 비용이 더 큼)
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+def dumps_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _dumps_msgpack(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+_zstd_cctx = None
+
+def _zstd(data: bytes) -> bytes:
+    global _zstd_cctx
+    if _zstd_cctx is None:
+        _zstd_cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _zstd_cctx.compress(data)
+
+# media type -> 인코더 / content-coding -> 압축기 (선호 순서대로)
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {JSON: dumps_json}
+if msgpack is not None:
+    ENCODERS[MSGPACK] = _dumps_msgpack
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _zstd
+COMPRESSORS["gzip"] = _gzip
+
+def register_encoder(media_type: str, fn: Callable[[Any], bytes]):
+    ENCODERS[media_type] = fn
+
+def register_compressor(coding: str, fn: Callable[[bytes], bytes]):
+    COMPRESSORS[coding] = fn
+
+def _qvalues(header: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k.strip() == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        out[name] = q
+    return out
+
+def negotiate(accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+    """(media_type, content_coding) 선택. 명시적으로 요청된 경우만 msgpack, 나머지는 JSON."""
+    media = JSON
+    acc = _qvalues(accept or "")
+    for alias in _MSGPACK_ALIASES:
+        if acc.get(alias, 0) > 0 and MSGPACK in ENCODERS and acc[alias] >= acc.get(JSON, 0):
+            media = MSGPACK
+            break
+    coding = None
+    enc = _qvalues(accept_encoding or "")
+    best = 0.0
+    for name in COMPRESSORS:
+        q = enc.get(name, enc.get("*", 0.0))
+        if q > best:
+            coding, best = name, q
+    return media, coding
+
+def encode_response(obj: Any, headers: Mapping[str, str], status_code: int = 200) -> Response:
+    """요청 헤더(accept, accept-encoding)에 맞춰 본문을 인코딩/압축한 Response."""
+    media, coding = negotiate(headers.get("accept"), headers.get("accept-encoding"))
+    body = ENCODERS[media](obj)
+    out_headers = {"Vary": "Accept, Accept-Encoding"}
+    if coding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        body = COMPRESSORS[coding](body)
+        out_headers["Content-Encoding"] = coding
+    return Response(content=body, status_code=status_code, media_type=media, headers=out_headers)
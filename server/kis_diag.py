@@ -12,7 +12,11 @@ Endpoints:
 from __future__ import annotations
 from fastapi import APIRouter, Body, Response
 from typing import Any, Dict, Tuple
-import os, requests, time, html
+import os, time, html
+
+from core.errors import FrameworkError
+from modules.broker.kis import _client
+from modules.broker.kis._token import TOKENS
 
 try:
     from server.modules.profile.kis_test import handler as kis_check_handler  # type: ignore
@@ -71,19 +75,15 @@ def _resolve(cfg):
         "env": _norm_env(cfg.get("env") or os.getenv("KIS_ENV") or "prod"),
     }
 
-def _get_token(base, appkey, appsecret):
-    url = base + "/oauth2/tokenP"
-    headers = {"content-type": "application/json; charset=UTF-8"}
-    body = {"grant_type": "client_credentials", "appkey": appkey, "appsecret": appsecret}
-    r = requests.post(url, headers=headers, json=body, timeout=10)
-    info = {"status": r.status_code}
-    try: r.raise_for_status()
-    except Exception:
-        return ("", {"status": r.status_code, "body": r.text[:500]})
-    data = r.json()
-    tok = (data.get("access_token") or data.get("accessToken") or "").strip()
-    info["has_token"] = bool(tok)
-    return (tok, info)
+def _get_token(env, appkey, appsecret):
+    # 발급은 TOKENS 로 — 캐시/단일 발급(single-flight)/발급 횟수 제한을 서비스와 같이 쓴다
+    try:
+        tok, source = TOKENS.get_sync(appkey or "", appsecret or "", env == "vts")
+    except FrameworkError as e:
+        return ("", {"code": e.code, "message": e.message, "details": e.details})
+    except Exception as e:
+        return ("", {"error": str(e)})
+    return (tok, {"has_token": bool(tok), "source": source})
 
 def _inquire(base, token, appkey, appsecret, account_no, product_code, custtype, tr_id):
     url = base + "/uapi/domestic-stock/v1/trading/inquire-balance"
@@ -91,7 +91,7 @@ def _inquire(base, token, appkey, appsecret, account_no, product_code, custtype,
               "INQR_DVSN":"02", "UNPR_DVSN":"01", "FUND_STTL_ICLD_YN":"N","FNCG_AMT_AUTO_RDPT_YN":"N",
               "PRCS_DVSN":"00","CTX_AREA_FK100":"","CTX_AREA_NK100":""}
     headers = {"authorization": f"Bearer {token}","appkey": appkey,"appsecret": appsecret,"tr_id": tr_id,"custtype": custtype}
-    r = requests.get(url, headers=headers, params=params, timeout=15)
+    r = _client.get_sync(url, headers=headers, params=params, timeout=15)
     meta = {"status": r.status_code}
     try: js = r.json()
     except Exception: js = {"_body": r.text[:500]}
@@ -112,7 +112,7 @@ def _map(account_no, js):
 def account(cfg: Dict[str, Any] | None = Body(default=None)):
     cfg = _resolve(cfg); env = cfg["env"]
     host, scheme, port, tr_id = _kis_base(env); base = f"{scheme}://{host}:{port}"
-    tok, tmeta = _get_token(base, cfg["appkey"], cfg["appsecret"])
+    tok, tmeta = _get_token(env, cfg["appkey"], cfg["appsecret"])
     if not tok: 
         return {"ok": False, "meta": {"env": env, "host": host, "tr_id": tr_id, "tmeta": tmeta}, "hint": "토큰 실패"}
     raw, rmeta = _inquire(base, tok, cfg["appkey"], cfg["appsecret"], cfg["account_no"], cfg["product_code"], cfg["custtype"], tr_id)
@@ -1,10 +1,15 @@
 from server.kis_diag import router as kis_diag_router
+import uuid
+import asyncio
+from typing import Any, Dict, Optional, Tuple
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from core.registry import Registry
+from core.registry import default_registry
 from core.interceptor import build_pipeline
 from core.errors import FrameworkError
+from core.jsonstream import IncrementalEnvelopeParser
+from server.encoding import dumps_json, encode_response
 
 app = FastAPI(title="modular-framework API", version="1.3.0")
 
@@ -17,39 +22,229 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-registry = Registry()
+registry = default_registry()  # core.runner/pages 와 같은 인스턴스
 pipeline = build_pipeline(registry)
 
+BATCH_MAX_ENTRIES = 100
+BATCH_PARALLELISM = 16
+
 @app.get("/health")
 async def health():
     return {"ok": True}
 
-@app.post("/run")
-async def run(request: Request, name: str):
-    envelope = {}
+def _error_body(code: str, message: str, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    err: Dict[str, Any] = {"code": code, "message": message}
+    if details is not None:
+        err["details"] = details
+    return {"ok": False, "error": err}
+
+async def _dispatch(name: str, envelope: Any, headers: Dict[str, str],
+                    auth: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+    """pre -> registry.run -> notify. (http_status, body) 반환."""
     action = "?"
     try:
-        envelope = await request.json()
+        if not isinstance(envelope, dict):
+            raise FrameworkError("ERR_SCHEMA", "envelope must be an object")
         action = envelope.get("action", "?")
-        headers = dict(request.headers)
-        # pass client ip
-        if request.client:
-            headers["X-Client-IP"] = request.client.host
-        ctx, env = pipeline.pre(headers, envelope, name)
+        ctx, env = pipeline.pre(headers, envelope, name, auth=auth)
         out = await registry.run(name, envelope, ctx=ctx, env=env)
         pipeline.notify(name, action, ok=bool(out.get("ok", True)))
-        return JSONResponse(out)
+        return 200, out
+    except FrameworkError as fe:
+        pipeline.notify(name, action, ok=False)
+        return fe.http_status, _error_body(fe.code, fe.message, fe.details)
+    except Exception as e:
+        pipeline.notify(name, action, ok=False)
+        return 500, _error_body("ERR_INTERNAL", str(e))
+
+def _headers(request: Request) -> Dict[str, str]:
+    headers = dict(request.headers)
+    # pass client ip
+    if request.client:
+        headers["X-Client-IP"] = request.client.host
+    return headers
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+def _stream_format(request: Request) -> Optional[str]:
+    accept = request.headers.get("accept") or ""
+    if NDJSON in accept:
+        return NDJSON
+    if SSE in accept:
+        return SSE
+    return None
+
+def _frame(fmt: str, rec: Dict[str, Any]) -> bytes:
+    data = dumps_json(rec)
+    if fmt == SSE:
+        return b"event: " + (b"done" if rec.get("done") else b"item") + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+async def _stream_bulk(name: str, envelope: Dict[str, Any], headers: Dict[str, str], fmt: str):
+    """BULK 결과를 항목별 NDJSON/SSE 로 전송. 마지막 레코드는 {"done": true, "ok", "partial_ok", ...}.
+    스트림 시작 전 오류(pre/검증)는 일반 JSON 오류 응답으로 돌려준다."""
+    action = envelope.get("action", "?")
+    try:
+        ctx, env = pipeline.pre(headers, envelope, name)
+        items = await registry.run_stream(name, envelope, ctx=ctx, env=env)
+    except FrameworkError as fe:
+        pipeline.notify(name, action, ok=False)
+        return encode_response(headers=headers, status_code=fe.http_status, obj=_error_body(fe.code, fe.message, fe.details))
+    except Exception as e:
+        pipeline.notify(name, action, ok=False)
+        return encode_response(headers=headers, status_code=500, obj=_error_body("ERR_INTERNAL", str(e)))
+
+    async def body():
+        ok = False
+        try:
+            async for rec in items:
+                if rec.get("done"):
+                    ok = bool(rec.get("ok"))
+                yield _frame(fmt, rec)
+        except Exception as e:
+            yield _frame(fmt, {"done": True, **_error_body("ERR_INTERNAL", str(e))})
+        finally:
+            pipeline.notify(name, action, ok=ok)
+
+    return StreamingResponse(body(), media_type=fmt, headers={"Cache-Control": "no-cache"})
+
+def _wants_stream_inputs(request: Request) -> bool:
+    flag = request.query_params.get("stream_inputs") or request.headers.get("x-stream-inputs") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+async def _body_events(request: Request):
+    # 본문을 ASGI receive 청크 단위로 읽으며 필드/항목 이벤트를 꺼낸다(전체 본문을 버퍼링하지 않음)
+    parser = IncrementalEnvelopeParser()
+    async for chunk in request.stream():
+        parser.feed(chunk)
+        for ev in parser.events():
+            yield ev
+    parser.close()
+    for ev in parser.events():
+        yield ev
+
+async def _run_stream_inputs(request: Request, name: str) -> Response:
+    """대용량 BULK 본문을 inputs 항목 단위로 읽으면서 바로 검증/실행한다(opt-in: ?stream_inputs=1).
+    action/mode/options 는 inputs 보다 앞에 와야 한다. 응답은 본문을 다 읽은 뒤 일반 BULK JSON 으로 돌려준다
+    (업로드 중인 HTTP/1.1 클라이언트는 응답을 읽지 않으므로 양방향 스트리밍은 하지 않는다).
+    options.collect: "all"(기본) | "errors" | "none" — 결과 보관 범위(대량 적재 시 메모리 절약)."""
+    events = _body_events(request)
+    head: Dict[str, Any] = {}
+    first = None
+    try:
+        async for kind, val in events:
+            if kind != "field":
+                first = (kind, val)
+                break
+            head[val[0]] = val[1]
+    except ValueError as e:
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body("ERR_SCHEMA", f"invalid JSON: {e}"))
+    if head.get("mode", "BULK") != "BULK":
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body("ERR_SCHEMA", "stream_inputs requires mode 'BULK'"))
+    head["mode"] = "BULK"
+    opts = head.get("options") if isinstance(head.get("options"), dict) else {}
+    collect = opts.get("collect") or "all"
+
+    async def inputs():
+        if first is None or first[0] != "item":
+            return
+        yield first[1]
+        async for kind, val in events:
+            if kind == "item":
+                yield val
+
+    action = head.get("action", "?")
+    results: list = []
+    trailer: Dict[str, Any] = {}
+    try:
+        ctx, env = pipeline.pre(_headers(request), head, name)
+        items = await registry.run_stream(name, head, ctx=ctx, env=env, inputs=inputs())
+        async for rec in items:
+            if rec.get("done"):
+                trailer = rec
+            elif collect == "all" or (collect == "errors" and not rec.get("ok")):
+                results.append(rec)
     except FrameworkError as fe:
         pipeline.notify(name, action, ok=False)
-        return JSONResponse(status_code=fe.http_status, content={
-            "ok": False,
-            "error": {"code": fe.code, "message": fe.message, "details": fe.details}
-        })
+        return encode_response(headers=request.headers, status_code=fe.http_status, obj=_error_body(fe.code, fe.message, fe.details))
+    except ValueError as e:
+        pipeline.notify(name, action, ok=False)
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body("ERR_SCHEMA", f"invalid JSON: {e}"))
     except Exception as e:
         pipeline.notify(name, action, ok=False)
-        return JSONResponse(status_code=500, content={
-            "ok": False,
-            "error": {"code": "ERR_INTERNAL", "message": str(e)}
-        })
+        return encode_response(headers=request.headers, status_code=500, obj=_error_body("ERR_INTERNAL", str(e)))
+    pipeline.notify(name, action, ok=bool(trailer.get("ok")))
+    results.sort(key=lambda r: r.get("index") if r.get("index") is not None else -1)
+    return encode_response(headers=request.headers, obj={
+        "ok": bool(trailer.get("ok")),
+        "mode": "BULK",
+        "results": results,
+        "partial_ok": bool(trailer.get("partial_ok")),
+        "metrics": trailer.get("metrics"),
+    })
+
+@app.post("/run")
+async def run(request: Request, name: str):
+    if _wants_stream_inputs(request):
+        return await _run_stream_inputs(request, name)
+    try:
+        envelope = await request.json()
+    except Exception as e:
+        return encode_response(headers=request.headers, status_code=500, obj=_error_body("ERR_INTERNAL", str(e)))
+    fmt = _stream_format(request)
+    if fmt and isinstance(envelope, dict) and envelope.get("mode") == "BULK":
+        return await _stream_bulk(name, envelope, _headers(request), fmt)
+    status, body = await _dispatch(name, envelope, _headers(request))
+    return encode_response(headers=request.headers, status_code=status, obj=body)
+
+@app.post("/run/batch")
+async def run_batch(request: Request):
+    """여러 {name, envelope} 항목을 한 번의 요청으로 실행하고, 끝나는 순서대로 NDJSON 한 줄씩 전송.
+    인증(JWT 해석)은 1회, scope/secret/rate/circuit 검사는 항목마다 수행.
+    각 줄: {"index", "name", "status", "result"} / 마지막 줄: {"done": true, "count", "ok"}"""
+    try:
+        body = await request.json()
+    except Exception as e:
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body("ERR_SCHEMA", f"invalid JSON: {e}"))
+    entries = body.get("entries") if isinstance(body, dict) else body
+    if not isinstance(entries, list) or not entries:
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body("ERR_SCHEMA", "'entries' must be a non-empty list"))
+    if len(entries) > BATCH_MAX_ENTRIES:
+        return encode_response(headers=request.headers, status_code=400, obj=_error_body(
+            "ERR_SCHEMA", "too many entries", {"max": BATCH_MAX_ENTRIES, "got": len(entries)}))
+
+    headers = _headers(request)
+    auth = pipeline.authenticate(headers)
+    base_id = headers.get("x-request-id") or str(uuid.uuid4())
+    sem = asyncio.Semaphore(BATCH_PARALLELISM)
+
+    async def one(i: int, entry: Any) -> Dict[str, Any]:
+        name = entry.get("name") if isinstance(entry, dict) else None
+        envelope = entry.get("envelope") if isinstance(entry, dict) else None
+        if not name:
+            return {"index": i, "name": name, "status": 400,
+                    "result": _error_body("ERR_SCHEMA", "entry requires 'name' and 'envelope'")}
+        rid = envelope.get("request_id") if isinstance(envelope, dict) else None
+        h = dict(headers)
+        h["X-Request-ID"] = rid or f"{base_id}:{i}"
+        async with sem:
+            status, out = await _dispatch(name, envelope, h, auth=auth)
+        return {"index": i, "name": name, "status": status, "result": out}
+
+    async def stream():
+        tasks = [asyncio.ensure_future(one(i, e)) for i, e in enumerate(entries)]
+        all_ok = True
+        try:
+            for fut in asyncio.as_completed(tasks):
+                line = await fut
+                all_ok = all_ok and line["status"] == 200 and bool(line["result"].get("ok", True))
+                yield dumps_json(line) + b"\n"
+            yield dumps_json({"done": True, "count": len(tasks), "ok": all_ok}) + b"\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 app.include_router(kis_diag_router, prefix="/_kisdiag")
@@ -3,7 +3,7 @@
 KIS 계좌 잔고/포지션 조회 (실계좌/모의계좌 전환 지원)
 - 모듈 경로: modules.broker.kis.accounts
 - import 대상: handler
-- 요구: requests
+- 요구: httpx (modules.broker.kis._client 공용 연결 풀)
 - 입력(source):
     - payload 또는 context.profile.kis 에 다음 키 존재
       appkey, appsecret, account_no(CANO 8자리), product_code(ACNT_PRDT_CD, 기본 "01"),
@@ -27,7 +27,10 @@ import os
 import time
 import json
 from typing import Dict, Any, Tuple
-import requests
+
+from core.errors import FrameworkError
+from modules.broker.kis import _client
+from modules.broker.kis._token import TOKENS
 
 __all__ = ["handler"]
 
@@ -99,20 +102,12 @@ def _resolve_config(payload: Dict[str, Any] | None, context: Dict[str, Any] | No
         raise ValueError(f"KIS config missing: {missing}. Provide via payload/context.profile.kis or env.")
     return cfg
 
-def _get_token(base: str, appkey: str, appsecret: str, timeout: int = 10) -> str:
-    url = base + "/oauth2/tokenP"
-    headers = {"content-type": "application/json; charset=UTF-8"}
-    body = {"grant_type": "client_credentials", "appkey": appkey, "appsecret": appsecret}
-    r = requests.post(url, headers=headers, json=body, timeout=timeout)
+def _get_token(env: str, appkey: str, appsecret: str, timeout: int = 10) -> str:
+    # 발급은 TOKENS 로 — 캐시/단일 발급(single-flight)/발급 횟수 제한을 서비스와 같이 쓴다
     try:
-        r.raise_for_status()
-    except Exception:
-        # include response text for easier debugging
-        raise RuntimeError(f"KIS token error: {r.status_code} {r.text}") from None
-    data = r.json()
-    token = data.get("access_token") or data.get("accessToken")
-    if not token:
-        raise RuntimeError(f"KIS token response missing access_token: {data}")
+        token, _ = TOKENS.get_sync(appkey, appsecret, env == "vts", timeout=timeout)
+    except FrameworkError as e:
+        raise RuntimeError(f"KIS token error: {e.code} {e.message} {e.details}") from None
     return token
 
 def _inquire_balance(base: str, token: str, appkey: str, appsecret: str, account_no: str,
@@ -138,7 +133,7 @@ def _inquire_balance(base: str, token: str, appkey: str, appsecret: str, account
         "tr_id": tr_id,
         "custtype": custtype or "P",
     }
-    r = requests.get(url, headers=headers, params=params, timeout=timeout)
+    r = _client.get_sync(url, headers=headers, params=params, timeout=timeout)
     try:
         r.raise_for_status()
     except Exception:
@@ -176,7 +171,7 @@ def handler(payload: Dict[str, Any] | None = None, context: Dict[str, Any] | Non
     """
     cfg = _resolve_config(payload, context)
     base, tr_id = _kis_base(cfg["env"])
-    token = _get_token(base, cfg["appkey"], cfg["appsecret"])
+    token = _get_token(cfg["env"], cfg["appkey"], cfg["appsecret"])
     data = _inquire_balance(base, token, cfg["appkey"], cfg["appsecret"],
                             cfg["account_no"], cfg["product_code"], cfg["custtype"], tr_id)
     return _map_response(cfg["account_no"], data)
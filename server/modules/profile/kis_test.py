@@ -10,7 +10,9 @@ Designed to be called via the project's dynamic module loader (handler(payload,
 from __future__ import annotations
 import os, socket, json, time, traceback
 from typing import Any, Dict, Tuple
-import requests
+
+from modules.broker.kis import _client
+from modules.broker.kis._token import TOKENS
 
 __all__ = ["handler"]
 
@@ -134,17 +136,9 @@ def handler(payload: Dict[str, Any] | None = None, context: Dict[str, Any] | Non
 
     # Step 3: token
     def s3():
-        url = base + "/oauth2/tokenP"
-        headers = {"content-type": "application/json; charset=UTF-8"}
-        body = {"grant_type": "client_credentials", "appkey": cfg["appkey"], "appsecret": cfg["appsecret"]}
-        r = requests.post(url, headers=headers, json=body, timeout=10)
-        try:
-            r.raise_for_status()
-        except Exception:
-            return {"status": r.status_code, "body": r.text[:500]}
-        data = r.json()
-        token = data.get("access_token") or data.get("accessToken")
-        return {"status": r.status_code, "has_token": bool(token)}
+        # 발급은 TOKENS 로(캐시/단일 발급/발급 횟수 제한 공유). 거부는 ERR_FORBIDDEN -> 단계 실패
+        token, source = TOKENS.get_sync(cfg["appkey"] or "", cfg["appsecret"] or "", env == "vts")
+        return {"has_token": bool(token), "source": source}
     result["steps"].append(_step("token", s3))
 
     # Step 4: lightweight inquire-balance (header only) to validate TR/headers
@@ -157,13 +151,8 @@ def handler(payload: Dict[str, Any] | None = None, context: Dict[str, Any] | Non
             "UNPR_DVSN": "01", "FUND_STTL_ICLD_YN": "N", "FNCG_AMT_AUTO_RDPT_YN": "N",
             "PRCS_DVSN": "00", "CTX_AREA_FK100": "", "CTX_AREA_NK100": "",
         }
-        # get fresh token
-        url_token = base + "/oauth2/tokenP"
-        headers0 = {"content-type": "application/json; charset=UTF-8"}
-        body0 = {"grant_type": "client_credentials", "appkey": cfg["appkey"], "appsecret": cfg["appsecret"]}
-        rt = requests.post(url_token, headers=headers0, json=body0, timeout=10)
-        rt.raise_for_status()
-        token = (rt.json().get("access_token") or rt.json().get("accessToken") or "").strip()
+        # step 3 과 같은 토큰(TOKENS 캐시) — 새로 발급하지 않는다
+        token, _ = TOKENS.get_sync(cfg["appkey"] or "", cfg["appsecret"] or "", env == "vts")
         tr_id = "TTTC8434R" if env == "prod" else "VTTC8434R"
         headers = {
             "authorization": f"Bearer {token}",
@@ -172,7 +161,7 @@ def handler(payload: Dict[str, Any] | None = None, context: Dict[str, Any] | Non
             "tr_id": tr_id,
             "custtype": cfg["custtype"],
         }
-        r = requests.get(url, headers=headers, params=params, timeout=10)
+        r = _client.get_sync(url, headers=headers, params=params, timeout=10)
         # We accept 200 with KIS payload or 4xx with msg codes; both prove routing works
         code = r.status_code
         body = {}
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import textwrap
+import importlib
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+class TmpModules:
+    """임시 modules 트리. add() 가 manifest.yaml + handler.py(+ 스키마)를 만들고 "modules.<name>" 을 돌려준다.
+    reg 는 이 트리를 보는 Registry."""
+
+    def __init__(self, root):
+        from core.registry import Registry
+        self.root = root
+        self.reg = Registry(root)
+
+    def add(self, name: str, actions: dict, handler: str, schemas: dict = None) -> str:
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            d = self.root.joinpath(*parts[:i])
+            d.mkdir(exist_ok=True)
+            (d / "__init__.py").touch()
+        for rel, schema in (schemas or {}).items():
+            (d / rel).parent.mkdir(parents=True, exist_ok=True)
+            (d / rel).write_text(json.dumps(schema))
+        mani = {"name": "modules." + name, "version": "1.0.0", "engine_api": "^1.4", "actions": actions}
+        (d / "manifest.yaml").write_text(yaml.safe_dump(mani))
+        (d / "handler.py").write_text(textwrap.dedent(handler))
+        importlib.invalidate_caches()
+        return "modules." + name
+
+@pytest.fixture
+def tmp_modules(monkeypatch, tmp_path):
+    import modules
+    root = tmp_path / "modules"
+    root.mkdir()
+    monkeypatch.setattr(modules, "__path__", [*modules.__path__, str(root)])
+    before = set(sys.modules)
+    yield TmpModules(root)
+    for name in set(sys.modules) - before:
+        if name.startswith("modules."):
+            del sys.modules[name]
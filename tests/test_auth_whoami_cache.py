@@ -0,0 +1,46 @@
+# auth.login WHOAMI 캐시(role 포함): users 행을 쓰는 액션이 실행되면 다음 WHOAMI 는 새 값을 본다
+import asyncio
+import sqlite3
+
+import pytest
+
+from core import diskcache, executor, plan
+from core.registry import Registry
+from modules.auth import _store
+
+@pytest.fixture
+def reg(monkeypatch, tmp_path):
+    monkeypatch.setenv("JWT_SECRET", "x")
+    monkeypatch.setattr(_store, "DB_PATH", str(tmp_path / "auth.db"))
+    monkeypatch.setattr(diskcache, "_DEFAULT", diskcache.DiskCache(str(tmp_path / "cache.db")))
+    _store.init()
+    # process 풀 워커는 임시 DB_PATH 를 모른다 — 이 테스트에서는 process 액션도 서버 프로세스에서 실행
+    monkeypatch.setattr(plan, "get_executor", lambda res, name: None if res.get("executor") == "process"
+                        else executor.get_executor(res, name))
+    return Registry()
+
+def _set_role(uid, role):
+    with sqlite3.connect(_store.DB_PATH) as c:
+        c.execute("UPDATE users SET role=? WHERE id=?", (role, uid))
+
+def test_whoami_role_is_not_served_stale(reg):
+    async def go():
+        uid = _store.create_user("a@example.com", "secret1", "a")
+        ctx = {"user_id": uid, "scopes": ["auth:profile", "ops:admin"]}
+
+        async def whoami():
+            out = await reg.run("modules.auth.login", {"action": "WHOAMI", "mode": "SINGLE", "input": {}}, ctx=ctx)
+            return out["data"]["role"]
+
+        seen = [await whoami()]
+        _set_role(uid, "admin")
+        seen.append(await whoami())  # 무효화 전 — 캐시
+        await reg.run("modules.auth.users", {"action": "CHANGE_PASSWORD", "mode": "SINGLE",
+                                     "input": {"old_password": "secret1", "new_password": "secret2"}}, ctx=ctx)
+        seen.append(await whoami())
+        _set_role(uid, "user")
+        await reg.run("modules.ops.dbmigrate", {"action": "MIGRATE", "mode": "SINGLE", "input": {}}, ctx=ctx)
+        seen.append(await whoami())
+        return seen
+
+    assert asyncio.run(go()) == ["user", "user", "admin", "user"]
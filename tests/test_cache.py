@@ -0,0 +1,93 @@
+# 매니페스트 cache/invalidates: 적중, 태그 무효화, 실행 중 무효화된 결과는 저장하지 않음(세대 검사)
+import asyncio
+
+import pytest
+
+from core import diskcache
+from core.cache import ActionCache, TAGS
+
+HANDLER = '''
+import asyncio
+
+CALLS = []
+GATE = {}
+
+async def run(envelope, ctx=None, env=None):
+    body = envelope.get("input") or {}
+    if envelope["action"] == "WRITE":
+        return {"ok": True, "mode": "SINGLE", "data": {"id": body["id"]}}
+    CALLS.append(body["id"])
+    if "entered" in GATE:
+        GATE["entered"].set()
+        await GATE["release"].wait()
+    return {"ok": True, "mode": "SINGLE", "data": {"id": body["id"], "n": len(CALLS)}}
+'''
+
+@pytest.fixture
+def mod(tmp_modules, monkeypatch, tmp_path):
+    monkeypatch.setattr(diskcache, "_DEFAULT", diskcache.DiskCache(str(tmp_path / "cache.db")))
+    name = tmp_modules.add("t.cached", {
+        "READ": {"modes": ["SINGLE"],
+                 "cache": {"ttl": 30, "key": ["input.id"], "tags": ["t.item:{input.id}"]}},
+        "WRITE": {"modes": ["SINGLE"], "invalidates": ["t.item:{input.id}"]},
+    }, HANDLER)
+    return tmp_modules.reg, name
+
+def _run(reg, name, action, id):
+    return reg.run(name, {"action": action, "mode": "SINGLE", "input": {"id": id}})
+
+def test_hit_and_tag_invalidation(mod):
+    reg, name = mod
+
+    async def go():
+        a1 = await _run(reg, name, "READ", "a")
+        a2 = await _run(reg, name, "READ", "a")
+        await _run(reg, name, "READ", "b")
+        await _run(reg, name, "WRITE", "a")
+        a3 = await _run(reg, name, "READ", "a")
+        await _run(reg, name, "READ", "b")
+        return a1, a2, a3
+
+    a1, a2, a3 = asyncio.run(go())
+
+    assert a1["data"]["n"] == 1 and a2 is a1  # 적중은 같은 dict
+    assert a3["data"]["n"] == 3
+    assert reg.load(name).module.CALLS == ["a", "b", "a"]  # b 는 다른 태그 — 그대로 적중
+    stats = reg.get_plan(name, "READ").cache.stats()
+    assert stats["hits"] == 2 and stats["invalidated"] == 1
+
+def test_result_of_invalidated_run_is_not_stored(mod):
+    reg, name = mod
+    h = reg.load(name).module
+
+    async def go():
+        h.GATE.update(entered=asyncio.Event(), release=asyncio.Event())
+        reading = asyncio.ensure_future(_run(reg, name, "READ", "a"))
+        await h.GATE["entered"].wait()
+        await _run(reg, name, "WRITE", "a")  # 실행 중에 무효화
+        h.GATE["release"].set()
+        first = await reading
+        h.GATE.clear()
+        return first, await _run(reg, name, "READ", "a")
+
+    first, second = asyncio.run(go())
+
+    assert first["data"]["n"] == 1 and second["data"]["n"] == 2  # 무효화 전에 읽은 값은 재사용하지 않음
+
+def test_disk_hit_invalidated_during_read_is_a_miss(tmp_path):
+    disk = diskcache.DiskCache(str(tmp_path / "l2.db"))
+    cache = ActionCache("t.disk", {"ttl": 30, "tags": ["t.disk:x"]})
+    cache.disk = disk
+    tags = ("t.disk:x",)
+    disk.put(cache.name, "k", {"v": 1}, 30, tags)
+    read = disk.get
+
+    def racing_get(ns, key):
+        found = read(ns, key)
+        TAGS.invalidate("t.disk:x", disk=False)  # 디스크 값을 읽은 직후 다른 호출이 무효화
+        return found
+
+    disk.get = racing_get
+
+    assert cache.get("k", tags) is None
+    assert cache.stats()["size"] == 0 and cache.stats()["disk_hits"] == 0
@@ -0,0 +1,54 @@
+# ops.dbmigrate: CHECK 는 읽기 전용, BACKFILL 은 ops:admin 필요 + 청크 단위로 끝까지 진행
+import asyncio
+import sqlite3
+
+import pytest
+
+from core.errors import FrameworkError
+from modules.auth import _store
+from modules.ops.dbmigrate import handler
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    path = str(tmp_path / "auth.db")
+    monkeypatch.setattr(_store, "DB_PATH", path)
+    return path
+
+def _run(action, input=None, scopes=()):
+    env = {"action": action, "mode": "SINGLE", "input": input or {}}
+    return asyncio.run(handler.run(env, ctx={"scopes": list(scopes)}))
+
+def test_check_does_not_create_db(db, tmp_path):
+    out = _run("CHECK")
+
+    assert out["data"]["ok"] is False and out["data"]["details"]["exists"] is False
+    assert not (tmp_path / "auth.db").exists()
+
+def test_check_does_not_write(db):
+    _store.init()
+    with open(db, "rb") as f:
+        before = f.read()
+
+    details = _run("CHECK")["data"]["details"]
+
+    assert "schema_migrations" not in details["tables"] and details["pending"]
+    with open(db, "rb") as f:
+        assert f.read() == before
+
+def test_backfill_requires_admin(db):
+    with pytest.raises(FrameworkError) as e:
+        _run("BACKFILL", {"job": "users.email_lower"})
+    assert e.value.code == "ERR_FORBIDDEN"
+
+def test_backfill_runs_to_completion(db):
+    _store.init()
+    with sqlite3.connect(db) as c:
+        c.executemany("INSERT INTO users(id,email,pw_hash,pw_salt,created_at) VALUES(?,?,?,?,0)",
+                      [(str(i), f" User{i}@Example.com", "h", "s") for i in range(25)])
+
+    out = _run("BACKFILL", {"job": "users.email_lower", "chunk_size": 10, "rows_per_sec": 1e6}, ["ops:admin"])
+
+    d = out["data"]["details"]
+    assert d["done"] is True and d["run"]["scanned"] == 25 and d["run"]["changed"] == 25
+    with sqlite3.connect(db) as c:
+        assert c.execute("SELECT count(*) FROM users WHERE email<>lower(trim(email))").fetchone()[0] == 0
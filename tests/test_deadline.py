@@ -0,0 +1,96 @@
+# 마감 전파: X-Request-Deadline 과 resources.timeout_ms 중 빠른 쪽, 만료 시 ERR_TIMEOUT, 대기열에서 만료된 작업은 실행하지 않음
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+
+from core import deadline as dl
+from core.errors import FrameworkError
+from core.executor import ThreadExecutor
+from core.interceptor import build_pipeline
+
+HANDLER = '''
+import asyncio
+
+async def run(envelope, ctx=None, env=None):
+    await asyncio.sleep(envelope["input"].get("sleep", 0))
+    return {"ok": True, "mode": "SINGLE", "data": {"deadline": (ctx or {}).get("deadline")}}
+'''
+
+@pytest.fixture
+def mod(tmp_modules):
+    name = tmp_modules.add("t.deadline", {
+        "FAST": {"modes": ["SINGLE"]},
+        "BOUNDED": {"modes": ["SINGLE"], "resources": {"timeout_ms": 50}},
+    }, HANDLER)
+    return tmp_modules.reg, name
+
+def _env(action, sleep=0):
+    return {"action": action, "mode": "SINGLE", "input": {"sleep": sleep}}
+
+def test_parse_header_accepts_seconds_and_ms():
+    assert dl.parse_header("1700000000.5") == 1700000000.5
+    assert dl.parse_header("1700000000500") == 1700000000.5
+    assert dl.parse_header("soon") is None and dl.parse_header("") is None
+
+def test_pre_takes_the_earlier_of_header_and_timeout_ms(mod):
+    reg, name = mod
+    pipe = build_pipeline(reg)
+    now = time.time()
+
+    ctx, _ = pipe.pre({dl.HEADER: str(now + 10)}, _env("BOUNDED"), name)
+    assert ctx["deadline"] < now + 1  # timeout_ms(50ms)가 더 빠름
+    ctx, _ = pipe.pre({dl.HEADER: str((now + 0.01) * 1000)}, _env("BOUNDED"), name)
+    assert ctx["deadline"] == pytest.approx(now + 0.01)
+    ctx, _ = pipe.pre({}, _env("FAST"), name)
+    assert "deadline" not in ctx
+
+def test_pre_rejects_an_expired_header(mod):
+    reg, name = mod
+    with pytest.raises(FrameworkError) as e:
+        build_pipeline(reg).pre({dl.HEADER: str(time.time() - 1)}, _env("FAST"), name)
+    assert e.value.code == "ERR_TIMEOUT"
+
+def test_timeout_ms_bounds_the_handler(mod):
+    reg, name = mod
+    assert asyncio.run(reg.run(name, _env("BOUNDED")))["data"]["deadline"] is not None
+    with pytest.raises(FrameworkError) as e:
+        asyncio.run(reg.run(name, _env("BOUNDED", sleep=1)))
+    assert e.value.code == "ERR_TIMEOUT" and e.value.details["action"] == "BOUNDED"
+
+def test_caller_deadline_is_kept_when_earlier(mod):
+    reg, name = mod
+    d = time.time() + 0.03
+    out = asyncio.run(reg.run(name, _env("BOUNDED"), ctx={"deadline": d}))
+    assert out["data"]["deadline"] == d
+
+def test_expired_while_queued_is_not_run():
+    ex = ThreadExecutor("t-deadline-queued", 1)
+    release = threading.Event()
+    ran = []
+    handler = types.SimpleNamespace(run=lambda envelope, ctx=None, env=None: ran.append(envelope["n"]))
+
+    def block(envelope, ctx=None, env=None):
+        release.wait(5)
+
+    async def go():
+        busy = asyncio.ensure_future(ex.submit(block, {}))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(
+            ex.run_handler("t", handler, {"n": 1}, {"deadline": time.time() + 0.02}, None))
+        await asyncio.sleep(0.05)  # 대기열에 있는 동안 마감이 지남
+        release.set()
+        await busy
+        with pytest.raises(FrameworkError) as e:
+            await queued
+        return e.value
+
+    try:
+        err = asyncio.run(go())
+    finally:
+        ex.shutdown()
+
+    assert err.code == "ERR_TIMEOUT" and err.details["stage"] == "queued"
+    assert ran == []
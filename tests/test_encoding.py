@@ -0,0 +1,32 @@
+# /run 응답 인코딩 협상: msgpack 은 명시적으로 요청된 경우만, 압축은 q 값이 가장 높은 것, 작은 본문은 압축하지 않음
+import gzip
+import json
+
+from server import encoding
+from server.encoding import JSON, MSGPACK, encode_response, negotiate
+
+def test_json_by_default():
+    assert negotiate(None, None) == (JSON, None)
+    assert negotiate("*/*", "identity") == (JSON, None)
+
+def test_msgpack_only_when_asked_for():
+    want = MSGPACK if MSGPACK in encoding.ENCODERS else JSON
+    assert negotiate("application/x-msgpack", None)[0] == want
+    assert negotiate("application/json, application/msgpack;q=0.5", None)[0] == JSON
+
+def test_coding_follows_q_values():
+    assert negotiate(None, "gzip")[1] == "gzip"
+    assert negotiate(None, "gzip;q=0")[1] is None
+    assert negotiate(None, "br, *;q=0.1")[1] in encoding.COMPRESSORS
+
+def test_small_bodies_are_not_compressed():
+    r = encode_response({"ok": True}, {"accept-encoding": "gzip"})
+
+    assert "content-encoding" not in r.headers and json.loads(r.body) == {"ok": True}
+
+def test_large_bodies_are_compressed():
+    obj = {"ok": True, "data": {"s": "x" * (encoding.COMPRESS_MIN_BYTES * 2)}}
+    r = encode_response(obj, {"accept-encoding": "gzip"})
+
+    assert r.headers["content-encoding"] == "gzip" and r.headers["vary"] == "Accept, Accept-Encoding"
+    assert json.loads(gzip.decompress(r.body)) == obj
@@ -0,0 +1,47 @@
+# ProcessExecutor: 워커가 죽으면 그 요청만 실패하고 풀을 다시 띄워 다음 요청은 성공한다
+import asyncio
+import os
+import signal
+
+import pytest
+
+from core.errors import FrameworkError
+from core.executor import ProcessExecutor
+
+HANDLER = '''import os, time
+
+async def run(envelope, ctx=None, env=None):
+    time.sleep(envelope.get("input", {}).get("sleep", 0))
+    return {"ok": True, "mode": "SINGLE", "data": {"pid": os.getpid()}}
+'''
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    pkg = tmp_path / "mf_respawn_mod"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "handler.py").write_text(HANDLER)
+    monkeypatch.syspath_prepend(str(tmp_path))  # spawn 워커는 부모의 sys.path 를 물려받는다
+    ex = ProcessExecutor("test-respawn", "mf_respawn_mod", 1, {"cpu_seconds": 5})
+    yield ex
+    ex.shutdown()
+
+def _call(ex, sleep=0):
+    env = {"action": "RUN", "mode": "SINGLE", "input": {"sleep": sleep}}
+    return ex.run_handler("mf_respawn_mod", None, env, {}, {})
+
+def test_killed_worker_is_respawned(pool):
+    async def go():
+        pid = (await _call(pool))["data"]["pid"]
+        busy = asyncio.ensure_future(_call(pool, sleep=5))
+        await asyncio.sleep(0.3)
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(FrameworkError) as e:
+            await busy
+        assert e.value.code == "ERR_INTERNAL"
+        return pid, await _call(pool)
+
+    pid, out = asyncio.run(go())
+
+    assert pool.stats()["respawns"] == 1
+    assert out["ok"] and out["data"]["pid"] != pid
@@ -0,0 +1,58 @@
+# IncrementalEnvelopeParser: 청크 경계와 무관하게 같은 이벤트, inputs 항목은 하나씩, 잘못된 본문은 ValueError
+import json
+
+import pytest
+
+from core.jsonstream import IncrementalEnvelopeParser
+
+BODY = json.dumps({
+    "action": "ECHO", "mode": "BULK", "options": {"parallelism": 2},
+    "inputs": [{"n": 1, "s": "한글 ✓"}, {"n": 22.5}, [], {"nested": {"a": [1, 2]}}],
+}, ensure_ascii=False).encode("utf-8")
+
+def _parse(body: bytes, size: int, **kw):
+    p = IncrementalEnvelopeParser(**kw)
+    events = []
+    for i in range(0, len(body), size):
+        p.feed(body[i:i + size])
+        events.extend(p.events())
+    p.close()
+    events.extend(p.events())
+    return events
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(BODY)])
+def test_same_events_for_any_chunking(size):
+    events = _parse(BODY, size)
+
+    assert events == [
+        ("field", ("action", "ECHO")), ("field", ("mode", "BULK")), ("field", ("options", {"parallelism": 2})),
+        ("item", {"n": 1, "s": "한글 ✓"}), ("item", {"n": 22.5}), ("item", []), ("item", {"nested": {"a": [1, 2]}}),
+        ("end", None),
+    ]
+
+def test_items_are_yielded_before_the_body_ends():
+    p = IncrementalEnvelopeParser()
+    p.feed(b'{"action":"X","inputs":[{"n":1},{"n"')
+
+    assert list(p.events()) == [("field", ("action", "X")), ("item", {"n": 1})]
+
+def test_number_split_at_chunk_boundary_is_not_truncated():
+    assert ("item", 12345) in _parse(b'{"inputs":[12345]}', 13)
+
+def test_empty_inputs():
+    assert _parse(b'{"action":"X","inputs":[]}', 4) == [("field", ("action", "X")), ("end", None)]
+
+@pytest.mark.parametrize("body, msg", [
+    (b'{"inputs":[1],"action":"X"}', "must precede 'inputs'"),
+    (b'{"inputs":[1,2', "unexpected end"),
+    (b'{"inputs":[1 2]}', "expected ','"),
+    (b'{"a":1} {}', "trailing data"),
+    (b'[1]', "expected '{'"),
+])
+def test_malformed_bodies(body, msg):
+    with pytest.raises(ValueError, match=msg):
+        _parse(body, 3)
+
+def test_oversized_item_is_rejected():
+    with pytest.raises(ValueError, match="exceeds"):
+        _parse(b'{"inputs":["' + b"x" * 200 + b'"]}', 16, max_value_chars=64)
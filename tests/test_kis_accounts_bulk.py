@@ -0,0 +1,108 @@
+# kis.accounts BULK: 계좌별 부분 실패, appkey 당 동시 실행 상한, 포트폴리오 합계
+import asyncio
+
+from core.errors import err_secret
+from modules.broker.kis.accounts import handler
+
+def _account(no, cash, positions):
+    eval_amount = cash + sum(int(p["qty"] * p["eval_price"]) for p in positions)
+    return {"account_no": no, "cash": cash, "eval_amount": eval_amount,
+            "pnl": sum(p["pnl"] for p in positions), "positions": positions}
+
+def _pos(symbol, qty, avg_price, eval_price, pnl):
+    return {"symbol": symbol, "qty": qty, "avg_price": avg_price, "eval_price": eval_price, "pnl": pnl}
+
+ACCOUNTS = {
+    "A": _account("A", 1_000, [_pos("005930", 10, 70000, 72000, 20000), _pos("000660", 5, 120000, 118000, -10000)]),
+    "B": _account("B", 500, [_pos("005930", 4, 71000, 72000, 4000)]),
+}
+
+def _bulk(inputs, options=None):
+    env = {"action": "SUMMARY", "mode": "BULK", "inputs": inputs, "options": options or {}}
+    return asyncio.run(handler._bulk("u1", env, {"user_id": "u1"}))
+
+def test_partial_failure(monkeypatch):
+    async def summary(uid, ctx=None, item=None):
+        if item["account_no"] == "X":
+            raise err_secret("KIS app key/secret/account not set")
+        return ACCOUNTS[item["account_no"]]
+    monkeypatch.setattr(handler, "_summary", summary)
+
+    out = _bulk([{"account_no": "A"}, {"account_no": "X"}, {"account_no": "B"}])
+
+    assert out["ok"] is False and out["partial_ok"] is True
+    assert [r["ok"] for r in out["results"]] == [True, False, True]
+    assert [r["index"] for r in out["results"]] == [0, 1, 2]
+    assert out["results"][1]["error"]["code"] == "ERR_SECRET"
+    assert out["data"]["accounts"] == 3 and out["data"]["ok_accounts"] == 2
+
+def test_all_failed_is_not_partial(monkeypatch):
+    async def summary(uid, ctx=None, item=None):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(handler, "_summary", summary)
+
+    out = _bulk([{"account_no": "A"}, {"account_no": "B"}])
+
+    assert out["ok"] is False and out["partial_ok"] is False
+    assert {r["error"]["code"] for r in out["results"]} == {"ERR_INTERNAL"}
+    assert out["data"]["ok_accounts"] == 0 and out["data"]["eval_amount"] == 0
+
+def test_per_appkey_cap(monkeypatch):
+    running, peak = {}, {}
+
+    async def summary(uid, ctx=None, item=None):
+        k = item.get("app_key") or ""
+        running[k] = running.get(k, 0) + 1
+        peak[k] = max(peak.get(k, 0), running[k])
+        await asyncio.sleep(0.01)
+        running[k] -= 1
+        return ACCOUNTS["B"]
+    monkeypatch.setattr(handler, "_summary", summary)
+
+    inputs = [{"app_key": "K1", "account_no": "B"}] * 6 + [{"app_key": "K2", "account_no": "B"}] * 3 + [{}] * 3
+    out = _bulk(inputs, {"parallelism": 2})
+
+    assert out["ok"] is True
+    assert peak == {"K1": 2, "K2": 2, "": 2}  # 키마다 따로 상한, 서로 막지 않음
+
+def test_default_cap(monkeypatch):
+    running, peak = [0], [0]
+
+    async def summary(uid, ctx=None, item=None):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return ACCOUNTS["B"]
+    monkeypatch.setattr(handler, "_summary", summary)
+    monkeypatch.setattr(handler, "PER_APPKEY_CONCURRENCY", 3)
+
+    _bulk([{"app_key": "K1", "account_no": "B"}] * 8)
+
+    assert peak[0] == 3
+
+def test_portfolio_totals():
+    results = [{"ok": True, "index": 0, "data": ACCOUNTS["A"]},
+               {"ok": False, "index": 1, "error": {"code": "ERR_TIMEOUT", "message": "t"}},
+               {"ok": True, "index": 2, "data": ACCOUNTS["B"]}]
+
+    out = handler._portfolio(results)
+
+    a, b = ACCOUNTS["A"], ACCOUNTS["B"]
+    assert out["accounts"] == 3 and out["ok_accounts"] == 2
+    assert out["cash"] == 1_500
+    assert out["eval_amount"] == a["eval_amount"] + b["eval_amount"]
+    assert out["pnl"] == 20000 - 10000 + 4000
+    by_sym = {p["symbol"]: p for p in out["positions"]}
+    assert by_sym["005930"]["qty"] == 14 and by_sym["005930"]["pnl"] == 24000
+    assert by_sym["005930"]["eval_amount"] == 14 * 72000
+    assert by_sym["000660"]["qty"] == 5
+    assert [r["index"] for r in out["by_account"]] == [0, 2]
+    assert abs(sum(r["weight"] for r in out["by_account"]) - 1.0) < 1e-9
+    assert out["by_account"][1]["weight"] == b["eval_amount"] / out["eval_amount"]
+
+def test_portfolio_no_successful_accounts():
+    out = handler._portfolio([{"ok": False, "index": 0, "error": {"code": "ERR_SECRET", "message": "x"}}])
+
+    assert out == {"accounts": 1, "ok_accounts": 0, "cash": 0, "eval_amount": 0, "pnl": 0,
+                   "positions": [], "by_account": []}
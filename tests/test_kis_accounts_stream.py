@@ -0,0 +1,57 @@
+# kis.accounts 스트리밍: 비밀 저장소 조회는 offload 로, 마지막 ResultItem 은 출력 스키마로 검증
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from core.registry import Registry
+from core.schema import compile_schema
+from modules.broker.kis.accounts import handler
+
+def _collect(agen):
+    async def go():
+        return [r async for r in agen]
+    return asyncio.run(go())
+
+def test_stream_offloads_secret_lookups(monkeypatch):
+    calls = []
+    loop_thread = []
+
+    def creds(uid, item=None):
+        calls.append(("creds", threading.current_thread() is not loop_thread[0]))
+        return None
+
+    def mock(uid):
+        calls.append(("mock", threading.current_thread() is not loop_thread[0]))
+        return {"account_no": "00000000-01", "cash": 0, "eval_amount": 0, "pnl": 0, "positions": []}
+
+    monkeypatch.setattr(handler, "_creds", creds)
+    monkeypatch.setattr(handler, "_mock", mock)
+
+    async def offload(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def go():
+        loop_thread.append(threading.current_thread())
+        env = {"action": "SUMMARY", "mode": "BULK", "inputs": [{}]}
+        return [r async for r in handler.stream(env, ctx={"user_id": "u1"}, offload=offload)]
+
+    out = asyncio.run(go())
+
+    assert out[0]["ok"] is True and out[0]["data"]["account_no"] == "00000000-01"
+    assert calls == [("creds", True), ("mock", True)]
+
+def test_validated_checks_final_items_only():
+    schema = {"type": "object", "properties": {"cash": {"type": "integer"}}, "required": ["cash"]}
+    plan = SimpleNamespace(v_out=compile_schema(schema))
+
+    async def items():
+        yield {"index": 0, "partial": True, "data": {"page": 1, "positions": []}}
+        yield {"ok": True, "index": 0, "data": {"cash": 1}}
+        yield {"ok": True, "index": 1, "data": {"cash": "x"}}
+        yield {"ok": False, "index": 2, "error": {"code": "ERR_SECRET", "message": "m"}}
+
+    out = _collect(Registry._validated(plan, items()))
+
+    assert out[0]["partial"] and out[1]["ok"]
+    assert out[2]["ok"] is False and out[2]["error"]["code"] == "ERR_SCHEMA" and out[2]["index"] == 1
+    assert out[3]["error"]["code"] == "ERR_SECRET"
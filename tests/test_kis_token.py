@@ -0,0 +1,96 @@
+# KIS 토큰 캐시: appkey 가 같아도 secret 이 다르면 다른 호출자의 토큰을 쓰지 않는다
+import asyncio
+
+import pytest
+
+from core import diskcache
+from modules.broker.kis import _client, _token
+from modules.broker.kis.accounts import handler
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        return self._body
+
+@pytest.fixture
+def kis(monkeypatch, tmp_path):
+    minted = []
+
+    async def post(url, json=None, **kw):
+        minted.append(json["appsecret"])
+        return _Resp({"access_token": "tok-" + json["appsecret"], "expires_in": 86400})
+
+    monkeypatch.setattr(_client, "post", post)
+    monkeypatch.setattr(diskcache, "_DEFAULT", diskcache.DiskCache(str(tmp_path / "cache.db")))
+    monkeypatch.setattr(_token, "TOKENS", _token.TokenManager())
+    monkeypatch.setattr(handler, "TOKENS", _token.TOKENS)
+    return minted
+
+def test_wrong_secret_does_not_reuse_token(kis):
+    async def go():
+        t = _token.TOKENS
+        a = await t.get("AK", "secret", True)
+        b = await t.get("AK", "secret", True)
+        c = await t.get("AK", "guess", True)
+        return a, b, c
+
+    a, b, c = asyncio.run(go())
+
+    assert a == ("tok-secret", "network") and b == ("tok-secret", "memory")
+    assert c == ("tok-guess", "network")
+    assert kis == ["secret", "guess"]
+
+def test_disk_lookup_is_keyed_on_secret(kis):
+    async def go():
+        await _token.TOKENS.get("AK", "secret", True)
+        _token.TOKENS.clear()  # 재시작한 워커처럼 메모리만 비움
+        return await _token.TOKENS.get("AK", "guess", True), await _token.TOKENS.get("AK", "secret", True)
+
+    guess, own = asyncio.run(go())
+
+    assert guess == ("tok-guess", "network")
+    assert own == ("tok-secret", "disk")
+
+def test_bulk_item_with_foreign_app_key_needs_its_secret(kis, monkeypatch):
+    monkeypatch.setattr(handler, "_conf", lambda uid: ("MY_AK", "my-secret", True, "", None))
+    monkeypatch.setattr(handler.secret_store, "get_user_secrets",
+                        lambda uid, keys: {k: None for k in keys})
+
+    async def go():
+        await _token.TOKENS.get("VICTIM_AK", "victim-secret", True)  # 피해자 토큰이 캐시에 있음
+        no_secret = await handler._source("u1", {}, {"app_key": "VICTIM_AK", "account_no": "1"})
+        wrong = await handler._source("u1", {}, {"app_key": "VICTIM_AK", "app_secret": "x", "account_no": "1"})
+        return no_secret, wrong
+
+    no_secret, wrong = asyncio.run(go())
+
+    assert no_secret is None
+    assert wrong[1][1] == "tok-x"
+
+def test_legacy_file_needs_matching_appkey(kis, tmp_path):
+    legacy = tmp_path / "kist_u1.json"
+    legacy.write_text('{"access_token": "old-key-token", "exp": 9999999999}', encoding="utf-8")
+
+    async def go():
+        return await _token.TOKENS.get("NEW_AK", "s", True, legacy_file=str(legacy))
+
+    assert asyncio.run(go()) == ("tok-s", "network")  # appkey 가 기록되지 않은 옛 파일은 쓰지 않음
+
+    legacy.write_text('{"access_token": "legacy", "exp": 9999999999, "appkey": "NEW_AK"}', encoding="utf-8")
+    _token.TOKENS.clear()
+    assert asyncio.run(_token.TOKENS.get("OTHER_AK", "s", True, legacy_file=str(legacy)))[1] == "network"
+    assert asyncio.run(_token.TOKENS.get("NEW_AK", "s2", True, legacy_file=str(legacy))) == ("legacy", "disk")
+
+def test_get_sync_shares_the_cache(kis):
+    assert _token.TOKENS.get_sync("AK", "secret", True) == ("tok-secret", "network")
+    assert _token.TOKENS.get_sync("AK", "secret", True) == ("tok-secret", "memory")
+    assert kis == ["secret"]
+
+    async def on_loop():
+        with pytest.raises(RuntimeError):
+            _token.TOKENS.get_sync("AK", "secret", True)
+    asyncio.run(on_loop())
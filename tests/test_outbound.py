@@ -0,0 +1,102 @@
+# 송신 limiter: INTERACTIVE 가 BACKGROUND 보다 먼저, 대기 상한/대기열 상한은 ERR_RATE_LIMIT, KIS 는 appkey x 호스트별로 공유
+import asyncio
+import time
+
+import pytest
+
+from core.errors import FrameworkError
+from core.outbound import BACKGROUND, INTERACTIVE, OutboundLimiter
+from modules.broker.kis import _client
+
+def test_interactive_is_served_before_background():
+    lim = OutboundLimiter("t.prio", rate=20, burst=1)
+    order = []
+
+    async def take(tag, priority):
+        await lim.acquire(priority)
+        order.append(tag)
+
+    async def go():
+        await lim.acquire()  # 버킷을 비운다
+        bg = [asyncio.ensure_future(take(f"bg{i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0)
+        fg = asyncio.ensure_future(take("fg", INTERACTIVE))
+        await asyncio.gather(fg, *bg)
+
+    asyncio.run(go())
+
+    assert order == ["fg", "bg0", "bg1"]
+    assert lim.stats()["waited"] == 3 and lim.stats()["queued"] == 0
+
+def test_wait_past_max_wait_is_rejected_and_the_token_is_not_lost():
+    lim = OutboundLimiter("t.wait", rate=10, burst=1)
+
+    async def go():
+        await lim.acquire()
+        with pytest.raises(FrameworkError) as e:
+            await lim.acquire(max_wait=0.01)
+        t0 = time.monotonic()
+        await lim.acquire()  # 포기한 대기자 몫의 토큰은 다음 호출이 쓴다
+        return e.value, time.monotonic() - t0
+
+    err, waited = asyncio.run(go())
+
+    assert err.code == "ERR_RATE_LIMIT" and lim.stats()["timeouts"] == 1
+    assert waited < 0.2
+
+def test_deadline_shorter_than_max_wait_is_a_timeout():
+    lim = OutboundLimiter("t.deadline", rate=1, burst=1)
+
+    async def go():
+        await lim.acquire()
+        await lim.acquire(ctx={"deadline": time.time() + 0.02})
+
+    with pytest.raises(FrameworkError) as e:
+        asyncio.run(go())
+    assert e.value.code == "ERR_TIMEOUT"
+
+def test_full_queue_is_rejected():
+    lim = OutboundLimiter("t.full", rate=1, burst=1, max_queue=1)
+
+    async def go():
+        await lim.acquire()
+        waiting = asyncio.ensure_future(lim.acquire(max_wait=0.05))
+        await asyncio.sleep(0)
+        try:
+            await lim.acquire()
+        finally:
+            with pytest.raises(FrameworkError):
+                await waiting
+
+    with pytest.raises(FrameworkError) as e:
+        asyncio.run(go())
+    assert e.value.code == "ERR_RATE_LIMIT" and lim.stats()["rejected"] == 1
+
+def test_kis_limiter_is_shared_per_appkey_and_host():
+    a = _client.limiter("AK-shared", _client.PROD_BASE)
+
+    assert _client.limiter("AK-shared", _client.PROD_BASE) is a
+    assert _client.limiter("AK-shared", _client.VTS_BASE) is not a
+    assert _client.limiter("AK-other", _client.PROD_BASE) is not a
+    assert "AK-shared" not in a.name  # 이름에는 appkey 해시만
+
+class _Resp:
+    def __init__(self, status, content=b"{}"):
+        self.status_code = status
+        self.content = content
+
+def test_upstream_throttle_penalizes_and_retries(monkeypatch):
+    replies = [_Resp(500, b'{"msg_cd":"EGW00201"}'), _Resp(200)]
+
+    class _Fake:
+        async def request(self, method, url, **kw):
+            return replies.pop(0)
+
+    monkeypatch.setattr(_client, "_async_client", lambda origin: _Fake())
+    monkeypatch.setattr(_client, "RPS_PROD", 1000.0)
+    url = _client.PROD_BASE + "/uapi/x"
+
+    r = asyncio.run(_client.get(url, headers={"appkey": "AK-throttle"}))
+
+    assert r.status_code == 200 and replies == []
+    assert _client.limiter("AK-throttle", _client.PROD_BASE).stats()["throttled"] == 1
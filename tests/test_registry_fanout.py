@@ -0,0 +1,59 @@
+# Registry BULK fan-out(SINGLE 전용 액션 + options.auto_fanout): 결과는 index 순서, continue_on_error 가 아니면 첫 실패 후 새 항목을 시작하지 않음
+import asyncio
+
+import pytest
+
+HANDLER = '''
+import asyncio
+
+SEEN = []
+
+async def run(envelope, ctx=None, env=None):
+    n = envelope["input"]["n"]
+    SEEN.append(n)
+    await asyncio.sleep(envelope["input"].get("sleep", 0))
+    if n < 0:
+        return {"ok": False, "mode": "SINGLE", "error": {"code": "ERR_MODULE", "message": "negative"}}
+    return {"ok": True, "mode": "SINGLE", "data": {"n": n}}
+'''
+
+@pytest.fixture
+def mod(tmp_modules):
+    name = tmp_modules.add("t.fanout", {"ECHO": {"modes": ["SINGLE"]}}, HANDLER)
+    return tmp_modules.reg, name
+
+def _bulk(reg, name, inputs, **opts):
+    env = {"action": "ECHO", "mode": "BULK", "inputs": inputs, "options": {"auto_fanout": True, **opts}}
+    return asyncio.run(reg.run(name, env))
+
+def test_results_come_back_in_input_order(mod):
+    reg, name = mod
+    # 앞 항목일수록 늦게 끝난다
+    out = _bulk(reg, name, [{"n": i, "sleep": 0.05 - i * 0.01} for i in range(5)], parallelism=5)
+
+    assert out["ok"] and out["metrics"]["parallelism"] == 5
+    assert [r["index"] for r in out["results"]] == [0, 1, 2, 3, 4]
+    assert [r["data"]["n"] for r in out["results"]] == [0, 1, 2, 3, 4]
+
+def test_first_failure_stops_new_items(mod):
+    reg, name = mod
+    out = _bulk(reg, name, [{"n": 0}, {"n": -1}, {"n": 2}, {"n": 3}], parallelism=1)
+
+    assert out["ok"] is False and out["partial_ok"] is True
+    assert [(r["index"], r["ok"]) for r in out["results"]] == [(0, True), (1, False)]
+    assert out["metrics"]["skipped"] == 2 and reg.load(name).module.SEEN == [0, -1]
+
+def test_continue_on_error_runs_every_item(mod):
+    reg, name = mod
+    out = _bulk(reg, name, [{"n": 0}, {"n": -1}, {"n": 2}], parallelism=1, continue_on_error=True)
+
+    assert [(r["index"], r["ok"]) for r in out["results"]] == [(0, True), (1, False), (2, True)]
+    assert out["results"][1]["error"]["code"] == "ERR_MODULE"
+    assert out["partial_ok"] is True and out["metrics"]["items"] == 3
+
+def test_bulk_without_auto_fanout_is_rejected(mod):
+    from core.errors import FrameworkError
+    reg, name = mod
+    with pytest.raises(FrameworkError) as e:
+        asyncio.run(reg.run(name, {"action": "ECHO", "mode": "BULK", "inputs": [{"n": 1}]}))
+    assert e.value.code == "ERR_UNSUPPORTED_MODE"
@@ -0,0 +1,65 @@
+# /run/batch: 항목 수 상한, 항목별 오류는 해당 줄에만, 동시 실행은 BATCH_PARALLELISM 까지, 마지막 줄은 {"done": true}
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.interceptor import build_pipeline
+from server import main
+
+HANDLER = '''
+import asyncio
+
+ACTIVE = [0, 0]  # (현재, 최대)
+
+async def run(envelope, ctx=None, env=None):
+    ACTIVE[0] += 1
+    ACTIVE[1] = max(ACTIVE)
+    await asyncio.sleep(0.02)
+    ACTIVE[0] -= 1
+    return {"ok": True, "mode": "SINGLE", "data": {"request_id": (ctx or {}).get("request_id")}}
+'''
+
+@pytest.fixture
+def client(tmp_modules, monkeypatch):
+    name = tmp_modules.add("t.batch", {"ECHO": {"modes": ["SINGLE"]}}, HANDLER)
+    monkeypatch.setattr(main, "registry", tmp_modules.reg)
+    monkeypatch.setattr(main, "pipeline", build_pipeline(tmp_modules.reg))
+    return TestClient(main.app), name, tmp_modules
+
+def _entry(name, action="ECHO"):
+    return {"name": name, "envelope": {"action": action, "mode": "SINGLE", "input": {}}}
+
+def _lines(r):
+    return [json.loads(line) for line in r.text.splitlines()]
+
+def test_entry_count_limits(client, monkeypatch):
+    c, name, _ = client
+    monkeypatch.setattr(main, "BATCH_MAX_ENTRIES", 3)
+
+    r = c.post("/run/batch", json={"entries": []})
+    assert r.status_code == 400 and r.json()["error"]["code"] == "ERR_SCHEMA"
+    r = c.post("/run/batch", json={"entries": [_entry(name)] * 4})
+    assert r.status_code == 400 and r.json()["error"]["details"] == {"max": 3, "got": 4}
+    assert c.post("/run/batch", json={"entries": [_entry(name)] * 3}).status_code == 200
+
+def test_entry_errors_stay_on_their_line(client):
+    c, name, _ = client
+    r = c.post("/run/batch", json=[_entry(name), {"envelope": {}}, _entry(name, "NOPE")],
+               headers={"X-Request-ID": "req"})
+
+    lines = _lines(r)
+    by_index = {l["index"]: l for l in lines[:-1]}
+    assert by_index[0]["status"] == 200 and by_index[0]["result"]["data"]["request_id"] == "req:0"
+    assert by_index[1]["status"] == 400
+    assert by_index[2]["status"] == 400 and by_index[2]["result"]["error"]["code"] == "ERR_SCHEMA"
+    assert lines[-1] == {"done": True, "count": 3, "ok": False}
+
+def test_parallelism_is_bounded(client, monkeypatch):
+    c, name, mods = client
+    monkeypatch.setattr(main, "BATCH_PARALLELISM", 2)
+
+    lines = _lines(c.post("/run/batch", json={"entries": [_entry(name)] * 6}))
+
+    assert lines[-1] == {"done": True, "count": 6, "ok": True}
+    assert mods.reg.load(name).module.ACTIVE[1] == 2
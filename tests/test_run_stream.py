@@ -0,0 +1,61 @@
+# /run BULK 스트리밍: Accept 로 NDJSON/SSE 선택, 항목 레코드 뒤에 {"done": true, ...} trailer, 시작 전 오류는 일반 JSON
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.interceptor import build_pipeline
+from server import main
+
+HANDLER = '''
+async def run(envelope, ctx=None, env=None):
+    n = envelope["input"]["n"]
+    if n < 0:
+        return {"ok": False, "mode": "SINGLE", "error": {"code": "ERR_MODULE", "message": "negative"}}
+    return {"ok": True, "mode": "SINGLE", "data": {"n": n}}
+'''
+
+@pytest.fixture
+def client(tmp_modules, monkeypatch):
+    name = tmp_modules.add("t.stream", {"ECHO": {"modes": ["SINGLE"]}}, HANDLER)
+    monkeypatch.setattr(main, "registry", tmp_modules.reg)
+    monkeypatch.setattr(main, "pipeline", build_pipeline(tmp_modules.reg))
+    return TestClient(main.app), name
+
+def _bulk(*ns):
+    return {"action": "ECHO", "mode": "BULK", "inputs": [{"n": n} for n in ns],
+            "options": {"auto_fanout": True, "continue_on_error": True}}
+
+def test_ndjson_items_then_trailer(client):
+    c, name = client
+    r = c.post(f"/run?name={name}", json=_bulk(1, -1, 3), headers={"Accept": "application/x-ndjson"})
+
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    recs = [json.loads(line) for line in r.text.splitlines()]
+    items, trailer = recs[:-1], recs[-1]
+    assert sorted((i["index"], i["ok"]) for i in items) == [(0, True), (1, False), (2, True)]
+    assert trailer["done"] is True and trailer["ok"] is False and trailer["partial_ok"] is True
+    assert trailer["metrics"]["items"] == 3 and trailer["metrics"]["failed"] == 1
+
+def test_sse_frames(client):
+    c, name = client
+    r = c.post(f"/run?name={name}", json=_bulk(1, 2), headers={"Accept": "text/event-stream"})
+
+    assert r.headers["content-type"].startswith("text/event-stream")
+    frames = [f for f in r.text.split("\n\n") if f]
+    assert [f.split("\n")[0] for f in frames] == ["event: item", "event: item", "event: done"]
+    done = json.loads(frames[-1].split("\n")[1][len("data: "):])
+    assert done["ok"] is True and done["partial_ok"] is False
+
+def test_plain_json_without_stream_accept(client):
+    c, name = client
+    body = c.post(f"/run?name={name}", json=_bulk(1, 2)).json()
+
+    assert body["mode"] == "BULK" and [r["index"] for r in body["results"]] == [0, 1]
+
+def test_error_before_stream_is_plain_json(client):
+    c, name = client
+    r = c.post(f"/run?name={name}", json={**_bulk(1), "action": "NOPE"}, headers={"Accept": "application/x-ndjson"})
+
+    assert r.headers["content-type"].startswith("application/json")
+    assert r.json()["error"]["code"] == "ERR_SCHEMA"
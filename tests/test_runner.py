@@ -0,0 +1,43 @@
+# core.runner: 공용 Registry(server.main 과 같은 인스턴스)로 실행하고, 시크릿은 ctx 가 아닌 env 로 넘긴다
+import asyncio
+
+import pytest
+
+from core import registry, runner
+from core.contract import Context, InEnvelope
+
+HANDLER = '''
+CALLS = []
+
+async def run(envelope, ctx=None, env=None):
+    CALLS.append(1)
+    return {"ok": True, "mode": "SINGLE",
+            "data": {"ctx_keys": sorted(ctx or {}), "secret": (env or {}).get("secrets", {}).get("T_SECRET")}}
+'''
+
+@pytest.fixture
+def mod(tmp_modules, monkeypatch):
+    monkeypatch.setattr(registry, "_DEFAULT", tmp_modules.reg)
+    monkeypatch.setenv("T_SECRET", "s3cr3t")
+    return tmp_modules.add("t.runner", {
+        "ECHO": {"modes": ["SINGLE"], "secrets": ["T_SECRET"],
+                 "cache": {"ttl": 30, "key": ["input"], "max_entries": 8}},
+    }, HANDLER)
+
+def test_secrets_go_to_env_not_ctx(mod):
+    out = runner.execute(mod, InEnvelope(action="ECHO", input={"n": 1}), Context(request_id="r1"))
+
+    assert out.ok and out.data["secret"] == "s3cr3t"
+    assert "secrets" not in out.data["ctx_keys"]
+
+def test_runner_and_server_path_share_plans(mod):
+    runner.execute(mod, InEnvelope(action="ECHO", input={"n": 2}), Context())
+    out = asyncio.run(registry.default_registry().run(mod, {"action": "ECHO", "mode": "SINGLE", "input": {"n": 2}}))
+
+    assert out["ok"]
+    assert len(registry.default_registry().load(mod).module.CALLS) == 1  # 두 번째는 같은 계획의 캐시
+
+def test_server_uses_the_default_registry():
+    from server import main
+
+    assert main.registry is registry.default_registry()
@@ -0,0 +1,55 @@
+# 비밀 저장소: 읽는 중 끼어든 쓰기, 손상된 이전 저장소(secrets.enc) 이전
+import threading
+
+import pytest
+
+from core import secret_store as ss
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(ss, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(ss, "KEY_PATH", str(tmp_path / ".secrets_key"))
+    monkeypatch.setattr(ss, "DB_PATH", str(tmp_path / "secrets.db"))
+    monkeypatch.setattr(ss, "STORE_PATH", str(tmp_path / "secrets.enc"))
+    monkeypatch.setattr(ss, "_ready", False)
+    monkeypatch.setattr(ss, "_tls", threading.local())
+    ss._plain.clear()
+    yield tmp_path
+    ss._plain.clear()
+
+def test_write_during_read_is_not_cached(monkeypatch):
+    ss.set_user_secrets("u1", {"KIS_APP_KEY": "old"})
+    ss._plain.clear()
+    decrypt = ss._decrypt
+    fired = []
+
+    def racing(f, token):
+        if not fired:
+            fired.append(1)  # SELECT 이후, 캐시에 넣기 전에 다른 스레드가 씀
+            t = threading.Thread(target=ss.set_user_secret, args=("u1", "KIS_APP_KEY", "new"))
+            t.start()
+            t.join()
+        return decrypt(f, token)
+    monkeypatch.setattr(ss, "_decrypt", racing)
+
+    assert ss.get_user_secret("u1", "KIS_APP_KEY") == "old"
+    assert "u1" not in ss._plain
+    assert ss.get_user_secret("u1", "KIS_APP_KEY") == "new"
+
+def test_corrupt_legacy_store_is_not_dropped(store):
+    legacy = store / "secrets.enc"
+    legacy.write_text("{broken", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        ss.get_user_secret("u1", "KIS_APP_KEY")
+    assert legacy.exists() and ss._ready is False
+
+    legacy.unlink()
+    assert ss.get_user_secret("u1", "KIS_APP_KEY") is None and ss._ready is True
+
+def test_compact_reports_sizes():
+    ss.set_user_secrets("u1", {"a": "1", "b": "2"})
+
+    out = ss.compact()
+
+    assert set(out) == {"bytes_before", "bytes_after"} and out["bytes_after"] > 0
@@ -0,0 +1,79 @@
+# single-flight(coalesce): 같은 키의 동시 호출은 실행 1개를 공유, 합류한 호출은 자기 마감까지만 기다린다
+import asyncio
+import time
+
+import pytest
+
+from core.errors import FrameworkError
+from core.singleflight import SingleFlight
+
+HANDLER = '''
+import asyncio
+
+CALLS = []
+
+async def run(envelope, ctx=None, env=None):
+    CALLS.append((ctx or {}).get("user_id"))
+    await asyncio.sleep(0.05)
+    return {"ok": True, "mode": "SINGLE", "data": {"n": len(CALLS)}}
+'''
+
+@pytest.fixture
+def mod(tmp_modules):
+    name = tmp_modules.add("t.flight", {"GET": {"modes": ["SINGLE"], "coalesce": {"key": ["user_id"]}}}, HANDLER)
+    return tmp_modules.reg, name
+
+def test_identical_concurrent_calls_share_one_run(mod):
+    reg, name = mod
+    env = {"action": "GET", "mode": "SINGLE", "input": {}}
+
+    async def go():
+        return await asyncio.gather(
+            *(reg.run(name, env, ctx={"user_id": "u1"}) for _ in range(5)),
+            reg.run(name, env, ctx={"user_id": "u2"}),
+        )
+
+    outs = asyncio.run(go())
+
+    assert sorted(reg.load(name).module.CALLS) == ["u1", "u2"]
+    assert all(o is outs[0] for o in outs[:5]) and outs[5] is not outs[0]
+    stats = reg.get_plan(name, "GET").flight.stats()
+    assert stats["leaders"] == 2 and stats["joined"] == 4 and stats["inflight"] == 0
+
+def test_joiner_waits_only_until_its_own_deadline():
+    flight = SingleFlight("t.flight.deadline", True)
+    runs = []
+
+    async def slow():
+        runs.append(1)
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    async def go():
+        leader = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(FrameworkError) as e:
+            await flight.do("k", slow, {"deadline": time.time() + 0.02})
+        return e.value, await leader
+
+    err, out = asyncio.run(go())
+
+    assert err.code == "ERR_TIMEOUT" and err.details["stage"] == "coalesce"
+    assert out == {"ok": True} and runs == [1]  # 포기한 호출이 있어도 실행은 1번, 리더는 결과를 받음
+
+def test_cancelled_leader_does_not_cancel_the_run():
+    flight = SingleFlight("t.flight.cancel", True)
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def go():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await joiner
+
+    assert asyncio.run(go()) == "done"
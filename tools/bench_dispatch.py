@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: /run 디스패치 오버헤드(Pipeline.pre + Registry.run) — 이전 방식 vs ActionPlan
+Usage:
+    python tools/bench_dispatch.py
+    python tools/bench_dispatch.py -n 20000 --module modules.common.ping --action PING
+이전 방식은 기존 코드 경로(f-string 키, get_action_spec 반복 조회, 매 호출 jsonschema.validate)를 그대로 재현한다.
+"""
+import argparse, asyncio, json, os, sys, time
+from jsonschema import validate as jsonschema_validate
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+
+from core.registry import Registry
+from core.interceptor import build_pipeline, TokenBucket, CircuitBreaker
+
+def _legacy(registry: Registry):
+    buckets, circuits = {}, {}
+
+    def pre(headers, payload, module_name):
+        action = payload.get("action")
+        provided = set((headers.get("X-Scopes") or "").split())
+        required = set((registry.get_action_spec(module_name, action) or {}).get("required_scopes") or [])
+        if required and not required.issubset(provided):
+            raise RuntimeError("scopes")
+        secrets = (registry.get_action_spec(module_name, action) or {}).get("secrets") or []
+        if [s for s in secrets if not os.environ.get(s)]:
+            raise RuntimeError("secrets")
+        spec = registry.get_action_spec(module_name, action) or {}
+        res = spec.get("resources") or {}
+        key = f"{module_name}:{action}"
+        if key not in buckets:
+            buckets[key] = TokenBucket(float(res.get("rps", 50)), int(res.get("burst", 100)))
+        if key not in circuits:
+            circuits[key] = CircuitBreaker()
+        circuits[key].allowed()
+        buckets[key].allow()
+        return {"scopes": list(provided)}, {"start_ts": time.time(), "module": module_name, "action": action}
+
+    async def run(module_name, envelope, ctx=None, env=None):
+        mani = registry.get_manifest(module_name)
+        handler = registry._load_handler(module_name)
+        action = envelope.get("action")
+        if action not in mani.get("actions", {}):
+            raise RuntimeError("action")
+        if envelope.get("mode", "SINGLE") not in mani["actions"][action].get("modes", ["SINGLE"]):
+            raise RuntimeError("mode")
+        sch_in = registry._schemas.get((module_name, action, "in"))
+        if sch_in is not None:
+            jsonschema_validate(envelope.get("input", {}), sch_in)
+        result = await handler.run(envelope, ctx=ctx, env=env)
+        sch_out = registry._schemas.get((module_name, action, "out"))
+        if sch_out is not None and "data" in result:
+            jsonschema_validate(result.get("data", {}), sch_out)
+        return result
+
+    return pre, run
+
+async def _loop(pre, run, module, envelope, n):
+    headers = {"X-Request-ID": "bench"}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        ctx, env = pre(headers, envelope, module)
+        await run(module, envelope, ctx=ctx, env=env)
+    return (time.perf_counter() - t0) / n * 1e6
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=5000)
+    p.add_argument("--module", default="modules.common.ping")
+    p.add_argument("--action", default="PING")
+    p.add_argument("--input", default='{"echo": "hi"}')
+    args = p.parse_args()
+    envelope = {"action": args.action, "mode": "SINGLE", "input": json.loads(args.input)}
+
+    reg_old = Registry()
+    pre_old, run_old = _legacy(reg_old)
+    reg_new = Registry()
+    pipe = build_pipeline(reg_new)
+    bucket = reg_new.get_plan(args.module, args.action).bucket
+    bucket.rate = bucket.capacity = bucket.tokens = float("inf")  # 벤치 중 레이트리밋 해제
+
+    before = asyncio.run(_loop(pre_old, run_old, args.module, envelope, args.n))
+    after = asyncio.run(_loop(pipe.pre, reg_new.run, args.module, envelope, args.n))
+    print(json.dumps({
+        "module": args.module, "action": args.action, "n": args.n,
+        "before_us_per_req": round(before, 2),
+        "after_us_per_req": round(after, 2),
+        "speedup": round(before / after, 1) if after else None,
+    }, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
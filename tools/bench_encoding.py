@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: /run 응답 인코딩 — 인코딩 시간과 전송 바이트(표준 json vs orjson / msgpack, gzip / zstd)
+Usage:
+    python tools/bench_encoding.py
+    python tools/bench_encoding.py -n 500 --bulk 2000
+대표 봉투: demo.accounts LIST, KIS SUMMARY(positions 다수), ping BULK 결과.
+기준(json_stdlib)은 기존 JSONResponse 와 같은 json.dumps(ensure_ascii=False) 이다.
+"""
+import argparse, json, os, sys, time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from server import encoding
+
+def _envelopes(bulk: int):
+    accounts = {"ok": True, "mode": "SINGLE", "data": {"accounts": [
+        {"account_id": f"acc-{i:03d}", "owner": f"user{i}", "bank": "001", "balance": 5_000_000 + i * 1234}
+        for i in range(50)
+    ]}}
+    summary = {"ok": True, "mode": "SINGLE", "data": {
+        "account_no": "12345678-01", "cash": 3_000_000, "eval_amount": 41_500_000, "pnl": 1_500_000,
+        "positions": [
+            {"symbol": f"{i:06d}", "name": f"종목{i}", "qty": 10 + i, "avg_price": 70000 + i * 10,
+             "eval_price": 72000 + i * 7, "pnl": (2000 - i * 3) * (10 + i)}
+            for i in range(200)
+        ],
+    }}
+    results = {"ok": True, "mode": "BULK", "partial_ok": False, "results": [
+        {"ok": True, "data": {"echo": f"message-{i}"}, "index": i, "metrics": {"elapsed_ms": 0.123}}
+        for i in range(bulk)
+    ], "metrics": {"items": bulk, "succeeded": bulk, "failed": 0, "skipped": 0, "elapsed_ms": 12.5}}
+    return {"demo.accounts LIST": accounts, "kis SUMMARY": summary, f"BULK x{bulk}": results}
+
+def _codecs():
+    out = {"json_stdlib": lambda o: json.dumps(o, ensure_ascii=False).encode("utf-8")}
+    if encoding.orjson is not None:
+        out["json_orjson"] = encoding.dumps_json
+    if encoding.msgpack is not None:
+        out["msgpack"] = encoding.ENCODERS[encoding.MSGPACK]
+    return out
+
+def _timed(fn, arg, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        out = fn(arg)
+    return (time.perf_counter() - t0) / n * 1e6, out
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=200)
+    p.add_argument("--bulk", type=int, default=1000)
+    args = p.parse_args()
+
+    report = []
+    for label, obj in _envelopes(args.bulk).items():
+        for codec, enc in _codecs().items():
+            us, body = _timed(enc, obj, args.n)
+            row = {"envelope": label, "codec": codec, "encode_us": round(us, 1), "bytes": len(body)}
+            for coding, comp in encoding.COMPRESSORS.items():
+                cus, cbody = _timed(comp, body, max(1, args.n // 10))
+                row[f"{coding}_us"] = round(cus, 1)
+                row[f"{coding}_bytes"] = len(cbody)
+            report.append(row)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: 보유 종목 평가 — 종목별 dict + generator sum(기존 SUMMARY 방식) vs 컬럼형 엔진(modules/broker/_positions.py)
+Usage:
+    python tools/bench_positions.py
+    python tools/bench_positions.py -n 20 --sizes 10000 100000 --no-numpy
+측정: KIS output1 원본 행 파싱, 합계(평가금액/손익), 종목별 합산+비중, 업종 exposure.
+numpy 가 없거나 --no-numpy 면 array.array 폴백을 잰다. 두 방식의 결과가 같은지도 확인한다.
+"""
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.broker import _positions
+from modules.broker._positions import Positions
+
+def _kis_rows(n: int, symbols: int):
+    rnd = random.Random(7)
+    return [{"pdno": f"{rnd.randrange(symbols):06d}", "hldg_qty": str(rnd.randint(1, 500)),
+             "pchs_avg_pric": f"{rnd.uniform(1000, 300000):.4f}", "prpr": str(rnd.randint(1000, 300000)),
+             "evlu_pfls_amt": str(rnd.randint(-1_000_000, 1_000_000))} for _ in range(n)]
+
+def _sector(sym: str) -> str:
+    return "S" + sym[-1]
+
+# ---- 기존 방식 ----
+def dicts_parse(rows):
+    out = []
+    for it in rows:
+        out.append({"symbol": it.get("pdno"), "qty": int(it.get("hldg_qty", "0")),
+                    "avg_price": float(it.get("pchs_avg_pric", "0")), "eval_price": float(it.get("prpr", "0")),
+                    "pnl": int(float(it.get("evlu_pfls_amt", "0")))})
+    return out
+
+def dicts_totals(positions):
+    return sum(int(p["qty"] * p["eval_price"]) for p in positions), sum(int(p["pnl"]) for p in positions)
+
+def dicts_by_symbol(positions):
+    agg = {}
+    for p in positions:
+        a = agg.setdefault(p["symbol"], [0, 0, 0])
+        a[0] += p["qty"]
+        a[1] += int(p["qty"] * p["eval_price"])
+        a[2] += p["pnl"]
+    total = sum(a[1] for a in agg.values())
+    return sorted(((s, a[0], a[1], a[2], a[1] / total) for s, a in agg.items()), key=lambda r: -r[2])
+
+def dicts_exposure(positions):
+    out = {}
+    for p in positions:
+        out[_sector(p["symbol"])] = out.get(_sector(p["symbol"]), 0) + int(p["qty"] * p["eval_price"])
+    return out
+
+def _timed(fn, arg, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        out = fn(arg)
+    return (time.perf_counter() - t0) / n * 1e3, out
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=10, help="반복 횟수")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--symbols", type=int, default=2500, help="서로 다른 종목 수")
+    p.add_argument("--no-numpy", action="store_true", help="array.array 폴백으로 측정")
+    args = p.parse_args()
+    if args.no_numpy:
+        _positions.np = None
+    print(f"backend: {'numpy ' + _positions.np.__version__ if _positions.np is not None else 'array (fallback)'}")
+    print(f"{'positions':>9}  {'step':<12} {'dicts ms':>10} {'columns ms':>11} {'speedup':>8}")
+    for size in args.sizes:
+        rows = _kis_rows(size, args.symbols)
+        t_dp, dicts = _timed(dicts_parse, rows, args.n)
+        t_cp, book = _timed(Positions.from_kis, rows, args.n)
+        steps = [
+            ("parse", t_dp, t_cp),
+            ("totals", _timed(dicts_totals, dicts, args.n)[0],
+             _timed(lambda b: (b.eval_amount(), b.pnl_amount()), book, args.n)[0]),
+            ("by_symbol", _timed(dicts_by_symbol, dicts, args.n)[0], _timed(Positions.by_symbol, book, args.n)[0]),
+            ("exposure", _timed(dicts_exposure, dicts, args.n)[0],
+             _timed(lambda b: b.exposure(_sector), book, args.n)[0]),
+        ]
+        for name, a, b in steps:
+            print(f"{size:>9}  {name:<12} {a:>10.2f} {b:>11.2f} {a / b if b else float('inf'):>7.1f}x")
+        # 결과 일치 확인
+        assert dicts_totals(dicts) == (book.eval_amount(), book.pnl_amount())
+        ref = dicts_by_symbol(dicts)
+        got = book.by_symbol()
+        assert [(r[0], r[1], r[2], r[3]) for r in ref] == [(g["symbol"], g["qty"], g["eval_amount"], g["pnl"]) for g in got]
+        assert dicts_exposure(dicts) == {k: v["eval_amount"] for k, v in book.exposure(_sector).items()}
+    print("results match")
+
+if __name__ == "__main__":
+    main()